@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from psycopg2.extras import Json
+from config import Config
+from jobs import json_safe
+from reference_profile import PROFILE_VERSION
+
+# Bump whenever drift computation changes in a way that alters results;
+# stored runs from older code then stop matching and are recomputed
+ANALYSIS_VERSION = 3
+
+
+def dataset_fingerprint(content_hash, source):
+    """Identify dataset content: the upload's SHA-256, or the file's version for legacy rows"""
+    if content_hash:
+        return content_hash
+    st = os.stat(source)
+    return f"{os.path.realpath(source)}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def analysis_cache_key(reference_dataset_id, current_dataset_id, reference_fingerprint, current_fingerprint, params):
+    """Cache key for one analysis: dataset pair, their contents, method parameters and code version.
+
+    `params` must hold every request option that changes the result; the
+    settings the reference profiles are built with are folded in here.
+    """
+    method = {
+        **params,
+        'profile_version': PROFILE_VERSION,
+        'profile_sample_size': Config.PROFILE_SAMPLE_SIZE,
+        'sketch_k': Config.SKETCH_K,
+        'categorical_max_categories': Config.CATEGORICAL_MAX_CATEGORIES,
+        'categorical_counter_capacity': Config.CATEGORICAL_COUNTER_CAPACITY,
+    }
+    material = json.dumps(
+        [ANALYSIS_VERSION, int(reference_dataset_id), int(current_dataset_id),
+         reference_fingerprint, current_fingerprint, method],
+        sort_keys=True
+    )
+    return hashlib.sha256(material.encode()).hexdigest(), method
+
+
+def find_analysis_run(cur, user_id, cache_key):
+    """Stored result for this cache key, or None; counts the hit"""
+    cur.execute(
+        """
+        UPDATE analysis_runs SET hit_count = hit_count + 1, last_hit_at = CURRENT_TIMESTAMP
+        WHERE user_id = %s AND cache_key = %s
+        RETURNING result
+        """,
+        (user_id, cache_key)
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def save_analysis_run(cur, run_id, user_id, reference_dataset_id, current_dataset_id, cache_key, method, result):
+    """Store a finished run's result; a recomputed run replaces the earlier one for the same key"""
+    cur.execute(
+        """
+        INSERT INTO analysis_runs
+            (id, user_id, reference_dataset_id, current_dataset_id, cache_key, params, code_version, result)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (user_id, cache_key) DO UPDATE SET
+            id = EXCLUDED.id,
+            params = EXCLUDED.params,
+            result = EXCLUDED.result,
+            hit_count = 0,
+            created_at = CURRENT_TIMESTAMP,
+            last_hit_at = NULL
+        """,
+        (run_id, user_id, reference_dataset_id, current_dataset_id, cache_key,
+         Json(method), ANALYSIS_VERSION, Json(json_safe(result)))
+    )
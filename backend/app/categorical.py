@@ -0,0 +1,189 @@
+from config import Config
+from drift_engine import PSI_FLOOR, PSI_THRESHOLD
+from reference_profile import PROFILE_VERSION
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+stats = lazy_module("scipy.stats")
+
+
+def dictionary_encode(series):
+    """Integer codes for a column plus its distinct values as strings (one hash pass, no per-row Python).
+
+    Missing values, and empty strings (which CSV readers produce for blank
+    fields), get code -1.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = pd.Index(uniques).astype(str)
+    if not uniques.is_unique:
+        # Distinct values with the same text (1 and '1' in an object column) are one category
+        merged, uniques = pd.factorize(uniques)
+        codes = np.where(codes >= 0, merged[codes], -1)
+        uniques = pd.Index(uniques)
+    blank = np.flatnonzero(uniques == '')
+    if len(blank):
+        codes = np.where(np.isin(codes, blank), -1, codes)
+    return codes, uniques
+
+
+class CategoryCounter:
+    """Bounded-memory category counts accumulated chunk by chunk.
+
+    Each chunk is dictionary-encoded and counted with bincount; the per-chunk
+    counts are merged into the tracked categories by hash lookup. Once more
+    than `capacity` categories are tracked, all but the most frequent half are
+    folded into `pruned` (Misra-Gries style): frequent categories keep
+    near-exact counts while memory stays bounded however many distinct values
+    the column has.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or Config.CATEGORICAL_COUNTER_CAPACITY
+        self.keys = pd.Index([], dtype=object)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.pruned = 0
+        self.exact = True
+
+    def update(self, series):
+        codes, uniques = dictionary_encode(series)
+        chunk_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+        positions = self.keys.get_indexer(uniques)
+        known = positions >= 0
+        self.counts[positions[known]] += chunk_counts[known]
+        new = ~known & (chunk_counts > 0)
+        self.keys = self.keys.append(uniques[new])
+        self.counts = np.concatenate([self.counts, chunk_counts[new]])
+
+        if len(self.keys) > self.capacity:
+            kept = np.argpartition(-self.counts, self.capacity // 2)[:self.capacity // 2]
+            self.pruned += int(self.counts.sum() - self.counts[kept].sum())
+            self.keys, self.counts = self.keys[kept], self.counts[kept]
+            self.exact = False
+
+    def profile(self, max_categories=None):
+        """Reference profile keeping the most frequent categories, the rest as 'other'"""
+        max_categories = max_categories or Config.CATEGORICAL_MAX_CATEGORIES
+        total = int(self.counts.sum()) + self.pruned
+        if total == 0:
+            return None
+
+        # Highest count first, ties by category so the profile is deterministic
+        top = np.lexsort((self.keys.to_numpy(), -self.counts))[:max_categories]
+        return {
+            'version': PROFILE_VERSION,
+            'kind': 'categorical',
+            'count': total,
+            'categories': self.keys[top].tolist(),
+            'category_counts': self.counts[top].tolist(),
+            'other_count': int(total - self.counts[top].sum()),
+            'categories_tracked': int(len(self.keys)),
+            'exact': bool(self.exact and len(self.keys) <= max_categories)
+        }
+
+
+def build_categorical_profiles(chunks, columns, max_categories=None):
+    """Categorical reference profiles from DataFrame chunks, in one bounded-memory pass"""
+    counters = {col: CategoryCounter() for col in columns}
+    for chunk in chunks:
+        for col in columns:
+            counters[col].update(chunk[col])
+
+    profiles = {}
+    for col, counter in counters.items():
+        profile = counter.profile(max_categories)
+        if profile:
+            profiles[col] = profile
+    return profiles
+
+
+def category_counts(profile, series):
+    """Current counts per reference category plus 'other' (length K + 1).
+
+    The column is dictionary-encoded once; only its distinct values are
+    looked up against the reference categories, unknown ones mapping to 'other'.
+    """
+    codes, uniques = dictionary_encode(series)
+    categories = profile['categories']
+    lookup = pd.Index(categories).get_indexer(uniques)
+    lookup[lookup < 0] = len(categories)
+    return np.bincount(lookup[codes[codes >= 0]], minlength=len(categories) + 1)
+
+
+def categorical_drift(ref_counts, curr_counts):
+    """PSI, chi-square test of homogeneity and Jensen-Shannon divergence between two count vectors"""
+    ref_counts = np.asarray(ref_counts, dtype=float)
+    curr_counts = np.asarray(curr_counts, dtype=float)
+    ref_dist = ref_counts / ref_counts.sum()
+    curr_dist = curr_counts / curr_counts.sum()
+
+    floored_ref = np.where(ref_dist == 0, PSI_FLOOR, ref_dist)
+    floored_curr = np.where(curr_dist == 0, PSI_FLOOR, curr_dist)
+    psi = float(np.sum((floored_curr - floored_ref) * np.log(floored_curr / floored_ref)))
+
+    # Categories absent from both samples carry no information
+    observed = np.vstack([ref_counts, curr_counts])[:, (ref_counts + curr_counts) > 0]
+    if observed.shape[1] > 1:
+        expected = observed.sum(axis=1, keepdims=True) * observed.sum(axis=0, keepdims=True) / observed.sum()
+        chi_square = float(np.sum((observed - expected) ** 2 / expected))
+        chi_square_p = float(stats.chi2.sf(chi_square, observed.shape[1] - 1))
+    else:
+        chi_square, chi_square_p = 0.0, 1.0
+
+    middle = (ref_dist + curr_dist) / 2
+    def kl(p):
+        nonzero = p > 0
+        return np.sum(p[nonzero] * np.log2(p[nonzero] / middle[nonzero]))
+    js = float(max((kl(ref_dist) + kl(curr_dist)) / 2, 0.0))
+
+    return psi, chi_square, chi_square_p, js
+
+
+def categorical_result(col, profile, curr_counts, top=5):
+    """Per-feature drift entry for a categorical column"""
+    ref_counts = np.append(profile['category_counts'], profile['other_count'])
+    psi, chi_square, chi_square_p, js = categorical_drift(ref_counts, curr_counts)
+
+    labels = profile['categories'] + ['__other__']
+    ref_share = ref_counts / ref_counts.sum()
+    curr_share = curr_counts / curr_counts.sum()
+    change = curr_share - ref_share
+    largest = np.argsort(-np.abs(change), kind='stable')[:top]
+
+    return {
+        'feature_name': str(col),
+        'feature_type': 'categorical',
+        'drift_score': psi,
+        'drift_detected': bool(psi > PSI_THRESHOLD),
+        'psi_score': psi,
+        'chi_square_statistic': chi_square,
+        'chi_square_p_value': chi_square_p,
+        'js_divergence': js,
+        'reference_categories': len(profile['categories']),
+        'reference_other_share': float(ref_share[-1]),
+        'current_other_share': float(curr_share[-1]),
+        'largest_shifts': [
+            {
+                'category': labels[i],
+                'reference_share': float(ref_share[i]),
+                'current_share': float(curr_share[i])
+            }
+            for i in largest
+        ]
+    }
+
+
+def analyze_categorical(profiles, chunks, columns):
+    """Categorical drift of current data, fed as DataFrame chunks, against reference profiles"""
+    columns = [c for c in columns if c in profiles]
+    totals = {col: np.zeros(len(profiles[col]['categories']) + 1, dtype=np.int64) for col in columns}
+    for chunk in chunks:
+        for col in columns:
+            totals[col] += category_counts(profiles[col], chunk[col])
+
+    return [
+        categorical_result(col, profiles[col], totals[col])
+        for col in columns
+        if totals[col].sum() > 0
+    ]
@@ -1,8 +1,89 @@
 import os
 
+CPU_COUNT = os.cpu_count() or 1
+# Read ahead of Config: per-process pools below default to a share of the machine per web worker
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", CPU_COUNT))
+
 class Config:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL")
+    DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", 90))  # budget across all web workers; keep below Postgres max_connections (100 by default)
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", max(2, min(20, DB_MAX_CONNECTIONS // WEB_WORKERS))))  # per web worker
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+    DB_POOL_HEALTHCHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", 30))  # ping connections idle longer than this
+    DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", 10))  # startup only
+    DB_CONNECT_RETRY_DELAY = float(os.getenv("DB_CONNECT_RETRY_DELAY", 3))
+    
+    # Drift analysis
+    PROFILE_SAMPLE_SIZE = int(os.getenv("PROFILE_SAMPLE_SIZE", 2048))  # reference values kept per column for KS
+    SKETCH_K = int(os.getenv("SKETCH_K", 512))  # quantile sketch size, rank error ~ 2.3 / k
+    DRIFT_CHUNK_SIZE = int(os.getenv("DRIFT_CHUNK_SIZE", 100000))  # rows per chunk in streaming mode
+    DRIFT_STREAMING_THRESHOLD_BYTES = int(os.getenv("DRIFT_STREAMING_THRESHOLD_BYTES", 512 * 1024 * 1024))
+    KS_ERROR_BOUND = float(os.getenv("KS_ERROR_BOUND", 0.005))  # rank error allowed for current-data sketches (streaming)
+    SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", 10000))  # default rows drawn in sampling mode
+    SAMPLE_BOOTSTRAP_ROUNDS = int(os.getenv("SAMPLE_BOOTSTRAP_ROUNDS", 200))  # resamples behind PSI confidence intervals
+    MAX_SAMPLE_STRATA = int(os.getenv("MAX_SAMPLE_STRATA", 1000))
+    CATEGORICAL_MAX_CATEGORIES = int(os.getenv("CATEGORICAL_MAX_CATEGORIES", 200))  # reference categories kept; the rest fold into "other"
+    CATEGORICAL_COUNTER_CAPACITY = int(os.getenv("CATEGORICAL_COUNTER_CAPACITY", 200000))  # distinct values tracked while profiling
+    DRIFT_WORKERS = int(os.getenv("DRIFT_WORKERS", max(1, CPU_COUNT // WEB_WORKERS)))  # processes per web worker sharding feature columns; 1 disables
+    DRIFT_PARALLEL_MIN_COLUMNS = int(os.getenv("DRIFT_PARALLEL_MIN_COLUMNS", 200))  # shard automatically from this many features
+    
+    # Uploads
+    MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 100 * 1024 * 1024))  # single-request uploads
+    MAX_CONTENT_LENGTH = MAX_UPLOAD_SIZE + 1024 * 1024  # Flask rejects larger bodies before parsing (multipart overhead allowed)
+    MAX_CHUNKED_UPLOAD_SIZE = int(os.getenv("MAX_CHUNKED_UPLOAD_SIZE", 10 * 1024 * 1024 * 1024))  # resumable uploads
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))  # default chunk size offered to clients
+    MAX_UPLOAD_CHUNK_SIZE = int(os.getenv("MAX_UPLOAD_CHUNK_SIZE", 64 * 1024 * 1024))
+    MAX_UPLOAD_CHUNKS = int(os.getenv("MAX_UPLOAD_CHUNKS", 10000))
+    UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))  # seconds an upload may sit idle before it expires
+    MAX_OPEN_UPLOAD_SESSIONS = int(os.getenv("MAX_OPEN_UPLOAD_SESSIONS", 10))  # unexpired open uploads per user
+    
+    # Model cache
+    MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))  # 0 disables caching
+    
+    # Model evaluation
+    EVAL_CHUNK_SIZE = int(os.getenv("EVAL_CHUNK_SIZE", 100000))  # rows predicted per batch
+    
+    # Model comparison
+    COMPARE_WORKERS = int(os.getenv("COMPARE_WORKERS", 4))  # models evaluated in parallel by /model-drift/compare, per web worker
+    COMPARE_MODEL_TIMEOUT = float(os.getenv("COMPARE_MODEL_TIMEOUT", 120))  # seconds per model
+    
+    # Background jobs
+    JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread")  # "thread" pool, or "inline" to run on submit (tests)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", 1))  # min seconds between progress writes
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", 15))
+    JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", 120))  # running jobs without a heartbeat this long are re-queued
+    
+    # Serving (gunicorn.conf.py; `python app/main.py` runs the development server)
+    DEBUG = os.getenv("FLASK_DEBUG", "false").lower() == "true"  # development server only
+    WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:8000")
+    WEB_WORKERS = WEB_WORKERS  # processes; each holds its own DB pool and drift/compare process pools
+    WEB_THREADS = int(os.getenv("WEB_THREADS", 4))  # request threads per worker process
+    WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", 300))  # seconds before a silent worker is killed and replaced
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 60))  # seconds to finish requests and jobs on shutdown
+    WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 0))  # recycle workers after this many requests; 0 disables
+    WARM_UP_IMPORTS = os.getenv("WARM_UP_IMPORTS", "true").lower() == "true"  # gunicorn master imports the analytics stack before forking
+    
+    # Telemetry
+    STRUCTURED_LOG = os.getenv("STRUCTURED_LOG", "true").lower() == "true"  # one JSON line per request on stderr
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # when set, /metrics requires "Authorization: Bearer <token>"
+    
+    # Profiling (sampling profiler for /drift/analyze and /model-drift/evaluate, see profiler.py)
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    PROFILE_SLOW_REQUEST_SECONDS = float(os.getenv("PROFILE_SLOW_REQUEST_SECONDS", 30))  # keep profiles of requests at least this slow
+    PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.01))  # seconds between stack samples
+    PROFILER_MAX_OVERHEAD = float(os.getenv("PROFILER_MAX_OVERHEAD", 0.02))  # share of wall time the sampler may spend sampling
+    PROFILER_MAX_ACTIVE = int(os.getenv("PROFILER_MAX_ACTIVE", 4))  # requests sampled at once per process; others run unprofiled
+    PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", 200))  # newest profiles kept in request_profiles
+    
+    # Schema and retention
+    AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() == "true"  # apply pending migrations at startup
+    DRIFT_LOG_RETENTION_DAYS = int(os.getenv("DRIFT_LOG_RETENTION_DAYS", 0))  # 0 (default) keeps drift logs forever
+    DRIFT_ROLLUP_RETENTION_DAYS = int(os.getenv("DRIFT_ROLLUP_RETENTION_DAYS", DRIFT_LOG_RETENTION_DAYS))  # defaults to the drift log window; 0 keeps rollups forever
+    DRIFT_LOG_PARTITIONS_AHEAD = int(os.getenv("DRIFT_LOG_PARTITIONS_AHEAD", 3))  # monthly partitions created in advance
+    RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", 6 * 3600))  # seconds between maintenance runs, 0 disables
     
     # JWT Configuration
     SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-change-in-production")
@@ -23,6 +104,7 @@ class Config:
     
     # Security
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 3600))  # 1 hour default
+    ADMIN_USER_IDS = {i.strip() for i in os.getenv("ADMIN_USER_IDS", "").split(",") if i.strip()}  # user ids allowed on /admin endpoints
     
     # CORS settings
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
\ No newline at end of file
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import tempfile
+
+STREAM_CHUNK_SIZE = 1024 * 1024  # bytes copied (and hashed) per read
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def file_extension(filename):
+    return os.path.splitext(filename)[1].lower()
+
+
+def content_path(directory, content_hash, extension):
+    """Where a file with this SHA-256 lives; identical uploads share one copy"""
+    return os.path.join(directory, content_hash + extension)
+
+
+def store_stream(stream, directory, extension, max_size=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Copy a stream into content-addressed storage, hashing it on the way.
+
+    Returns (path, sha256 hex digest, size in bytes, created) where `created` is
+    False when identical content was already stored and the copy was dropped.
+    Raises UploadTooLarge as soon as more than `max_size` bytes have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    # Written under a temporary name in the same directory so the final rename is atomic
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge(f"File exceeds the {max_size} byte upload limit")
+                digest.update(chunk)
+                out.write(chunk)
+
+        content_hash = digest.hexdigest()
+        path = content_path(directory, content_hash, extension)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return path, content_hash, size, False
+
+        os.replace(temp_path, path)
+        return path, content_hash, size, True
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,187 @@
+import os
+import tempfile
+from lazy_imports import lazy_module
+
+pd = lazy_module("pandas")
+pa = lazy_module("pyarrow")
+pa_csv = lazy_module("pyarrow.csv")
+feather = lazy_module("pyarrow.feather")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COLUMNAR_DIR = os.path.join(BASE_DIR, "uploads/columnar")
+
+os.makedirs(COLUMNAR_DIR, exist_ok=True)
+
+COLUMNAR_EXTENSION = '.arrow'
+CSV_BLOCK_SIZE = 64 * 1024 * 1024  # bytes parsed per CSV block while converting
+
+
+def _is_numeric_type(arrow_type):
+    """Arrow types that pandas reports as np.number"""
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+
+
+def _is_categorical_type(arrow_type):
+    """Arrow type names (as stored in schemas) analyzed as categories"""
+    return arrow_type in ('string', 'large_string', 'bool') or arrow_type.startswith('dictionary<')
+
+
+def _pandas_column_names(names):
+    """Name blank and duplicate CSV headers the way pd.read_csv does"""
+    result = []
+    seen = {}
+    for i, name in enumerate(names):
+        if name == '':
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        result.append(name)
+    return result
+
+
+def _iter_source_batches(path):
+    """Return (schema, batch iterator) for an uploaded dataset file"""
+    lower = path.lower()
+
+    if lower.endswith('.csv'):
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE))
+        names = _pandas_column_names(reader.schema.names)
+        if names == reader.schema.names:
+            return reader.schema, iter(reader)
+        schema = pa.schema([field.with_name(name) for field, name in zip(reader.schema, names)])
+        return schema, (pa.RecordBatch.from_arrays(batch.columns, schema=schema) for batch in reader)
+
+    if lower.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        return parquet_file.schema_arrow, parquet_file.iter_batches()
+
+    if lower.endswith('.json'):
+        table = pa.Table.from_pandas(pd.read_json(path), preserve_index=False)
+        return table.schema, iter(table.to_batches())
+
+    raise ValueError(f"Unsupported dataset format: {os.path.basename(path)}")
+
+
+def _write_columnar(batches, schema, columnar_path):
+    """Write batches to an uncompressed Arrow IPC file, returning row/null counts"""
+    num_rows = 0
+    null_counts = [0] * len(schema)
+
+    # Columnar copies are shared by identical uploads and may be memory-mapped by
+    # a running analysis, so they are replaced atomically rather than rewritten
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(columnar_path), suffix='.part')
+    os.close(fd)
+    try:
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    num_rows += batch.num_rows
+                    for i, column in enumerate(batch.columns):
+                        null_counts[i] += column.null_count
+        os.replace(temp_path, columnar_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return num_rows, null_counts
+
+
+def infer_schema(schema, num_rows, null_counts):
+    """Describe an Arrow schema in a JSON-serializable form"""
+    return {
+        'num_rows': int(num_rows),
+        'columns': [
+            {
+                'name': field.name,
+                'type': str(field.type),
+                'numeric': _is_numeric_type(field.type),
+                'null_count': int(null_count)
+            }
+            for field, null_count in zip(schema, null_counts)
+        ]
+    }
+
+
+def convert_to_columnar(path):
+    """Convert an uploaded dataset to a typed Arrow copy, returning (path, schema)"""
+    columnar_path = os.path.join(COLUMNAR_DIR, os.path.basename(path) + COLUMNAR_EXTENSION)
+
+    try:
+        schema, batches = _iter_source_batches(path)
+        num_rows, null_counts = _write_columnar(batches, schema, columnar_path)
+    except pa.ArrowInvalid as e:
+        # Streaming CSV inference only sees the first block; let pandas infer over the
+        # whole file, read with the reader for its format
+        print(f"Columnar streaming conversion failed ({e}), falling back to pandas")
+        table = read_table(path)
+        schema = table.schema
+        num_rows, null_counts = _write_columnar(table.to_batches(), schema, columnar_path)
+
+    return columnar_path, infer_schema(schema, num_rows, null_counts)
+
+
+def column_names(schema):
+    return [c['name'] for c in schema['columns']]
+
+
+def numeric_columns(schema):
+    return [c['name'] for c in schema['columns'] if c['numeric']]
+
+
+def categorical_columns(schema):
+    return [c['name'] for c in schema['columns'] if _is_categorical_type(c['type'])]
+
+
+def read_dataset(path, columns=None):
+    """Load a dataset, reading only `columns` when given"""
+    lower = path.lower()
+
+    if lower.endswith(COLUMNAR_EXTENSION):
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if lower.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    if lower.endswith('.json'):
+        df = pd.read_json(path)
+        return df[columns] if columns is not None else df
+
+    return pd.read_csv(path, usecols=columns)
+
+
+def read_table(path):
+    """Load a whole dataset as an Arrow table; columnar copies are memory-mapped, not read"""
+    if path.lower().endswith(COLUMNAR_EXTENSION):
+        return feather.read_table(path, memory_map=True)
+    return pa.Table.from_pandas(read_dataset(path), preserve_index=False)
+
+
+def iter_table_chunks(table, columns=None, chunk_size=100000):
+    """Yield an Arrow table as DataFrames of at most `chunk_size` rows"""
+    if columns is not None:
+        table = table.select(columns)
+    # Slicing does not copy until a slice is converted
+    for offset in range(0, table.num_rows, chunk_size):
+        yield table.slice(offset, chunk_size).to_pandas()
+
+
+def iter_dataset_chunks(path, columns=None, chunk_size=100000):
+    """Yield a dataset as DataFrames of at most `chunk_size` rows"""
+    lower = path.lower()
+
+    if lower.endswith(COLUMNAR_EXTENSION):
+        # Memory-mapped and uncompressed
+        yield from iter_table_chunks(feather.read_table(path, columns=columns, memory_map=True), chunk_size=chunk_size)
+    elif lower.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif lower.endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+    else:
+        df = read_dataset(path, columns=columns)
+        for offset in range(0, len(df), chunk_size):
+            yield df.iloc[offset:offset + chunk_size]
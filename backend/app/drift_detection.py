@@ -1,253 +1,493 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import pandas as pd
-import numpy as np
-from scipy import stats
+from psycopg2.extras import execute_values
 from models import get_db
+from dataset_store import read_dataset, iter_dataset_chunks, column_names, numeric_columns, categorical_columns
+from reference_profile import PROFILE_VERSION, load_reference_profiles, save_reference_profiles
+from drift_engine import KS_METHODS, analyze_columns
+from drift_stats import calculate_statistics, kolmogorov_smirnov_test, population_stability_index
+from streaming import analyze_streaming, build_profiles_streaming
+from categorical import analyze_categorical, build_categorical_profiles
+from sampling import analyze_sample, reservoir_sample, stratified_sample
+from drift_parallel import analyze_parallel, can_run_parallel
+from sketches import sample_rank_error
+from errors import AnalysisError
+from drift_rollups import HISTORY_RESOLUTIONS, record_drift_rollups
+from analysis_runs import analysis_cache_key, dataset_fingerprint, find_analysis_run, save_analysis_run
+from jobs import register_job_type, submit_job
+from profiler import profiled
+from telemetry import count_cache, log_event, pipeline, request_id, stage
+from config import Config
 import os
+import traceback
+import uuid
 from datetime import datetime, timedelta
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
 
 drift_bp = Blueprint("drift", __name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_DIR = os.path.join(BASE_DIR, "uploads/datasets")
 
-def kolmogorov_smirnov_test(reference_data, current_data):
-    """Perform KS test for drift detection"""
-    try:
-        statistic, p_value = stats.ks_2samp(reference_data, current_data)
-        return {
-            'statistic': float(statistic),
-            'p_value': float(p_value),
-            'drift_detected': bool(p_value < 0.05)  # ✅ Convert to bool explicitly
-        }
-    except Exception as e:
-        print(f"KS test error: {e}")
-        return None
+# Row sampling modes for quick, approximate analysis (see sampling.py)
+SAMPLE_MODES = ('reservoir', 'stratified')
 
-def population_stability_index(reference_data, current_data, bins=10):
-    """Calculate PSI for drift detection"""
+def build_reference_profile(reference_data, bins=10, sample_size=None):
+    """Summarize a reference column so later comparisons only scan the current data"""
+    sample_size = sample_size or Config.PROFILE_SAMPLE_SIZE
     try:
-        # Create bins based on reference data
-        _, bin_edges = np.histogram(reference_data, bins=bins)
-        
-        # Get distributions
-        ref_hist, _ = np.histogram(reference_data, bins=bin_edges)
-        curr_hist, _ = np.histogram(current_data, bins=bin_edges)
+        values = np.asarray(reference_data, dtype=float)
+        _, bin_edges = np.histogram(values, bins=bins)
+        bin_counts, _ = np.histogram(values, bins=bin_edges)
+        summary = calculate_statistics(values)
+        if summary is None:
+            return None
+        values = np.sort(values)
         
-        # Normalize
-        ref_dist = ref_hist / len(reference_data)
-        curr_dist = curr_hist / len(current_data)
-        
-        # Add small constant to avoid division by zero
-        ref_dist = np.where(ref_dist == 0, 0.0001, ref_dist)
-        curr_dist = np.where(curr_dist == 0, 0.0001, curr_dist)
-        
-        # Calculate PSI
-        psi = np.sum((curr_dist - ref_dist) * np.log(curr_dist / ref_dist))
+        # Keep every value for small columns, evenly spaced order statistics otherwise
+        sample_exact = len(values) <= sample_size
+        if not sample_exact:
+            values = values[np.linspace(0, len(values) - 1, sample_size).round().astype(int)]
         
         return {
-            'psi_score': float(psi),
-            'drift_detected': bool(psi > 0.1)  # ✅ Convert to bool explicitly
+            'version': PROFILE_VERSION,
+            'count': int(len(reference_data)),
+            'bin_edges': bin_edges.tolist(),
+            'bin_counts': bin_counts.tolist(),
+            'sample': values.tolist(),
+            'sample_exact': bool(sample_exact),
+            'rank_error': 0.0 if sample_exact else sample_rank_error(sample_size),
+            'stats': summary
         }
     except Exception as e:
-        print(f"PSI calculation error: {e}")
+        print(f"Reference profile error: {e}")
         return None
 
-def calculate_statistics(data):
-    """Calculate statistical metrics for a dataset"""
-    try:
-        return {
-            'mean': float(np.mean(data)),
-            'std': float(np.std(data)),
-            'min': float(np.min(data)),
-            'max': float(np.max(data)),
-            'median': float(np.median(data)),
-            'q25': float(np.percentile(data, 25)),
-            'q75': float(np.percentile(data, 75))
-        }
-    except Exception as e:
-        print(f"Statistics calculation error: {e}")
-        return None
+def drift_params_error(data):
+    """Validation message for /drift/analyze parameters, or None"""
+    if not data.get('reference_dataset_id') or not data.get('current_dataset_id'):
+        return "Both reference and current dataset IDs required"
+    ks_method = data.get('ks_method', 'auto')
+    if ks_method not in KS_METHODS:
+        return f"ks_method must be one of {list(KS_METHODS)}"
+    ks_error = data.get('ks_error_bound')
+    if ks_error is not None and (not isinstance(ks_error, (int, float)) or isinstance(ks_error, bool) or not 0 < ks_error < 1):
+        return "ks_error_bound must be a number between 0 and 1"
+    # Sketches only stand in for the current data when streaming; in memory KS is exact
+    in_memory = data.get('streaming') is False or data.get('sample_mode') is not None
+    if in_memory and (ks_method == 'approximate' or ks_error is not None):
+        return "ks_method 'approximate' and ks_error_bound apply to streaming analysis only"
+    if data.get('streaming') is True and ks_method == 'exact':
+        return "Streaming analysis computes KS from sketches; set streaming to false for exact KS"
+    if data.get('parallel') is not None and not isinstance(data.get('parallel'), bool):
+        return "parallel must be a boolean"
+    if data.get('streaming') is not None and not isinstance(data.get('streaming'), bool):
+        return "streaming must be a boolean"
+    chunk_size = data.get('chunk_size')
+    if chunk_size is not None and (not isinstance(chunk_size, int) or isinstance(chunk_size, bool) or chunk_size <= 0):
+        return "chunk_size must be a positive integer"
+    sample_mode = data.get('sample_mode')
+    if sample_mode is not None:
+        if sample_mode not in SAMPLE_MODES:
+            return f"sample_mode must be one of {list(SAMPLE_MODES)}"
+        if sample_mode == 'stratified' and not data.get('stratify_by'):
+            return "stratify_by is required for stratified sampling"
+        sample_size = data.get('sample_size', Config.SAMPLE_SIZE)
+        if not isinstance(sample_size, int) or isinstance(sample_size, bool) or sample_size <= 0:
+            return "sample_size must be a positive integer"
+        sample_seed = data.get('sample_seed', 0)
+        if not isinstance(sample_seed, int) or isinstance(sample_seed, bool) or sample_seed < 0:
+            return "sample_seed must be a non-negative integer"
+        confidence = data.get('confidence', 0.95)
+        if not isinstance(confidence, (int, float)) or not 0 < confidence < 1:
+            return "confidence must be a number between 0 and 1"
+    return None
 
-@drift_bp.route("/analyze", methods=["POST"])
-@jwt_required()
-def analyze_drift():
-    """Analyze drift between reference and current dataset"""
-    user_id = get_jwt_identity()
-    data = request.json
+def _save_drift_logs(cur, user_id, run_id, reference_dataset_id, current_dataset_id, drift_results, detected_at):
+    """Write one drift_logs row per feature in a single batched statement"""
+    execute_values(
+        cur,
+        """
+        INSERT INTO drift_logs
+            (run_id, reference_dataset_id, current_dataset_id, feature_name, drift_score, user_id, detected_at)
+        VALUES %s
+        """,
+        [
+            (run_id, reference_dataset_id, current_dataset_id, result['feature_name'], result['drift_score'], user_id, detected_at)
+            for result in drift_results
+        ],
+        page_size=max(len(drift_results), 1)
+    )
+
+def _no_progress(fraction, message=None):
+    pass
+
+@register_job_type('drift_analysis')
+@pipeline('drift_analysis')
+def run_drift_analysis(user_id, data, progress=_no_progress):
+    """Analyze drift between reference and current dataset, returning the response payload"""
+    error = drift_params_error(data)
+    if error:
+        raise AnalysisError(error)
     
     reference_dataset_id = data.get('reference_dataset_id')
     current_dataset_id = data.get('current_dataset_id')
     
-    if not reference_dataset_id or not current_dataset_id:
-        return jsonify({"error": "Both reference and current dataset IDs required"}), 400
-    
     conn = get_db()
     cur = conn.cursor()
     
     try:
-        # Get reference dataset
-        cur.execute(
-            "SELECT filename, path FROM uploaded_datasets WHERE id = %s AND user_id = %s",
-            (reference_dataset_id, user_id)
-        )
-        ref_result = cur.fetchone()
+        progress(0.0, "Loading dataset metadata")
         
-        # Get current dataset
-        cur.execute(
-            "SELECT filename, path FROM uploaded_datasets WHERE id = %s AND user_id = %s",
-            (current_dataset_id, user_id)
-        )
-        curr_result = cur.fetchone()
+        with stage("db_lookup"):
+            # Get reference dataset
+            cur.execute(
+                "SELECT filename, path, columnar_path, schema, content_hash FROM uploaded_datasets WHERE id = %s AND user_id = %s",
+                (reference_dataset_id, user_id)
+            )
+            ref_result = cur.fetchone()
+        
+            # Get current dataset
+            cur.execute(
+                "SELECT filename, path, columnar_path, schema, content_hash FROM uploaded_datasets WHERE id = %s AND user_id = %s",
+                (current_dataset_id, user_id)
+            )
+            curr_result = cur.fetchone()
         
         if not ref_result or not curr_result:
-            return jsonify({"error": "Dataset not found"}), 404
+            raise AnalysisError("Dataset not found", 404)
         
-        print(f"Loading reference: {ref_result[1]}")
-        print(f"Loading current: {curr_result[1]}")
+        ref_source = ref_result[2] or ref_result[1]
+        curr_source = curr_result[2] or curr_result[1]
+        ref_schema, curr_schema = ref_result[3], curr_result[3]
         
-        # Load datasets
-        ref_df = pd.read_csv(ref_result[1])
-        curr_df = pd.read_csv(curr_result[1])
+        # Large files are streamed in chunks so memory stays bounded by the chunk size
+        has_schemas = bool(ref_schema and curr_schema)
+        sample_mode = data.get('sample_mode')
+        # Sampling reads the current dataset chunk by chunk itself
+        streaming = False if sample_mode else data.get('streaming')
+        # An explicit KS mode picks the path: sketches only exist when streaming
+        ks_method = data.get('ks_method', 'auto')
+        if streaming is None and (ks_method == 'approximate' or data.get('ks_error_bound') is not None):
+            streaming = True
+        elif streaming is None and ks_method == 'exact':
+            streaming = False
+        if streaming is None:
+            streaming = has_schemas and max(
+                os.path.getsize(ref_source), os.path.getsize(curr_source)
+            ) > Config.DRIFT_STREAMING_THRESHOLD_BYTES
+        chunk_size = data.get('chunk_size') or Config.DRIFT_CHUNK_SIZE
         
-        print(f"Reference shape: {ref_df.shape}")
-        print(f"Current shape: {curr_df.shape}")
+        if streaming and not has_schemas:
+            raise AnalysisError("Streaming analysis requires datasets uploaded with a columnar copy")
+        if chunk_size <= 0:
+            raise AnalysisError("chunk_size must be positive")
         
-        # Get numeric columns
-        numeric_cols = ref_df.select_dtypes(include=[np.number]).columns.tolist()
+        ks_error = float(data.get('ks_error_bound') or Config.KS_ERROR_BOUND)
+        sampling = None
+        if sample_mode:
+            sampling = {
+                'mode': sample_mode,
+                'sample_size': data.get('sample_size', Config.SAMPLE_SIZE),
+                'seed': data.get('sample_seed', 0),
+                'stratify_by': data.get('stratify_by') if sample_mode == 'stratified' else None,
+                'confidence': float(data.get('confidence', 0.95))
+            }
         
-        print(f"Numeric columns: {numeric_cols}")
+        # Same datasets (by content), options and code version -> reuse the stored run
+        cache_key, method = analysis_cache_key(
+            reference_dataset_id, current_dataset_id,
+            dataset_fingerprint(ref_result[4], ref_source), dataset_fingerprint(curr_result[4], curr_source),
+            {
+                'streaming': bool(streaming),
+                'chunk_size': chunk_size if streaming else None,
+                'ks_method': 'approximate' if streaming else 'exact',
+                'ks_error_bound': ks_error if streaming else None,
+                'sampling': sampling and {**sampling, 'bootstrap_rounds': Config.SAMPLE_BOOTSTRAP_ROUNDS}
+            }
+        )
+        if not data.get('refresh'):
+            with stage("db_lookup"):
+                cached = find_analysis_run(cur, user_id, cache_key)
+                conn.commit()
+            count_cache("analysis_runs", hits=cached is not None, misses=cached is None)
+            if cached is not None:
+                log_event("drift_analysis", request_id=request_id(), run_id=cached.get('run_id'), cached=True,
+                          reference_dataset_id=reference_dataset_id, current_dataset_id=current_dataset_id)
+                return {**cached, "cached": True}
         
-        if len(numeric_cols) == 0:
-            return jsonify({"error": "No numeric columns found in datasets"}), 400
+        # Resolve numeric and categorical columns from the schemas when known, otherwise load everything
+        ref_df = curr_df = None
+        if has_schemas:
+            numeric_cols = numeric_columns(ref_schema)
+            categorical_cols = categorical_columns(ref_schema)
+            curr_names = set(column_names(curr_schema))
+        else:
+            with stage("file_load"):
+                ref_df = read_dataset(ref_source)
+                curr_df = read_dataset(curr_source)
+            numeric_cols = ref_df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_cols = ref_df.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+            curr_names = set(curr_df.columns)
         
-        # Analyze drift for each numeric column
-        drift_results = []
-        total_drift_score = 0
+        if len(numeric_cols) == 0 and len(categorical_cols) == 0:
+            raise AnalysisError("No numeric or categorical columns found in datasets")
         
-        for col in numeric_cols:
-            if col not in curr_df.columns:
-                print(f"Column {col} not in current dataset, skipping")
-                continue
-            
-            ref_data = ref_df[col].dropna()
-            curr_data = curr_df[col].dropna()
-            
-            if len(ref_data) == 0 or len(curr_data) == 0:
-                print(f"Column {col} has no data, skipping")
-                continue
-            
-            print(f"Processing column: {col}")
-            
-            # Perform drift tests
-            ks_result = kolmogorov_smirnov_test(ref_data, curr_data)
-            psi_result = population_stability_index(ref_data, curr_data)
-            ref_stats = calculate_statistics(ref_data)
-            curr_stats = calculate_statistics(curr_data)
-            
-            if not ks_result or not psi_result or not ref_stats or not curr_stats:
-                print(f"Failed to calculate metrics for {col}, skipping")
-                continue
-            
-            # Calculate percentage change in mean
-            mean_change = 0
-            if ref_stats['mean'] != 0:
-                mean_change = ((curr_stats['mean'] - ref_stats['mean']) / ref_stats['mean']) * 100
-            
-            drift_score = psi_result['psi_score'] if psi_result else ks_result['statistic']
-            drift_detected = psi_result['drift_detected'] if psi_result else ks_result['drift_detected']
-            
-            total_drift_score += drift_score
-            
-            result = {
-                'feature_name': str(col),  # ✅ Ensure string
-                'drift_score': float(drift_score),  # ✅ Ensure float
-                'drift_detected': bool(drift_detected),  # ✅ Ensure bool
-                'ks_statistic': float(ks_result['statistic']) if ks_result else None,
-                'ks_p_value': float(ks_result['p_value']) if ks_result else None,
-                'psi_score': float(psi_result['psi_score']) if psi_result else None,
-                'reference_stats': ref_stats,
-                'current_stats': curr_stats,
-                'mean_change_percent': float(mean_change)
-            }
+        # Reference side comes from persisted profiles; only unprofiled columns are read
+        with stage("db_lookup"):
+            profiles = load_reference_profiles(cur, reference_dataset_id, numeric_cols)
+            missing = [c for c in numeric_cols if c not in profiles]
+            category_profiles = load_reference_profiles(cur, reference_dataset_id, categorical_cols)
+            missing_categorical = [c for c in categorical_cols if c not in category_profiles]
+        count_cache(
+            "reference_profiles",
+            hits=len(profiles) + len(category_profiles), misses=len(missing) + len(missing_categorical)
+        )
+        
+        if missing:
+            progress(0.1, f"Building reference profiles for {len(missing)} columns")
+            if streaming:
+                with stage("profile_build"):
+                    new_profiles = build_profiles_streaming(ref_source, missing, chunk_size=chunk_size)
+            else:
+                if ref_df is None:
+                    with stage("file_load"):
+                        ref_df = read_dataset(ref_source, columns=missing)
+                
+                with stage("profile_build"):
+                    new_profiles = {}
+                    for col in missing:
+                        ref_data = ref_df[col].dropna()
+                        if len(ref_data) == 0:
+                            continue
+                        profile = build_reference_profile(ref_data)
+                        if profile:
+                            new_profiles[col] = profile
             
-            drift_results.append(result)
+            with stage("db_write"):
+                save_reference_profiles(cur, reference_dataset_id, new_profiles)
+                conn.commit()
+                profiles.update(new_profiles)
+        
+        if missing_categorical:
+            if ref_df is not None and all(c in ref_df.columns for c in missing_categorical):
+                ref_chunks = [ref_df[missing_categorical]]
+            else:
+                ref_chunks = iter_dataset_chunks(ref_source, missing_categorical, chunk_size)
+            with stage("profile_build"):
+                new_profiles = build_categorical_profiles(ref_chunks, missing_categorical)
+            with stage("db_write"):
+                save_reference_profiles(cur, reference_dataset_id, new_profiles)
+                conn.commit()
+                category_profiles.update(new_profiles)
+        ref_df = None
+        
+        feature_cols = [c for c in numeric_cols if c in curr_names and c in profiles]
+        
+        # Analyze drift for all numeric columns in one batched pass, or sharded
+        # across worker processes for wide columnar datasets
+        progress(0.3, f"Analyzing {len(feature_cols)} features")
+        if sampling:
+            mode = 'sampling'
+            if not feature_cols:
+                raise AnalysisError("Sampling mode analyzes numeric columns; none found in both datasets")
+            rng = np.random.default_rng(sampling['seed'])
+            with stage("file_load"):
+                if sampling['mode'] == 'stratified':
+                    if sampling['stratify_by'] not in curr_names:
+                        raise AnalysisError(f"stratify_by column '{sampling['stratify_by']}' not found in current dataset")
+                    sample, population_by_stratum = stratified_sample(
+                        curr_source, feature_cols, sampling['stratify_by'], sampling['sample_size'], rng, chunk_size
+                    )
+                else:
+                    sample, population = reservoir_sample(curr_source, feature_cols, sampling['sample_size'], rng, chunk_size)
+                    population_by_stratum = {0: population}
             
-            # Save individual feature drift to logs
-            try:
-                cur.execute(
-                    "INSERT INTO drift_logs (feature_name, drift_score, user_id, detected_at) VALUES (%s, %s, %s, %s)",
-                    (col, drift_score, user_id, datetime.now())
+            with stage("feature_compute"):
+                drift_results = analyze_sample(
+                    profiles, sample, feature_cols, population_by_stratum, sampling['confidence'], rng
                 )
-            except Exception as e:
-                print(f"Failed to save drift log for {col}: {e}")
+            sampling.update({
+                'rows_sampled': int(len(sample[feature_cols[0]])) if feature_cols else 0,
+                'population_size': int(sum(population_by_stratum.values())),
+                'strata': len(population_by_stratum) if sampling['mode'] == 'stratified' else None
+            })
+        else:
+            drift_results = None
+            if has_schemas and can_run_parallel(curr_source, feature_cols, data.get('parallel')):
+                mode = 'parallel'
+                with stage("feature_compute"):
+                    drift_results = analyze_parallel(
+                        profiles, curr_source, feature_cols, streaming=streaming, chunk_size=chunk_size,
+                        ks_error=ks_error,
+                        progress=lambda fraction: progress(0.3 + 0.6 * fraction, "Analyzing features in parallel")
+                    )
+                if drift_results is None:
+                    log_event("drift_parallel_failed", workers=Config.DRIFT_WORKERS, features=len(feature_cols))
         
-        conn.commit()
+            if drift_results is None and streaming:
+                mode = 'streaming'
+                with stage("feature_compute"):
+                    drift_results = analyze_streaming(
+                        profiles, curr_source, feature_cols, chunk_size=chunk_size,
+                        total_rows=curr_schema['num_rows'],
+                        progress=lambda fraction: progress(0.3 + 0.6 * fraction, "Streaming current dataset"),
+                        ks_error=ks_error
+                    )
+            elif drift_results is None:
+                if curr_df is None:
+                    with stage("file_load"):
+                        curr_df = read_dataset(curr_source, columns=feature_cols)
+                mode = 'in_memory'
+                with stage("feature_compute"):
+                    drift_results = analyze_columns(profiles, curr_df, feature_cols)
         
-        print(f"✅ Drift analysis complete. Found {len(drift_results)} features")
+        # Categorical columns: current values encoded against the reference
+        # categories and counted chunk by chunk (row samples stay numeric-only)
+        category_cols = [c for c in categorical_cols if c in curr_names and c in category_profiles]
+        if category_cols and not sampling:
+            progress(0.9, f"Analyzing {len(category_cols)} categorical features")
+            if curr_df is not None and all(c in curr_df.columns for c in category_cols):
+                curr_chunks = [curr_df[category_cols]]
+            else:
+                curr_chunks = iter_dataset_chunks(curr_source, category_cols, chunk_size)
+            with stage("feature_compute"):
+                drift_results = drift_results + analyze_categorical(category_profiles, curr_chunks, category_cols)
+        curr_df = None
         
-        return jsonify({
+        # Save individual feature drift to logs, tagged with this run and dataset pair;
+        # sampled estimates are exploratory and stay out of the drift history
+        progress(0.95, "Saving drift logs")
+        run_id = str(uuid.uuid4())
+        detected_at = datetime.now()
+        if drift_results and not sampling:
+            with stage("db_write"):
+                _save_drift_logs(cur, user_id, run_id, reference_dataset_id, current_dataset_id, drift_results, detected_at)
+                record_drift_rollups(cur, user_id, drift_results, detected_at)
+        
+        result = {
             "success": True,
+            "run_id": run_id,
             "reference_dataset": str(ref_result[0]),
             "current_dataset": str(curr_result[0]),
+            "streaming": bool(streaming),
+            "sampling": sampling,
             "drift_results": drift_results,
             "total_features": int(len(drift_results)),
             "features_with_drift": int(sum(1 for r in drift_results if r['drift_detected']))
-        })
+        }
+        with stage("db_write"):
+            save_analysis_run(cur, run_id, user_id, reference_dataset_id, current_dataset_id, cache_key, method, result)
         
-    except Exception as e:
+            conn.commit()
+        
+        numeric_results = sum(1 for r in drift_results if r['feature_type'] == 'numeric')
+        log_event(
+            "drift_analysis", request_id=request_id(), run_id=run_id, cached=False, mode=mode,
+            reference_dataset_id=reference_dataset_id, current_dataset_id=current_dataset_id,
+            numeric_columns=len(numeric_cols), categorical_columns=len(categorical_cols),
+            profiles_built=len(missing) + len(missing_categorical), features=len(drift_results),
+            skipped_columns=len(numeric_cols) - numeric_results
+        )
+        
+        return {**result, "cached": False}
+        
+    except Exception:
         conn.rollback()
-        print(f"❌ Drift analysis error: {e}")
-        import traceback
-        print(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        raise
     finally:
         cur.close()
         conn.close()
 
+@drift_bp.route("/analyze", methods=["POST"])
+@jwt_required()
+@profiled
+def analyze_drift():
+    """Analyze drift between reference and current dataset"""
+    user_id = get_jwt_identity()
+    data = request.json or {}
+    
+    error = drift_params_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        # Long analyses can run as a background job instead of holding the request
+        if data.get('async'):
+            job_id = submit_job(user_id, 'drift_analysis', data)
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/jobs/{job_id}"
+            }), 202
+        
+        return jsonify(run_drift_analysis(user_id, data))
+        
+    except AnalysisError as e:
+        return jsonify(e.to_response()), e.status_code
+    except Exception as e:
+        print(f"❌ Drift analysis error: {e}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
 
 @drift_bp.route("/history", methods=["GET"])
 @jwt_required()
 def get_drift_history():
-    """Get drift detection history for user"""
+    """Get drift detection history for user, bucketed by `resolution` (hour, day or week)"""
     user_id = get_jwt_identity()
     
     # Get time range from query params (default: last 7 days)
     days = request.args.get('days', 7, type=int)
     start_date = datetime.now() - timedelta(days=days)
     
+    resolution = request.args.get('resolution', 'hour')
+    if resolution not in HISTORY_RESOLUTIONS:
+        return jsonify({"error": f"resolution must be one of {list(HISTORY_RESOLUTIONS)}"}), 400
+    stored, unit = HISTORY_RESOLUTIONS[resolution]
+    
     conn = get_db()
     cur = conn.cursor()
     
     try:
+        # Buckets overlapping the window are included whole
         cur.execute(
             """
-            SELECT feature_name, drift_score, detected_at 
-            FROM drift_logs 
-            WHERE user_id = %s AND detected_at >= %s
-            ORDER BY detected_at DESC
+            SELECT feature_name, date_trunc(%s, bucket_start) AS bucket,
+                   SUM(score_sum) / SUM(sample_count), MAX(score_max), SUM(sample_count)
+            FROM drift_rollups
+            WHERE user_id = %s AND resolution = %s AND bucket_start >= date_trunc(%s, %s::timestamp)
+            GROUP BY feature_name, bucket
+            ORDER BY bucket DESC
             """,
-            (user_id, start_date)
+            (unit, user_id, stored, stored, start_date)
         )
         
-        logs = cur.fetchall()
+        buckets = cur.fetchall()
         
         # Group by feature
         feature_history = {}
-        for feature_name, drift_score, detected_at in logs:
+        total_logs = 0
+        for feature_name, bucket, avg_score, max_score, count in buckets:
             if feature_name not in feature_history:
                 feature_history[feature_name] = []
             
             feature_history[feature_name].append({
-                'drift_score': float(drift_score),
-                'timestamp': detected_at.isoformat()
+                'drift_score': float(avg_score),
+                'max_drift_score': float(max_score),
+                'count': int(count),
+                'timestamp': bucket.isoformat()
             })
+            total_logs += int(count)
         
         return jsonify({
             "success": True,
+            "resolution": resolution,
             "history": feature_history,
-            "total_logs": int(len(logs))
+            "total_logs": total_logs
         })
         
     except Exception as e:
@@ -268,12 +508,14 @@ def get_drift_summary():
     cur = conn.cursor()
     
     try:
-        # Get recent drift logs (last 24 hours)
+        # Recent drift from the hourly rollups (last 24 hours, whole hours)
         cur.execute(
             """
-            SELECT feature_name, AVG(drift_score) as avg_score, MAX(drift_score) as max_score, COUNT(*) as count
-            FROM drift_logs 
-            WHERE user_id = %s AND detected_at >= NOW() - INTERVAL '24 hours'
+            SELECT feature_name, SUM(score_sum) / SUM(sample_count) as avg_score,
+                   MAX(score_max) as max_score, SUM(sample_count) as count
+            FROM drift_rollups
+            WHERE user_id = %s AND resolution = 'hour'
+              AND bucket_start >= date_trunc('hour', NOW()::timestamp - INTERVAL '24 hours')
             GROUP BY feature_name
             ORDER BY avg_score DESC
             """,
@@ -303,4 +545,52 @@ def get_drift_summary():
         return jsonify({"error": str(e)}), 500
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+@drift_bp.route("/runs/<run_id>", methods=["GET"])
+@jwt_required()
+def get_drift_run(run_id):
+    """Get the per-feature drift scores logged by one analysis run"""
+    user_id = get_jwt_identity()
+    
+    try:
+        uuid.UUID(run_id)
+    except ValueError:
+        return jsonify({"error": "Run not found"}), 404
+    
+    conn = get_db()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute(
+            """
+            SELECT feature_name, drift_score, reference_dataset_id, current_dataset_id, detected_at
+            FROM drift_logs
+            WHERE run_id = %s AND user_id = %s
+            ORDER BY feature_name
+            """,
+            (run_id, user_id)
+        )
+        rows = cur.fetchall()
+        
+        if not rows:
+            return jsonify({"error": "Run not found"}), 404
+        
+        return jsonify({
+            "success": True,
+            "run_id": run_id,
+            "reference_dataset_id": rows[0][2],
+            "current_dataset_id": rows[0][3],
+            "detected_at": rows[0][4].isoformat(),
+            "features": [
+                {'feature_name': str(feature_name), 'drift_score': float(drift_score)}
+                for feature_name, drift_score, _, _, _ in rows
+            ]
+        })
+        
+    except Exception as e:
+        print(f"Error fetching drift run: {e}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
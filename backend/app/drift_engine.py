@@ -0,0 +1,278 @@
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+stats = lazy_module("scipy.stats")
+
+# Upper bound on values sorted at once; columns are processed in blocks below it
+BLOCK_ELEMENTS = 16 * 1024 * 1024
+
+PSI_FLOOR = 0.0001
+PSI_THRESHOLD = 0.1
+
+# KS modes: 'exact' compares the full current columns in memory, 'approximate'
+# streams them through quantile sketches (see streaming.py); 'auto' follows the
+# streaming decision
+KS_METHODS = ('exact', 'approximate', 'auto')
+
+# From this many current rows the in-memory KS sorts current values alone and
+# binary-searches them instead of argsorting them with the reference sample;
+# both give the same statistic
+SORTED_KS_MIN_ROWS = 1000000
+
+
+def _stack_profiles(profiles):
+    """Pack per-column reference profiles into 2-D arrays (one row per column)"""
+    k = len(profiles)
+    width = max(len(p['sample']) for p in profiles)
+
+    bin_edges = np.array([p['bin_edges'] for p in profiles], dtype=float)
+    bin_counts = np.array([p['bin_counts'] for p in profiles], dtype=float)
+    counts = np.array([p['count'] for p in profiles], dtype=float)
+
+    samples = np.full((k, width), np.nan)
+    sample_sizes = np.zeros(k, dtype=np.int64)
+    for j, p in enumerate(profiles):
+        sample_sizes[j] = len(p['sample'])
+        samples[j, :sample_sizes[j]] = p['sample']
+
+    return bin_edges, bin_counts, counts, samples, sample_sizes
+
+
+def histogram_counts(values, valid, bin_edges):
+    """Row-wise np.histogram(values[j], bins=bin_edges[j]) for a (k, n) array"""
+    k, bins = bin_edges.shape[0], bin_edges.shape[1] - 1
+
+    # Number of edges <= x gives the bin; the last edge is inclusive like np.histogram
+    index = np.zeros(values.shape, dtype=np.int64)
+    for b in range(bins + 1):
+        index += values >= bin_edges[:, b:b + 1]
+    index[values == bin_edges[:, -1:]] = bins
+    index -= 1
+
+    inside = valid & (index >= 0) & (index < bins)
+    flat = index + (np.arange(k) * bins)[:, None]
+    return np.bincount(flat[inside], minlength=k * bins).reshape(k, bins)
+
+
+def psi_scores(ref_counts, ref_totals, curr_counts, curr_totals):
+    """Row-wise PSI with the same zero flooring as population_stability_index.
+
+    A row with no current values has nothing to compare; it gets a finite,
+    meaningless score instead of a 0/0, and callers skip it.
+    """
+    ref_dist = ref_counts / np.maximum(ref_totals, 1)[:, None]
+    curr_dist = curr_counts / np.maximum(curr_totals, 1)[:, None]
+    ref_dist = np.where(ref_dist == 0, PSI_FLOOR, ref_dist)
+    curr_dist = np.where(curr_dist == 0, PSI_FLOOR, curr_dist)
+    return np.sum((curr_dist - ref_dist) * np.log(curr_dist / ref_dist), axis=1)
+
+
+def _lerp(a, b, t):
+    """np.percentile's linear interpolation, including its t >= 0.5 branch"""
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def _sorted_percentile(sorted_values, sizes, q):
+    rows = np.arange(sorted_values.shape[0])
+    position = (q / 100) * (sizes - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, sizes - 1)
+    return _lerp(sorted_values[rows, low], sorted_values[rows, high], position - low)
+
+
+def summary_statistics(values, valid, sorted_values, sizes):
+    """Row-wise calculate_statistics over NaN-masked values"""
+    rows = np.arange(values.shape[0])
+    mean = np.where(valid, values, 0).sum(axis=1) / sizes
+    deviation = np.where(valid, values - mean[:, None], 0)
+    std = np.sqrt((deviation * deviation).sum(axis=1) / sizes)
+
+    middle = sizes // 2
+    upper = sorted_values[rows, middle]
+    lower = sorted_values[rows, np.maximum(middle - 1, 0)]
+    median = np.where(sizes % 2 == 1, upper, (lower + upper) / 2)
+
+    return {
+        'mean': mean,
+        'std': std,
+        'min': sorted_values[:, 0],
+        'max': sorted_values[rows, sizes - 1],
+        'median': median,
+        'q25': _sorted_percentile(sorted_values, sizes, 25),
+        'q75': _sorted_percentile(sorted_values, sizes, 75)
+    }
+
+
+def ks_against_sample(sample, sorted_values):
+    """Two-sample KS statistic between a sorted reference sample and sorted current values.
+
+    The reference ECDF only jumps at sample points, so the supremum is attained
+    at a sample point or just before one; the current ECDF there is a binary
+    search into the sorted values, O(m log n) for m sample points. The result
+    equals ks_2samp's statistic for the same two samples.
+    """
+    m, n = len(sample), len(sorted_values)
+    at = np.abs(
+        np.searchsorted(sample, sample, side='right') / m
+        - np.searchsorted(sorted_values, sample, side='right') / n
+    )
+    before = np.abs(
+        np.searchsorted(sample, sample, side='left') / m
+        - np.searchsorted(sorted_values, sample, side='left') / n
+    )
+    return float(max(at.max(), before.max()))
+
+
+def _analyze_block(ref, values):
+    """Drift metrics for a block of columns; `values` is (k, n) with NaN for missing"""
+    bin_edges, bin_counts, counts, samples, sample_sizes = ref
+    k, n = values.shape
+    m = samples.shape[1]
+
+    # NaN masking happens once for the whole block
+    valid = ~np.isnan(values)
+    sizes = valid.sum(axis=1)
+
+    curr_counts = histogram_counts(values, valid, bin_edges)
+    psi = psi_scores(bin_counts, counts, curr_counts, sizes)
+
+    # One stable sort of reference sample and current values per row; NaN sorts last
+    combined = np.concatenate([samples, values], axis=1)
+    order = np.argsort(combined, axis=1, kind='stable')
+    combined = np.take_along_axis(combined, order, axis=1)
+    from_ref = order < m
+    present = ~np.isnan(combined)
+
+    ref_seen = np.cumsum(from_ref & present, axis=1)
+    curr_seen = np.cumsum(~from_ref & present, axis=1)
+    # ECDFs are compared only after the last of a run of tied values
+    last_of_run = present.copy()
+    last_of_run[:, :-1] &= combined[:, :-1] != combined[:, 1:]
+    gaps = np.abs(ref_seen / sample_sizes[:, None] - curr_seen / np.maximum(sizes, 1)[:, None])
+    ks_statistic = np.where(last_of_run, gaps, 0).max(axis=1)
+
+    # Asymptotic two-sided p-value against the full reference size
+    effective_n = np.round(counts * sizes / np.maximum(counts + sizes, 1))
+    ks_p_value = stats.kstwo.sf(ks_statistic, np.maximum(effective_n, 1))
+
+    sorted_current = combined[~from_ref].reshape(k, n)
+    current_stats = summary_statistics(values, valid, sorted_current, np.maximum(sizes, 1))
+
+    return psi, ks_statistic, ks_p_value, current_stats, sizes
+
+
+def _analyze_block_sorted(ref, values):
+    """_analyze_block without the merged stable argsort.
+
+    Current values get a plain per-row sort (far cheaper than argsorting them
+    together with the reference sample and gathering the result), and KS is
+    evaluated on the reference sample's grid by binary search.
+    """
+    bin_edges, bin_counts, counts, samples, sample_sizes = ref
+
+    valid = ~np.isnan(values)
+    sizes = valid.sum(axis=1)
+
+    curr_counts = histogram_counts(values, valid, bin_edges)
+    psi = psi_scores(bin_counts, counts, curr_counts, sizes)
+
+    sorted_current = np.sort(values, axis=1)  # NaN sorts last
+    ks_statistic = np.array([
+        ks_against_sample(samples[j, :sample_sizes[j]], sorted_current[j, :sizes[j]]) if sizes[j] else 0.0
+        for j in range(values.shape[0])
+    ])
+
+    effective_n = np.round(counts * sizes / np.maximum(counts + sizes, 1))
+    ks_p_value = stats.kstwo.sf(ks_statistic, np.maximum(effective_n, 1))
+
+    current_stats = summary_statistics(values, valid, sorted_current, np.maximum(sizes, 1))
+
+    return psi, ks_statistic, ks_p_value, current_stats, sizes
+
+
+def feature_result(col, psi, ks_statistic, ks_p_value, ref_stats, curr_stats, ks_method='exact', ks_error=0.0):
+    """Per-feature drift entry as returned by /drift/analyze.
+
+    `ks_error` bounds |ks_statistic - KS of the full columns|: the rank error of
+    the reference sample plus that of any sketch standing in for the current data.
+    """
+    ref_stats = dict(ref_stats)
+
+    # Calculate percentage change in mean
+    mean_change = 0
+    if ref_stats['mean'] != 0:
+        mean_change = ((curr_stats['mean'] - ref_stats['mean']) / ref_stats['mean']) * 100
+
+    return {
+        'feature_name': str(col),
+        'feature_type': 'numeric',
+        'drift_score': float(psi),
+        'drift_detected': bool(psi > PSI_THRESHOLD),
+        'ks_statistic': float(ks_statistic),
+        'ks_p_value': float(ks_p_value),
+        'ks_method': ks_method,
+        'ks_error_bound': float(ks_error),
+        'psi_score': float(psi),
+        'reference_stats': ref_stats,
+        'current_stats': curr_stats,
+        'mean_change_percent': float(mean_change)
+    }
+
+
+def coerce_numeric(frame, columns):
+    """`frame[columns]` with non-numeric columns (e.g. numbers read as strings) parsed as numbers.
+
+    Values that do not parse become NaN, i.e. count as missing.
+    """
+    frame = frame[columns]
+    mistyped = [c for c in columns if not pd.api.types.is_numeric_dtype(frame[c])]
+    if mistyped:
+        frame = frame.assign(**{c: pd.to_numeric(frame[c], errors='coerce') for c in mistyped})
+    return frame
+
+
+def analyze_columns(profiles, current, columns, sorted_min_rows=SORTED_KS_MIN_ROWS):
+    """Drift for every column at once, in the per-feature shape analyze_drift returns.
+
+    `profiles` maps column name to reference profile, `current` is a DataFrame.
+    Current columns that are not numeric (e.g. numbers read as strings) are
+    coerced, with unparsable values counted as missing; columns left with no
+    numbers are skipped. KS statistics match scipy's ks_2samp against the
+    reference sample; p-values use its asymptotic method. From `sorted_min_rows`
+    current rows the merged argsort, which dominates runtime for very long
+    columns, is replaced by a plain sort and binary search.
+    """
+    analyze_block = _analyze_block_sorted if len(current) >= sorted_min_rows else _analyze_block
+    columns = [c for c in columns if c in profiles and c in current.columns]
+    if not columns:
+        return []
+
+    current = coerce_numeric(current, columns)
+
+    width = max(len(profiles[c]['sample']) for c in columns)
+    block = max(1, BLOCK_ELEMENTS // (width + len(current)))
+
+    results = []
+    for start in range(0, len(columns), block):
+        names = columns[start:start + block]
+        block_profiles = [profiles[c] for c in names]
+        values = np.ascontiguousarray(current[names].to_numpy(dtype=float, na_value=np.nan).T)
+
+        psi, ks_statistic, ks_p_value, current_stats, sizes = analyze_block(
+            _stack_profiles(block_profiles), values
+        )
+
+        for j, col in enumerate(names):
+            if sizes[j] == 0:
+                continue
+
+            results.append(feature_result(
+                col, psi[j], ks_statistic[j], ks_p_value[j],
+                block_profiles[j]['stats'],
+                {key: float(series[j]) for key, series in current_stats.items()},
+                'exact', block_profiles[j]['rank_error']
+            ))
+
+    return results
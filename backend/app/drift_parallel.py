@@ -0,0 +1,122 @@
+"""Column-sharded drift analysis across a process pool.
+
+Per-feature drift metrics are independent, so the feature columns are split
+into contiguous shards and each shard is analyzed by a worker process. Workers
+never receive the data itself: they open the dataset's memory-mapped Arrow copy
+and read only their own columns, so the parent pickles nothing but column
+names and the (small) reference profiles. Shard results are concatenated in
+column order, giving exactly what the serial engine returns.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+from dataset_store import COLUMNAR_EXTENSION, read_dataset
+from drift_engine import analyze_columns
+from streaming import analyze_streaming
+from lazy_imports import ANALYTICS_MODULES, lazy_module
+
+np = lazy_module("numpy")
+
+# Shards per worker: several smaller shards even out columns of uneven cost
+SHARDS_PER_WORKER = 4
+
+_drift_executor = None
+_drift_executor_lock = threading.Lock()
+
+
+def _get_drift_executor():
+    global _drift_executor
+    with _drift_executor_lock:
+        if _drift_executor is None:
+            # Same reasoning as the comparison pool: forkserver children start
+            # clean instead of inheriting the server's threads and DB pool
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload(['drift_parallel', *ANALYTICS_MODULES])
+            _drift_executor = ProcessPoolExecutor(max_workers=Config.DRIFT_WORKERS, mp_context=ctx)
+        return _drift_executor
+
+
+def _reset_drift_executor():
+    global _drift_executor
+    with _drift_executor_lock:
+        executor, _drift_executor = _drift_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_drift_executor():
+    """Stop the drift worker processes; the next parallel analysis starts a new pool"""
+    global _drift_executor
+    with _drift_executor_lock:
+        executor, _drift_executor = _drift_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def can_run_parallel(path, columns, requested=None):
+    """Whether an analysis of `columns` read from `path` should be sharded.
+
+    `requested` is the request's `parallel` flag; left unset, wide datasets
+    (DRIFT_PARALLEL_MIN_COLUMNS or more features) are sharded automatically.
+    Only columnar copies can be memory-mapped by the workers.
+    """
+    if requested is False or Config.DRIFT_WORKERS < 2 or len(columns) < 2:
+        return False
+    if not path.lower().endswith(COLUMNAR_EXTENSION):
+        return False
+    return bool(requested) or len(columns) >= Config.DRIFT_PARALLEL_MIN_COLUMNS
+
+
+def shard_columns(columns, workers):
+    """Contiguous, order-preserving shards of roughly equal size"""
+    count = min(len(columns), workers * SHARDS_PER_WORKER)
+    size, extra = divmod(len(columns), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(columns[start:end])
+        start = end
+    return shards
+
+
+def _analyze_shard(profiles, path, columns, offset, streaming, chunk_size, ks_error):
+    """Worker side: read this shard's columns from the memory-mapped file and analyze them"""
+    if streaming:
+        return analyze_streaming(
+            profiles, path, columns, chunk_size=chunk_size, ks_error=ks_error, column_offset=offset
+        )
+    return analyze_columns(profiles, read_dataset(path, columns=columns), columns)
+
+
+def analyze_parallel(profiles, path, columns, streaming=False, chunk_size=None, ks_error=None,
+                     progress=None):
+    """Drift for `columns` of a columnar dataset, sharded across the drift worker pool.
+
+    Returns the same list, in the same order, as analyze_columns (or
+    analyze_streaming when `streaming`); None if the pool broke, so the caller
+    can fall back to the serial path.
+    """
+    executor = _get_drift_executor()
+    columns = [c for c in columns if c in profiles]
+    shards = shard_columns(columns, Config.DRIFT_WORKERS)
+    offsets = np.cumsum([0] + [len(shard) for shard in shards[:-1]])
+    futures = [
+        executor.submit(
+            _analyze_shard, {c: profiles[c] for c in shard}, path, shard, int(offset),
+            streaming, chunk_size, ks_error
+        )
+        for shard, offset in zip(shards, offsets)
+    ]
+
+    results = []
+    try:
+        for i, future in enumerate(futures):
+            results.extend(future.result())
+            if progress:
+                progress((i + 1) / len(futures))
+    except BrokenProcessPool:
+        _reset_drift_executor()
+        return None
+    return results
@@ -0,0 +1,90 @@
+from psycopg2.extras import execute_values
+
+# Rollup granularities maintained on write, as Postgres date_trunc units
+ROLLUP_RESOLUTIONS = ('hour', 'day')
+
+# History resolutions the API accepts -> (stored rollup read, date_trunc unit regrouped to)
+HISTORY_RESOLUTIONS = {
+    'hour': ('hour', 'hour'),
+    'day': ('day', 'day'),
+    'week': ('day', 'week'),
+}
+
+
+def _bucket_start(detected_at, resolution):
+    if resolution == 'hour':
+        return detected_at.replace(minute=0, second=0, microsecond=0)
+    return detected_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_drift_rollups(cur, user_id, drift_results, detected_at):
+    """Fold one analysis run's feature scores into the hourly and daily rollups.
+
+    Runs in the caller's transaction, alongside the drift_logs insert, so rollups
+    and raw logs never disagree.
+    """
+    if not drift_results:
+        return
+
+    # One row per rollup key, so the upsert never touches the same row twice
+    buckets = {}
+    for result in drift_results:
+        score = float(result['drift_score'])
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (result['feature_name'], resolution)
+            count, total, low, high = buckets.get(key, (0, 0.0, score, score))
+            buckets[key] = (count + 1, total + score, min(low, score), max(high, score))
+
+    rows = [
+        (user_id, feature_name, resolution, _bucket_start(detected_at, resolution),
+         count, total, low, high, detected_at)
+        for (feature_name, resolution), (count, total, low, high) in buckets.items()
+    ]
+
+    execute_values(
+        cur,
+        """
+        INSERT INTO drift_rollups
+            (user_id, feature_name, resolution, bucket_start,
+             sample_count, score_sum, score_min, score_max, last_score, last_detected_at)
+        SELECT v.user_id, v.feature_name, v.resolution, v.bucket_start,
+               v.sample_count, v.score_sum, v.score_min, v.score_max,
+               v.score_sum / v.sample_count, v.detected_at
+        FROM (VALUES %s) AS v (user_id, feature_name, resolution, bucket_start,
+                               sample_count, score_sum, score_min, score_max, detected_at)
+        ON CONFLICT (user_id, resolution, bucket_start, feature_name) DO UPDATE SET
+            sample_count = drift_rollups.sample_count + EXCLUDED.sample_count,
+            score_sum = drift_rollups.score_sum + EXCLUDED.score_sum,
+            score_min = LEAST(drift_rollups.score_min, EXCLUDED.score_min),
+            score_max = GREATEST(drift_rollups.score_max, EXCLUDED.score_max),
+            last_score = CASE WHEN EXCLUDED.last_detected_at >= drift_rollups.last_detected_at
+                              THEN EXCLUDED.last_score ELSE drift_rollups.last_score END,
+            last_detected_at = GREATEST(drift_rollups.last_detected_at, EXCLUDED.last_detected_at)
+        """,
+        rows,
+        template="(%s::integer, %s::text, %s::text, %s::timestamp, %s::bigint, %s::float8, %s::float8, %s::float8, %s::timestamp)"
+    )
+
+
+def rebuild_drift_rollups(cur, user_id=None):
+    """Recompute rollups from raw drift_logs (backfill, or repair after manual edits)"""
+    scope = "WHERE user_id = %s" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+
+    cur.execute(f"DELETE FROM drift_rollups {scope}", params)
+    for resolution in ROLLUP_RESOLUTIONS:
+        cur.execute(
+            f"""
+            INSERT INTO drift_rollups
+                (user_id, feature_name, resolution, bucket_start,
+                 sample_count, score_sum, score_min, score_max, last_score, last_detected_at)
+            SELECT user_id, feature_name, %s, date_trunc(%s, detected_at),
+                   COUNT(*), SUM(drift_score), MIN(drift_score), MAX(drift_score),
+                   (array_agg(drift_score ORDER BY detected_at DESC))[1], MAX(detected_at)
+            FROM drift_logs
+            {scope + ' AND' if scope else 'WHERE'} user_id IS NOT NULL AND feature_name IS NOT NULL
+                AND drift_score IS NOT NULL AND detected_at IS NOT NULL
+            GROUP BY user_id, feature_name, date_trunc(%s, detected_at)
+            """,
+            (resolution, resolution) + params + (resolution,)
+        )
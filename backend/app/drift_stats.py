@@ -0,0 +1,94 @@
+"""Per-column drift statistics against raw reference values or a stored reference profile.
+
+Kept apart from drift_detection so the sampling module can use them without
+importing the request handlers.
+"""
+from drift_engine import ks_against_sample
+from reference_profile import is_profile
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+stats = lazy_module("scipy.stats")
+
+
+def kolmogorov_smirnov_test(reference_data, current_data):
+    """Perform KS test for drift detection"""
+    try:
+        error_bound = 0.0
+        if is_profile(reference_data) and not reference_data['sample_exact']:
+            # Reference order statistics stand in for the full column; asymptotic
+            # p-value using the true reference size
+            current = np.sort(np.asarray(current_data, dtype=float))
+            statistic = ks_against_sample(np.asarray(reference_data['sample']), current)
+            n1, n2 = reference_data['count'], len(current)
+            p_value = float(stats.kstwo.sf(statistic, np.round(n1 * n2 / (n1 + n2))))
+            error_bound = reference_data['rank_error']
+        else:
+            if is_profile(reference_data):
+                reference_data = reference_data['sample']
+            statistic, p_value = stats.ks_2samp(reference_data, current_data)
+        return {
+            'statistic': float(statistic),
+            'p_value': float(p_value),
+            'error_bound': float(error_bound),
+            'drift_detected': bool(p_value < 0.05)  # ✅ Convert to bool explicitly
+        }
+    except Exception as e:
+        print(f"KS test error: {e}")
+        return None
+
+
+def population_stability_index(reference_data, current_data, bins=10):
+    """Calculate PSI for drift detection"""
+    try:
+        if is_profile(reference_data):
+            # Reference bins were computed once when the profile was built
+            bin_edges = np.asarray(reference_data['bin_edges'])
+            ref_hist = np.asarray(reference_data['bin_counts'])
+            ref_count = reference_data['count']
+        else:
+            # Create bins based on reference data
+            _, bin_edges = np.histogram(reference_data, bins=bins)
+            ref_hist, _ = np.histogram(reference_data, bins=bin_edges)
+            ref_count = len(reference_data)
+        
+        # Get current distribution
+        curr_hist, _ = np.histogram(current_data, bins=bin_edges)
+        
+        # Normalize
+        ref_dist = ref_hist / ref_count
+        curr_dist = curr_hist / len(current_data)
+        
+        # Add small constant to avoid division by zero
+        ref_dist = np.where(ref_dist == 0, 0.0001, ref_dist)
+        curr_dist = np.where(curr_dist == 0, 0.0001, curr_dist)
+        
+        # Calculate PSI
+        psi = np.sum((curr_dist - ref_dist) * np.log(curr_dist / ref_dist))
+        
+        return {
+            'psi_score': float(psi),
+            'drift_detected': bool(psi > 0.1)  # ✅ Convert to bool explicitly
+        }
+    except Exception as e:
+        print(f"PSI calculation error: {e}")
+        return None
+
+
+def calculate_statistics(data):
+    """Calculate statistical metrics for a dataset"""
+    if is_profile(data):
+        return dict(data['stats'])
+    try:
+        return {
+            'mean': float(np.mean(data)),
+            'std': float(np.std(data)),
+            'min': float(np.min(data)),
+            'max': float(np.max(data)),
+            'median': float(np.median(data)),
+            'q25': float(np.percentile(data, 25)),
+            'q75': float(np.percentile(data, 75))
+        }
+    except Exception as e:
+        print(f"Statistics calculation error: {e}")
+        return None
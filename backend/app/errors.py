@@ -0,0 +1,11 @@
+class AnalysisError(Exception):
+    """Expected analysis failure carrying the HTTP status and extra response fields"""
+
+    def __init__(self, message, status_code=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.extra = extra
+
+    def to_response(self):
+        return {"error": self.message, **self.extra}
@@ -0,0 +1,280 @@
+import math
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from psycopg2.extras import Json
+from config import Config
+from errors import AnalysisError
+from models import get_db
+from telemetry import log_event
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# kind -> fn(user_id, params, progress) returning a JSON-serializable result
+JOB_TYPES = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def register_job_type(kind):
+    """Register a function that can run as a background job of this kind"""
+    def decorator(fn):
+        JOB_TYPES[kind] = fn
+        return fn
+    return decorator
+
+
+def json_safe(value):
+    """Replace NaN/inf (which JSONB rejects) with None, recursively"""
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _execute(query, params, fetch=False):
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(query, params)
+        rows = cur.fetchall() if fetch else None
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+class _ProgressReporter:
+    """Callable handed to job functions; throttles progress writes to the DB"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, fraction, message=None):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_write < Config.JOB_PROGRESS_INTERVAL and fraction < 1:
+                return
+            self._last_write = now
+        try:
+            _execute(
+                "UPDATE analysis_jobs SET progress = %s, message = COALESCE(%s, message), updated_at = NOW() WHERE id = %s",
+                (float(min(max(fraction, 0), 1)), message, self.job_id)
+            )
+        except Exception as e:
+            print(f"Failed to record progress for job {self.job_id}: {e}")
+
+
+def _heartbeat(job_id, stop):
+    """Keep updated_at fresh so other processes don't treat the job as abandoned"""
+    while not stop.wait(Config.JOB_HEARTBEAT_INTERVAL):
+        try:
+            _execute("UPDATE analysis_jobs SET updated_at = NOW() WHERE id = %s", (job_id,))
+        except Exception as e:
+            print(f"Job heartbeat failed for {job_id}: {e}")
+
+
+def _run_job(job_id):
+    # Claim atomically so a job is never run twice, even across processes
+    rows = _execute(
+        """
+        UPDATE analysis_jobs
+        SET status = 'running', started_at = NOW(), updated_at = NOW()
+        WHERE id = %s AND status = 'queued'
+        RETURNING user_id, kind, params
+        """,
+        (job_id,),
+        fetch=True
+    )
+    if not rows:
+        return
+
+    user_id, kind, params = rows[0]
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, stop), daemon=True).start()
+
+    start = time.perf_counter()
+    try:
+        result = JOB_TYPES[kind](str(user_id), params, _ProgressReporter(job_id))
+        status, error = 'succeeded', None
+    except AnalysisError as e:
+        result, status, error = e.to_response(), 'failed', e.message
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        print(traceback.format_exc())
+        result, status, error = None, 'failed', str(e)
+    finally:
+        stop.set()
+    log_event("job", job_id=job_id, kind=kind, status=status,
+              duration_ms=round((time.perf_counter() - start) * 1000, 2))
+
+    try:
+        _execute(
+            """
+            UPDATE analysis_jobs
+            SET status = %s, progress = CASE WHEN %s = 'succeeded' THEN 1 ELSE progress END,
+                result = %s, error = %s, finished_at = NOW(), updated_at = NOW()
+            WHERE id = %s
+            """,
+            (status, status, Json(json_safe(result)) if result is not None else None, error, job_id)
+        )
+    except Exception as e:
+        print(f"❌ Failed to store result of job {job_id}: {e}")
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix="job-worker")
+        return _executor
+
+
+def _dispatch(job_id):
+    if Config.JOB_EXECUTOR == 'inline':
+        _run_job(job_id)
+    else:
+        _get_executor().submit(_run_job, job_id)
+
+
+def submit_job(user_id, kind, params):
+    """Persist a queued job and hand it to the worker pool, returning its id"""
+    if kind not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {kind}")
+
+    job_id = str(uuid.uuid4())
+    _execute(
+        "INSERT INTO analysis_jobs (id, user_id, kind, params) VALUES (%s, %s, %s, %s)",
+        (job_id, user_id, kind, Json(json_safe(params)))
+    )
+    _dispatch(job_id)
+    return job_id
+
+
+def resume_jobs():
+    """Re-queue jobs abandoned by a dead process and dispatch everything queued"""
+    _execute(
+        """
+        UPDATE analysis_jobs SET status = 'queued', updated_at = NOW()
+        WHERE status = 'running' AND updated_at < NOW() - make_interval(secs => %s)
+        """,
+        (Config.JOB_STALE_AFTER,)
+    )
+    rows = _execute(
+        "SELECT id FROM analysis_jobs WHERE status = 'queued' ORDER BY created_at",
+        (),
+        fetch=True
+    )
+    for (job_id,) in rows:
+        _dispatch(str(job_id))
+    if rows:
+        print(f"🔁 Resumed {len(rows)} queued jobs")
+
+
+def start_job_workers():
+    """Start the in-process worker pool and pick up persisted jobs"""
+    if Config.JOB_EXECUTOR != 'inline':
+        _get_executor()
+    try:
+        resume_jobs()
+    except Exception as e:
+        print(f"❌ Could not resume jobs: {e}")
+
+
+def shutdown_job_workers(wait=True, cancel_pending=False):
+    """Stop the worker pool; cancelled jobs stay queued in the DB for the next process to resume"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+
+def _serialize_job(row, include_result=True):
+    job_id, kind, status, progress, message, result, error, created_at, started_at, finished_at = row
+    job = {
+        'id': str(job_id),
+        'kind': kind,
+        'status': status,
+        'progress': float(progress or 0),
+        'message': message,
+        'error': error,
+        'created_at': created_at.isoformat() if created_at else None,
+        'started_at': started_at.isoformat() if started_at else None,
+        'finished_at': finished_at.isoformat() if finished_at else None
+    }
+    if include_result:
+        job['result'] = result
+    return job
+
+
+JOB_COLUMNS = "id, kind, status, progress, message, result, error, created_at, started_at, finished_at"
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    """Get status, progress and (when finished) the result of a job"""
+    user_id = get_jwt_identity()
+
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return jsonify({"error": "Job not found"}), 404
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT {JOB_COLUMNS} FROM analysis_jobs WHERE id = %s AND user_id = %s",
+            (job_id, user_id)
+        )
+        row = cur.fetchone()
+
+        if not row:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({"success": True, "job": _serialize_job(row)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
+@jobs_bp.route("", methods=["GET"])
+@jwt_required()
+def list_jobs():
+    """List the current user's most recent jobs"""
+    user_id = get_jwt_identity()
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT {JOB_COLUMNS} FROM analysis_jobs WHERE user_id = %s ORDER BY created_at DESC LIMIT 50",
+            (user_id,)
+        )
+        return jsonify({
+            "success": True,
+            "jobs": [_serialize_job(row, include_result=False) for row in cur.fetchall()]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,64 @@
+"""Deferred imports of the analytics stack.
+
+numpy, pandas, pyarrow, scipy and scikit-learn account for most of the
+backend's start-up time, yet only analysis and upload requests need them.
+Modules bind them with lazy_module() instead of an import statement: the real
+import happens on first attribute access, so a process serving /auth and
+/health never pays for it. warm_up() imports everything up front instead, for
+processes that fork workers (gunicorn's master, the forkserver pools).
+"""
+import importlib
+import sys
+import time
+import types
+
+# Imported by warm_up(), in this order
+ANALYTICS_MODULES = (
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "pyarrow.csv",
+    "pyarrow.feather",
+    "scipy.stats",
+    "sklearn.metrics",
+    "sklearn.utils.multiclass",
+    "joblib",
+)
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on first attribute access.
+
+    After the import the real module's namespace is copied in, so later
+    lookups are plain attribute reads rather than __getattr__ calls.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__["_lazy_target"])
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self.__dict__['_lazy_target']!r}>"
+
+
+def lazy_module(name):
+    """The module itself if already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def warm_up(modules=ANALYTICS_MODULES):
+    """Import the analytics stack now; returns {module: seconds} for the ones not yet loaded"""
+    timings = {}
+    for name in modules:
+        if name in sys.modules:
+            continue
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
@@ -1,64 +1,162 @@
 import sys
 import os
+import multiprocessing
 
 # Add the parent directory to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, jsonify
+from flask import Flask, Blueprint, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 
 from auth import auth_bp
 from upload import upload_bp
+from upload_sessions import upload_sessions_bp
 from drift_detection import drift_bp
 from config import Config
-from model_drift import model_drift_bp
+from model_drift import model_drift_bp, model_cache_stats
+from drift_parallel import shutdown_drift_executor
+from jobs import jobs_bp, start_job_workers, shutdown_job_workers
+from models import get_db, init_pool, close_pool, pool_stats
+from migrations import apply_migrations
+from retention import start_retention_worker, stop_retention_worker
+from telemetry import telemetry_bp, register_stats, init_app as init_telemetry
+from profiler import profiler_bp
 
 
-app = Flask(__name__)
-app.config.from_object(Config)
+core_bp = Blueprint("core", __name__)
 
-# Use CORS origins from config
-CORS(app, origins=app.config['CORS_ORIGINS'])
-
-jwt = JWTManager(app)
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix="/auth")
-app.register_blueprint(upload_bp, url_prefix="/upload")
-app.register_blueprint(drift_bp, url_prefix="/drift")
-app.register_blueprint(model_drift_bp, url_prefix="/model-drift")
+# Pool and model cache counters on /metrics
+register_stats(
+    "db_pool", "Database connection pool", pool_stats,
+    counters=("checkouts", "connections_created", "connections_discarded", "timeouts", "waits"),
+    gauges=("size", "in_use", "idle", "max_size")
+)
+register_stats(
+    "model_cache", "Deserialized model cache", model_cache_stats,
+    counters=("hits", "misses", "evictions"),
+    gauges=("entries", "bytes", "max_bytes", "hit_rate")
+)
 
 
 # ======================
 # ROUTES
 # ======================
-@app.route("/")
+@core_bp.route("/")
 def home():
     return jsonify({"status": "Flask backend running"})
 
-@app.route("/health")
+@core_bp.route("/health")
 def health():
     return jsonify({"status": "healthy"})
 
-@app.route("/health/db")
+@core_bp.route("/health/db")
 def health_db():
-    """Check database connection"""
+    """Check database connection and report pool usage"""
     try:
-        from models import get_db
         conn = get_db()
-        conn.close()
-        return jsonify({"status": "db connected"})
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+        finally:
+            conn.close()
+        return jsonify({"status": "db connected", "pool": pool_stats()})
     except Exception as e:
-        return jsonify({"status": "db disconnected", "error": str(e)}), 503
+        return jsonify({"status": "db disconnected", "error": str(e), "pool": pool_stats()}), 503
 
-@app.route("/protected")
+@core_bp.route("/health/cache")
+def health_cache():
+    """Report in-process model cache usage"""
+    return jsonify({"model_cache": model_cache_stats()})
+
+@core_bp.route("/protected")
 @jwt_required()
 def protected():
     return jsonify({"user": get_jwt_identity()})
 
+
+# ======================
+# LIFECYCLE
+# ======================
+def start_services():
+    """Per-process startup: DB pool, pending migrations and background workers.
+
+    Runs in each serving process (a gunicorn worker after fork, or the dev
+    server), never in a process that forks afterwards: connections and threads
+    do not survive a fork.
+    """
+    # Open the DB pool once at startup; requests never run the retry loop
+    try:
+        init_pool()
+    except Exception as e:
+        print(f"❌ DB pool initialization failed: {e}")
+
+    # Every worker tries; the advisory lock lets exactly one apply each migration
+    if Config.AUTO_MIGRATE:
+        try:
+            apply_migrations()
+        except Exception as e:
+            print(f"❌ Schema migration failed: {e}")
+
+    # Keep drift_logs partitions ahead of time and drop expired ones
+    start_retention_worker()
+
+    # Pick up jobs persisted before the last restart
+    start_job_workers()
+
+def stop_services():
+    """Graceful shutdown: let running jobs finish, stop workers, close the DB pool.
+
+    Jobs still queued in this process stay queued in the database and are
+    picked up by the next process to start.
+    """
+    stop_retention_worker()
+    shutdown_job_workers(wait=True, cancel_pending=True)
+    shutdown_drift_executor()
+    close_pool()
+
+
+def create_app(start=True):
+    """Build the Flask app.
+
+    `start` also runs start_services() in this process; pass False when a
+    server preloads the app and forks workers afterwards (see gunicorn.conf.py).
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+
+    # Use CORS origins from config
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+
+    JWTManager(app)
+
+    # Request latency histograms and the structured request log
+    init_telemetry(app)
+
+    # Register blueprints
+    app.register_blueprint(core_bp)
+    app.register_blueprint(telemetry_bp)
+    app.register_blueprint(auth_bp, url_prefix="/auth")
+    app.register_blueprint(upload_bp, url_prefix="/upload")
+    app.register_blueprint(upload_sessions_bp, url_prefix="/upload/sessions")
+    app.register_blueprint(drift_bp, url_prefix="/drift")
+    app.register_blueprint(model_drift_bp, url_prefix="/model-drift")
+    app.register_blueprint(jobs_bp, url_prefix="/jobs")
+    app.register_blueprint(profiler_bp, url_prefix="/admin/profiles")
+
+    # Worker processes (e.g. /model-drift/compare's forkserver pool) re-import
+    # this module; only serving processes open the DB pool and run background jobs
+    if start and multiprocessing.parent_process() is None:
+        start_services()
+
+    return app
+
+
 # ======================
 # START
 # ======================
+# Development server only; production runs gunicorn -c gunicorn.conf.py
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
\ No newline at end of file
+    host, port = Config.WEB_BIND.rsplit(":", 1)
+    create_app().run(host=host, port=int(port), debug=Config.DEBUG)
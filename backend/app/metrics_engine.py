@@ -0,0 +1,215 @@
+from lazy_imports import lazy_module
+from telemetry import stage
+
+np = lazy_module("numpy")
+multiclass = lazy_module("sklearn.utils.multiclass")
+
+
+def _as_labels(y):
+    y = np.asarray(y)
+    kind = multiclass.type_of_target(y)
+    if kind not in ('binary', 'multiclass'):
+        raise ValueError(f"Classification metrics can't handle {kind} targets")
+    return y
+
+
+class ConfusionAccumulator:
+    """Confusion matrix built up batch by batch over a growing label set.
+
+    Labels are merged the way sklearn's unique_labels does (1 and 1.0 are the
+    same class); `matrix` rows are true labels and columns predictions, both in
+    sorted label order.
+    """
+
+    def __init__(self):
+        self._index = {}
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self._string_labels = None
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _as_labels(y_true), _as_labels(y_pred)
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"Found {len(y_true)} targets but {len(y_pred)} predictions")
+        if len(y_true) == 0:
+            return
+
+        try:
+            true_labels, true_inverse = np.unique(y_true, return_inverse=True)
+            pred_labels, pred_inverse = np.unique(y_pred, return_inverse=True)
+        except TypeError:
+            raise ValueError("Mix of label input types (string and number)")
+        true_labels, pred_labels = true_labels.tolist(), pred_labels.tolist()
+        self._check_label_types(true_labels + pred_labels)
+
+        for label in true_labels + pred_labels:
+            if label not in self._index:
+                self._index[label] = len(self._index)
+        k = len(self._index)
+        if k > self._counts.shape[0]:
+            grown = np.zeros((k, k), dtype=np.int64)
+            grown[:self._counts.shape[0], :self._counts.shape[1]] = self._counts
+            self._counts = grown
+
+        true_codes = np.array([self._index[label] for label in true_labels], dtype=np.int64)[true_inverse.ravel()]
+        pred_codes = np.array([self._index[label] for label in pred_labels], dtype=np.int64)[pred_inverse.ravel()]
+        self._counts += np.bincount(true_codes * k + pred_codes, minlength=k * k).reshape(k, k)
+
+    def _check_label_types(self, labels):
+        is_string = any(isinstance(label, str) for label in labels)
+        mixed = is_string and not all(isinstance(label, str) for label in labels)
+        if mixed or (self._string_labels is not None and is_string != self._string_labels):
+            raise ValueError("Mix of label input types (string and number)")
+        self._string_labels = is_string
+
+    @property
+    def labels(self):
+        return sorted(self._index)
+
+    @property
+    def matrix(self):
+        order = [self._index[label] for label in self.labels]
+        return self._counts[np.ix_(order, order)]
+
+
+class RegressionAccumulator:
+    """Sufficient statistics for MSE, MAE and R² accumulated batch by batch"""
+
+    def __init__(self):
+        self.count = 0
+        self.squared_error = 0.0
+        self.absolute_error = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations of y_true from its mean
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=float).ravel()
+        y_pred = np.asarray(y_pred, dtype=float).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"Found {len(y_true)} targets but {len(y_pred)} predictions")
+        if len(y_true) == 0:
+            return
+        if not (np.isfinite(y_true).all() and np.isfinite(y_pred).all()):
+            raise ValueError("Input contains NaN or infinity")
+
+        error = y_true - y_pred
+        self.squared_error += float(np.sum(error ** 2))
+        self.absolute_error += float(np.sum(np.abs(error)))
+
+        # Chan's parallel update keeps R²'s denominator stable across batches
+        n = len(y_true)
+        batch_mean = float(np.mean(y_true))
+        batch_m2 = float(np.sum((y_true - batch_mean) ** 2))
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+
+def _safe_divide(numerator, denominator):
+    """Element-wise division that yields 0 where the denominator is 0 (zero_division=0)"""
+    denominator = np.asarray(denominator, dtype=float)
+    result = np.asarray(numerator, dtype=float) / np.where(denominator == 0, 1, denominator)
+    return np.where(denominator == 0, 0.0, result)
+
+
+def _scores(precision, recall, f1):
+    return {
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1_score': float(f1)
+    }
+
+
+def classification_metrics(matrix, labels=None):
+    """Every classification metric from one confusion matrix, as sklearn computes them.
+
+    Top-level precision/recall/f1_score are support-weighted averages (the
+    historical response shape); macro, micro and per-class scores and the matrix
+    itself are included alongside.
+    """
+    matrix = np.asarray(matrix)
+    tp = np.diag(matrix)
+    pred_sum = matrix.sum(axis=0)
+    true_sum = matrix.sum(axis=1)
+    total = matrix.sum()
+    if total == 0:
+        raise ValueError("No samples to evaluate")
+    if labels is None:
+        labels = list(range(len(tp)))
+
+    precision = _safe_divide(tp, pred_sum)
+    recall = _safe_divide(tp, true_sum)
+    f1 = _safe_divide(2 * tp, true_sum + pred_sum)
+
+    # Micro averaging pools every decision, so it is computed from the sums
+    micro_precision = _safe_divide(tp.sum(), pred_sum.sum())
+    micro_recall = _safe_divide(tp.sum(), true_sum.sum())
+    micro_f1 = _safe_divide(2 * tp.sum(), true_sum.sum() + pred_sum.sum())
+
+    weighted = _scores(
+        np.average(precision, weights=true_sum),
+        np.average(recall, weights=true_sum),
+        np.average(f1, weights=true_sum)
+    )
+
+    return {
+        'accuracy': float(tp.sum() / total),
+        **weighted,
+        'weighted': weighted,
+        'macro': _scores(np.mean(precision), np.mean(recall), np.mean(f1)),
+        'micro': _scores(micro_precision, micro_recall, micro_f1),
+        'per_class': [
+            {'label': label, **_scores(precision[i], recall[i], f1[i]), 'support': int(true_sum[i])}
+            for i, label in enumerate(labels)
+        ],
+        'confusion_matrix': {
+            'labels': list(labels),
+            'matrix': matrix.tolist()
+        }
+    }
+
+
+def regression_metrics(acc):
+    """MSE, RMSE, R² and MAE from accumulated regression statistics"""
+    if acc.count == 0:
+        raise ValueError("No samples to evaluate")
+
+    mse = acc.squared_error / acc.count
+    if acc.m2 == 0:
+        # sklearn's r2_score convention for a constant target
+        r2 = 1.0 if acc.squared_error == 0 else 0.0
+    else:
+        r2 = 1 - acc.squared_error / acc.m2
+
+    return {
+        'mse': float(mse),
+        'rmse': float(np.sqrt(mse)),
+        'r2_score': float(r2),
+        'mae': float(acc.absolute_error / acc.count)
+    }
+
+
+def evaluate_in_chunks(model, chunks, split, task_type='classification', progress=None):
+    """Predict batch by batch, keeping only sufficient statistics.
+
+    `chunks` yields DataFrames and `split(chunk)` returns (X, y_true) for one of
+    them; predictions are discarded after each batch, so memory is bounded by the
+    chunk size rather than the dataset.
+    """
+    acc = ConfusionAccumulator() if task_type == 'classification' else RegressionAccumulator()
+
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        X, y_true = split(chunk)
+        with stage("predict"):
+            y_pred = model.predict(X)
+        with stage("metrics"):
+            acc.update(np.asarray(y_true), y_pred)
+        if progress:
+            progress(len(chunk))
+
+    if task_type == 'classification':
+        return classification_metrics(acc.matrix, acc.labels)
+    return regression_metrics(acc)
@@ -0,0 +1,66 @@
+-- Columns and tables added to init.sql before migrations existed, for databases
+-- created from an older init.sql
+ALTER TABLE uploaded_models ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE uploaded_datasets ADD COLUMN IF NOT EXISTS columnar_path TEXT;
+ALTER TABLE uploaded_datasets ADD COLUMN IF NOT EXISTS schema JSONB;
+ALTER TABLE uploaded_datasets ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE TABLE IF NOT EXISTS drift_rollups (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    feature_name TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    sample_count BIGINT NOT NULL,
+    score_sum DOUBLE PRECISION NOT NULL,
+    score_min DOUBLE PRECISION NOT NULL,
+    score_max DOUBLE PRECISION NOT NULL,
+    last_score DOUBLE PRECISION NOT NULL,
+    last_detected_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, resolution, bucket_start, feature_name)
+);
+
+CREATE TABLE IF NOT EXISTS dataset_profiles (
+    id SERIAL PRIMARY KEY,
+    dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    feature_name TEXT NOT NULL,
+    profile JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (dataset_id, feature_name)
+);
+
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id UUID PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    total_size BIGINT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    sha256 TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id UUID PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    params JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress FLOAT DEFAULT 0,
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_uploaded_datasets_hash ON uploaded_datasets(content_hash);
+CREATE INDEX IF NOT EXISTS idx_uploaded_models_hash ON uploaded_models(content_hash);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_user ON upload_sessions(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_expiry ON upload_sessions(status, expires_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_user ON analysis_jobs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs(status);
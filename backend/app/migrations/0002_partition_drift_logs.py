@@ -0,0 +1,49 @@
+"""Convert drift_logs to a table range-partitioned by month on detected_at.
+
+Old months can then be dropped as whole partitions (see retention.py) instead
+of deleted row by row, and time-range reads only touch the months they cover.
+The primary key has to include the partition key, so it becomes (id, detected_at);
+ids keep coming from the existing sequence.
+"""
+from retention import ensure_drift_log_partitions
+
+
+def upgrade(cur):
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('drift_logs')")
+    row = cur.fetchone()
+    if row is not None and row[0] == 'p':
+        ensure_drift_log_partitions(cur)
+        return
+
+    cur.execute("ALTER TABLE drift_logs RENAME TO drift_logs_unpartitioned")
+    cur.execute("ALTER TABLE drift_logs_unpartitioned RENAME CONSTRAINT drift_logs_pkey TO drift_logs_unpartitioned_pkey")
+    cur.execute("DROP INDEX IF EXISTS idx_drift_logs_user")
+
+    cur.execute(
+        """
+        CREATE TABLE drift_logs (
+            id INTEGER NOT NULL DEFAULT nextval('drift_logs_id_seq'),
+            feature_name VARCHAR(100),
+            drift_score FLOAT,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            detected_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, detected_at)
+        ) PARTITION BY RANGE (detected_at)
+        """
+    )
+    cur.execute("CREATE TABLE drift_logs_default PARTITION OF drift_logs DEFAULT")
+    # The sequence survives dropping the old table once the new column owns it
+    cur.execute("ALTER SEQUENCE drift_logs_id_seq OWNED BY drift_logs.id")
+
+    cur.execute("SELECT MIN(detected_at) FROM drift_logs_unpartitioned")
+    oldest = cur.fetchone()[0]
+    ensure_drift_log_partitions(cur, since=oldest)
+
+    cur.execute(
+        """
+        INSERT INTO drift_logs (id, feature_name, drift_score, user_id, detected_at)
+        SELECT id, feature_name, drift_score, user_id, COALESCE(detected_at, CURRENT_TIMESTAMP)
+        FROM drift_logs_unpartitioned
+        """
+    )
+    cur.execute("DROP TABLE drift_logs_unpartitioned")
@@ -0,0 +1,9 @@
+-- Every drift_logs / model_metrics read filters on user_id plus a time range and
+-- orders by time; the composite indexes serve the filter and the order together
+-- (the LIMIT 1 baseline lookup becomes a single backward index probe instead of
+-- a sort over the user's whole history). They also cover user_id-only lookups,
+-- so the single-column indexes are dropped.
+CREATE INDEX IF NOT EXISTS idx_drift_logs_user_time ON drift_logs(user_id, detected_at);
+CREATE INDEX IF NOT EXISTS idx_model_metrics_user_time ON model_metrics(user_id, created_at);
+DROP INDEX IF EXISTS idx_drift_logs_user;
+DROP INDEX IF EXISTS idx_model_metrics_user;
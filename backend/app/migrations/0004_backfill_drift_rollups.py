@@ -0,0 +1,9 @@
+"""Build drift_rollups from existing drift_logs on databases that predate rollups"""
+from drift_rollups import rebuild_drift_rollups
+
+
+def upgrade(cur):
+    cur.execute("SELECT EXISTS (SELECT 1 FROM drift_rollups)")
+    if cur.fetchone()[0]:
+        return
+    rebuild_drift_rollups(cur)
@@ -0,0 +1,5 @@
+-- Tag each drift log with the analysis run that wrote it and the dataset pair compared
+ALTER TABLE drift_logs ADD COLUMN IF NOT EXISTS run_id UUID;
+ALTER TABLE drift_logs ADD COLUMN IF NOT EXISTS reference_dataset_id INTEGER;
+ALTER TABLE drift_logs ADD COLUMN IF NOT EXISTS current_dataset_id INTEGER;
+CREATE INDEX IF NOT EXISTS idx_drift_logs_run ON drift_logs(run_id);
@@ -0,0 +1,15 @@
+-- Stored drift analysis results, reused for repeat requests with the same cache key
+CREATE TABLE IF NOT EXISTS analysis_runs (
+    id UUID PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    reference_dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    current_dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    cache_key TEXT NOT NULL,
+    params JSONB NOT NULL,
+    code_version INTEGER NOT NULL,
+    result JSONB NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP,
+    UNIQUE (user_id, cache_key)
+);
@@ -0,0 +1,15 @@
+-- Sampled stack profiles of slow or admin-debugged analysis requests (see profiler.py)
+CREATE TABLE IF NOT EXISTS request_profiles (
+    id UUID PRIMARY KEY,
+    request_id TEXT,  -- X-Request-ID of the profiled request, as sent by the client
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    route TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    sample_count INTEGER NOT NULL,
+    interval_ms DOUBLE PRECISION NOT NULL,
+    stacks TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_request_profiles_created ON request_profiles(created_at);
+CREATE INDEX IF NOT EXISTS idx_request_profiles_request ON request_profiles(request_id);
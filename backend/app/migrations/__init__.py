@@ -0,0 +1,120 @@
+"""Versioned schema migrations.
+
+db/init.sql builds the schema of a fresh database; the numbered files in this
+package bring an existing database up to the same schema. Migrations are
+applied in version order, each in its own transaction together with its row in
+schema_migrations, so a failed migration leaves nothing half-applied.
+
+A migration is either NNNN_name.sql, executed as-is, or NNNN_name.py exposing
+upgrade(cur). Every migration must also be safe to run against a database
+created from the current init.sql.
+"""
+import importlib.util
+import os
+import re
+from models import get_db
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+# Serializes concurrent deploys (several app processes starting at once)
+MIGRATION_LOCK_ID = 7242000
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def apply(self, cur):
+        if self.path.endswith(".sql"):
+            with open(self.path) as f:
+                cur.execute(f.read())
+            return
+
+        spec = importlib.util.spec_from_file_location(f"migrations.m{self.version:04d}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(cur)
+
+
+def discover_migrations():
+    """All migrations in this package, in version order"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return migrations
+
+
+def _ensure_table(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def applied_versions(cur):
+    _ensure_table(cur)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def migration_status():
+    """[(version, name, applied)] for every known migration"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        applied = applied_versions(cur)
+        conn.commit()
+        return [(m.version, m.name, m.version in applied) for m in discover_migrations()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def apply_migrations():
+    """Apply every pending migration; returns the versions applied"""
+    conn = get_db()
+    cur = conn.cursor()
+    applied_now = []
+    try:
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            applied = applied_versions(cur)
+            conn.commit()
+
+            for migration in discover_migrations():
+                if migration.version in applied:
+                    continue
+                try:
+                    migration.apply(cur)
+                    cur.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied_now.append(migration.version)
+                print(f"✅ Applied migration {migration.version:04d}_{migration.name}")
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+        return applied_now
+    finally:
+        cur.close()
+        conn.close()
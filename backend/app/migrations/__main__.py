@@ -0,0 +1,46 @@
+"""Schema maintenance CLI, run from backend/app:
+
+    python -m migrations status        list migrations and whether they are applied
+    python -m migrations apply         apply pending migrations
+    python -m migrations retention     create upcoming drift_logs partitions, drop expired ones
+    python -m migrations check-plans   EXPLAIN the hot queries; exit 1 if an index is not used
+"""
+import argparse
+import sys
+
+from migrations import apply_migrations, migration_status
+from migrations.plans import run_plan_checks
+from retention import run_retention
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    commands.add_parser("apply")
+    commands.add_parser("retention")
+    check = commands.add_parser("check-plans")
+    check.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        for version, name, applied in migration_status():
+            print(f"{'applied' if applied else 'pending'}  {version:04d}_{name}")
+    elif args.command == "apply":
+        applied = apply_migrations()
+        print(f"{len(applied)} migration(s) applied")
+    elif args.command == "retention":
+        print(run_retention())
+    elif args.command == "check-plans":
+        failed = False
+        for name, problems in run_plan_checks(args.user_id):
+            print(f"{'FAIL' if problems else 'ok  '}  {name}")
+            for problem in problems:
+                print(f"        {problem}")
+            failed = failed or bool(problems)
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""EXPLAIN checks that the hot time-range queries are served by the indexes.
+
+Sequential scans are disabled for the check so that on a small or freshly
+created database the planner still shows which index it *can* use; a query
+with no usable index falls back to a (disabled) sequential scan and fails.
+"""
+import json
+import psycopg2
+from datetime import datetime, timedelta
+from models import get_db
+
+
+class PlanCheck:
+    def __init__(self, name, sql, params, index, forbid=("Sort",), partitions=None):
+        self.name = name
+        self.sql = sql
+        self.params = params
+        self.index = index  # index the plan must use (substring, to match per-partition index names)
+        self.forbid = forbid  # node types that must not appear
+        self.partitions = partitions  # callable(now) -> partitions allowed to be scanned
+
+
+def _window_partitions(now):
+    months = {f"drift_logs_p{m.year:04d}{m.month:02d}" for m in (now - timedelta(days=7), now)}
+    return months | {"drift_logs_default"}
+
+
+def plan_checks(user_id=1):
+    now = datetime.now()
+    return [
+        PlanCheck(
+            "model_metrics baseline (latest row per user)",
+            "SELECT accuracy, precision, recall FROM model_metrics WHERE user_id = %s ORDER BY created_at DESC LIMIT 1",
+            (user_id,),
+            index="idx_model_metrics_user_time",
+        ),
+        PlanCheck(
+            "model_metrics history window",
+            "SELECT accuracy, precision, recall, created_at FROM model_metrics "
+            "WHERE user_id = %s AND created_at >= %s ORDER BY created_at ASC",
+            (user_id, now - timedelta(days=30)),
+            index="idx_model_metrics_user_time",
+        ),
+        PlanCheck(
+            "drift_logs per-user time range",
+            "SELECT feature_name, drift_score, detected_at FROM drift_logs "
+            "WHERE user_id = %s AND detected_at >= %s AND detected_at < %s",
+            (user_id, now - timedelta(days=7), now),
+            index="user_id_detected_at",
+            forbid=(),
+            partitions=_window_partitions,
+        ),
+        PlanCheck(
+            "drift_rollups history",
+            "SELECT feature_name, bucket_start, score_sum FROM drift_rollups "
+            "WHERE user_id = %s AND resolution = 'hour' AND bucket_start >= %s",
+            (user_id, now - timedelta(days=7)),
+            index="drift_rollups_pkey",
+            forbid=(),
+        ),
+    ]
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(cur, sql, params):
+    cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def check_plan(cur, check, now=None):
+    """Problems with one query's plan (empty list when it passes)"""
+    nodes = list(_walk(explain(cur, check.sql, check.params)))
+    problems = []
+
+    scans = [n for n in nodes if "Relation Name" in n]
+    for scan in scans:
+        if scan["Node Type"] == "Seq Scan":
+            problems.append(f"sequential scan on {scan['Relation Name']}")
+            continue
+        # Bitmap heap scans name their index on the child Bitmap Index Scan
+        indexes = [n["Index Name"] for n in _walk(scan) if "Index Name" in n]
+        if not any(check.index in name for name in indexes):
+            problems.append(f"{scan['Relation Name']} scanned via {indexes or scan['Node Type']}, expected {check.index}")
+
+    for node in nodes:
+        if node["Node Type"] in check.forbid:
+            problems.append(f"plan contains a {node['Node Type']} node")
+
+    if check.partitions:
+        allowed = check.partitions(now or datetime.now())
+        extra = sorted({s["Relation Name"] for s in scans} - allowed)
+        if extra:
+            problems.append(f"partitions not pruned: {', '.join(extra)}")
+
+    return problems
+
+
+def run_plan_checks(user_id=1):
+    """Run every check; returns [(name, problems)]"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        results = []
+        for check in plan_checks(user_id):
+            # A query that fails to plan (e.g. a table missing on an unmigrated
+            # database) fails its check without aborting the others
+            cur.execute("SAVEPOINT plan_check")
+            try:
+                results.append((check.name, check_plan(cur, check)))
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT plan_check")
+                results.append((check.name, [str(e).strip().splitlines()[0]]))
+        return results
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ModelCache:
+    """In-process LRU cache of deserialized models bounded by a memory budget.
+
+    Entries are keyed by a cache key (the upload's content hash, so identical
+    uploads share one entry, or the model id) plus the file's mtime and size, so
+    a model file replaced on disk is reloaded rather than served stale. The cost
+    of an entry is the size of its pickle on disk, which tracks the in-memory size
+    of the large numpy-backed estimators closely enough for budgeting.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (model, cost)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> lock held while the model is deserialized
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(cache_key, model_path):
+        st = os.stat(model_path)
+        return (cache_key if cache_key is not None else os.path.realpath(model_path), st.st_mtime_ns, st.st_size)
+
+    def get_or_load(self, cache_key, model_path, loader):
+        """Return the cached model, calling loader(model_path) on a miss"""
+        key = self._key(cache_key, model_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Concurrent misses for the same model wait for one deserialization
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+            try:
+                model = loader(model_path)
+                self._store(key, model, key[2])
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            return model
+
+    def _store(self, key, model, cost):
+        with self._lock:
+            if cost > self.max_bytes:
+                return
+
+            # Older versions of the same model are dead weight once a new file is loaded
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._current_bytes -= self._entries.pop(stale)[1]
+
+            while self._entries and self._current_bytes + cost > self.max_bytes:
+                _, (_, evicted_cost) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_cost
+                self.evictions += 1
+
+            self._entries[key] = (model, cost)
+            self._current_bytes += cost
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None
+            }
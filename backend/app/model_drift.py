@@ -1,13 +1,29 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import pandas as pd
-import numpy as np
 import pickle
-import joblib
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error, r2_score
 from models import get_db
+from config import Config
+from model_cache import ModelCache
+from dataset_store import iter_dataset_chunks, iter_table_chunks, read_table, column_names
+from metrics_engine import ConfusionAccumulator, classification_metrics, evaluate_in_chunks
+from errors import AnalysisError
+from jobs import register_job_type, submit_job
+from profiler import profiled
+from telemetry import pipeline, stage, timed_iter
+import faulthandler
+import multiprocessing
 import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
+from lazy_imports import ANALYTICS_MODULES, lazy_module
+
+np = lazy_module("numpy")
+joblib = lazy_module("joblib")
+sk_metrics = lazy_module("sklearn.metrics")
 
 model_drift_bp = Blueprint("model_drift", __name__)
 
@@ -15,8 +31,13 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_DIR = os.path.join(BASE_DIR, "uploads/models")
 DATASET_DIR = os.path.join(BASE_DIR, "uploads/datasets")
 
-def load_model(model_path):
-    """Load a pickled model"""
+# Extra seconds past a compare's model timeout before its worker is killed, and
+# before the server stops waiting for it
+COMPARE_GRACE_SECONDS = 5
+
+_model_cache = ModelCache(Config.MODEL_CACHE_MAX_BYTES)
+
+def _deserialize_model(model_path):
     try:
         # Try pickle first
         with open(model_path, 'rb') as f:
@@ -28,15 +49,55 @@ def load_model(model_path):
         except Exception as e:
             raise Exception(f"Failed to load model: {str(e)}")
 
+def load_model(model_path, cache_key=None):
+    """Load a pickled model, reusing the deserialized copy while the file is unchanged.
+
+    `cache_key` should be the upload's content hash (or its id for older uploads)
+    so identical uploads share one cached model.
+    """
+    return _model_cache.get_or_load(cache_key, model_path, _deserialize_model)
+
+def model_cache_stats():
+    return _model_cache.stats()
+
+def model_input_columns(model, target_column):
+    """Columns a fitted model needs plus the target, or None to load everything"""
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is None:
+        return None
+    return [str(c) for c in feature_names if c != target_column] + [target_column]
+
+def split_features(df, target_column, columns=None):
+    """Split a dataset into model inputs and target"""
+    if columns is None:
+        return df.drop(columns=[target_column]), df[target_column]
+    return df[columns[:-1]], df[target_column]
+
+def _split_chunk(chunk, target_column, columns):
+    # Datasets without a stored schema are only checked once their rows are read
+    if target_column not in chunk.columns:
+        raise AnalysisError(
+            f"Target column '{target_column}' not found in dataset",
+            available_columns=chunk.columns.tolist()
+        )
+    return split_features(chunk, target_column, columns)
+
+def _row_progress(progress, total_rows, start, end):
+    """Map rows processed onto the [start, end] slice of a job's progress"""
+    if not total_rows:
+        return None
+    done = [0]
+    def report(rows):
+        done[0] += rows
+        progress(start + (end - start) * min(done[0] / total_rows, 1.0))
+    return report
+
 def calculate_classification_metrics(y_true, y_pred):
-    """Calculate classification metrics"""
+    """Calculate classification metrics from a single confusion matrix"""
     try:
-        return {
-            'accuracy': float(accuracy_score(y_true, y_pred)),
-            'precision': float(precision_score(y_true, y_pred, average='weighted', zero_division=0)),
-            'recall': float(recall_score(y_true, y_pred, average='weighted', zero_division=0)),
-            'f1_score': float(f1_score(y_true, y_pred, average='weighted', zero_division=0))
-        }
+        confusion = ConfusionAccumulator()
+        confusion.update(y_true, y_pred)
+        return classification_metrics(confusion.matrix, confusion.labels)
     except Exception as e:
         print(f"Classification metrics error: {e}")
         return None
@@ -45,91 +106,105 @@ def calculate_regression_metrics(y_true, y_pred):
     """Calculate regression metrics"""
     try:
         return {
-            'mse': float(mean_squared_error(y_true, y_pred)),
-            'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
-            'r2_score': float(r2_score(y_true, y_pred)),
+            'mse': float(sk_metrics.mean_squared_error(y_true, y_pred)),
+            'rmse': float(np.sqrt(sk_metrics.mean_squared_error(y_true, y_pred))),
+            'r2_score': float(sk_metrics.r2_score(y_true, y_pred)),
             'mae': float(np.mean(np.abs(y_true - y_pred)))
         }
     except Exception as e:
         print(f"Regression metrics error: {e}")
         return None
 
-@model_drift_bp.route("/evaluate", methods=["POST"])
-@jwt_required()
-def evaluate_model():
-    """Evaluate a model on a dataset and detect performance drift"""
-    user_id = get_jwt_identity()
-    data = request.json
+def evaluation_params_error(data):
+    """Validation message for /model-drift/evaluate parameters, or None"""
+    if not data.get('model_id') or not data.get('dataset_id') or not data.get('target_column'):
+        return "model_id, dataset_id, and target_column are required"
+    return None
+
+def _no_progress(fraction, message=None):
+    pass
+
+@register_job_type('model_evaluation')
+@pipeline('model_evaluation')
+def run_model_evaluation(user_id, data, progress=_no_progress):
+    """Evaluate a model on a dataset and detect performance drift, returning the response payload"""
+    error = evaluation_params_error(data)
+    if error:
+        raise AnalysisError(error)
     
     model_id = data.get('model_id')
     dataset_id = data.get('dataset_id')
     target_column = data.get('target_column')
     task_type = data.get('task_type', 'classification')
     
-    if not model_id or not dataset_id or not target_column:
-        return jsonify({"error": "model_id, dataset_id, and target_column are required"}), 400
-    
     conn = get_db()
     cur = conn.cursor()
     
     try:
-        # Get model
-        cur.execute(
-            "SELECT filename, path FROM uploaded_models WHERE id = %s AND user_id = %s",
-            (model_id, user_id)
-        )
-        model_result = cur.fetchone()
+        progress(0.0, "Loading model and dataset metadata")
         
-        # Get dataset
-        cur.execute(
-            "SELECT filename, path FROM uploaded_datasets WHERE id = %s AND user_id = %s",
-            (dataset_id, user_id)
-        )
-        dataset_result = cur.fetchone()
+        with stage("db_lookup"):
+            # Get model
+            cur.execute(
+                "SELECT filename, path, content_hash FROM uploaded_models WHERE id = %s AND user_id = %s",
+                (model_id, user_id)
+            )
+            model_result = cur.fetchone()
         
-        if not model_result or not dataset_result:
-            return jsonify({"error": "Model or dataset not found"}), 404
+            # Get dataset
+            cur.execute(
+                "SELECT filename, path, columnar_path, schema FROM uploaded_datasets WHERE id = %s AND user_id = %s",
+                (dataset_id, user_id)
+            )
+            dataset_result = cur.fetchone()
         
-        # Load model
-        model = load_model(model_result[1])
+        if not model_result or not dataset_result:
+            raise AnalysisError("Model or dataset not found", 404)
         
-        # Load dataset
-        df = pd.read_csv(dataset_result[1])
+        dataset_source = dataset_result[2] or dataset_result[1]
+        schema = dataset_result[3]
         
-        # Check if target column exists
-        if target_column not in df.columns:
-            return jsonify({
-                "error": f"Target column '{target_column}' not found in dataset",
-                "available_columns": df.columns.tolist()
-            }), 400
+        # Check if target column exists before loading anything
+        if schema and target_column not in column_names(schema):
+            raise AnalysisError(
+                f"Target column '{target_column}' not found in dataset",
+                available_columns=column_names(schema)
+            )
         
-        # Prepare features and target
-        X = df.drop(columns=[target_column])
-        y_true = df[target_column]
+        # Load model
+        progress(0.1, "Loading model")
+        with stage("model_load"):
+            model = load_model(model_result[1], model_result[2] or model_id)
         
-        # Make predictions
-        y_pred = model.predict(X)
+        # Stream only the columns the model consumes, predicting batch by batch
+        progress(0.3, "Running predictions")
+        columns = model_input_columns(model, target_column) if schema else None
+        metrics = evaluate_in_chunks(
+            model,
+            timed_iter(iter_dataset_chunks(dataset_source, columns, Config.EVAL_CHUNK_SIZE), "file_load"),
+            lambda chunk: _split_chunk(chunk, target_column, columns),
+            task_type,
+            _row_progress(progress, schema['num_rows'] if schema else None, 0.3, 0.9)
+        )
         
-        # Calculate metrics based on task type
         if task_type == 'classification':
-            metrics = calculate_classification_metrics(y_true, y_pred)
             drift_score = 1.0 - metrics['accuracy']
         else:
-            metrics = calculate_regression_metrics(y_true, y_pred)
             drift_score = metrics['rmse']
         
         # Get baseline metrics
-        cur.execute(
-            """
-            SELECT accuracy, precision, recall, created_at 
-            FROM model_metrics 
-            WHERE user_id = %s 
-            ORDER BY created_at DESC 
-            LIMIT 1
-            """,
-            (user_id,)
-        )
-        baseline = cur.fetchone()
+        with stage("db_lookup"):
+            cur.execute(
+                """
+                SELECT accuracy, precision, recall, created_at 
+                FROM model_metrics 
+                WHERE user_id = %s 
+                ORDER BY created_at DESC 
+                LIMIT 1
+                """,
+                (user_id,)
+            )
+            baseline = cur.fetchone()
         
         # Calculate drift
         drift_detected = False
@@ -142,18 +217,19 @@ def evaluate_model():
             drift_detected = drift_percentage > 5
         
         # Save current metrics
-        if task_type == 'classification':
-            cur.execute(
-                """
-                INSERT INTO model_metrics (model_name, accuracy, precision, recall, user_id, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (model_result[0], metrics['accuracy'], metrics['precision'], metrics['recall'], user_id, datetime.now())
-            )
+        with stage("db_write"):
+            if task_type == 'classification':
+                cur.execute(
+                    """
+                    INSERT INTO model_metrics (model_name, accuracy, precision, recall, user_id, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (model_result[0], metrics['accuracy'], metrics['precision'], metrics['recall'], user_id, datetime.now())
+                )
         
-        conn.commit()
+            conn.commit()
         
-        return jsonify({
+        return {
             "success": True,
             "model_name": model_result[0],
             "dataset_name": dataset_result[0],
@@ -168,16 +244,47 @@ def evaluate_model():
                 "recall": float(baseline[2]) if baseline else None,
                 "timestamp": baseline[3].isoformat() if baseline else None
             } if baseline else None
-        })
+        }
         
-    except Exception as e:
+    except Exception:
         conn.rollback()
-        return jsonify({"error": str(e)}), 500
+        raise
     finally:
         cur.close()
         conn.close()
 
 
+@model_drift_bp.route("/evaluate", methods=["POST"])
+@jwt_required()
+@profiled
+def evaluate_model():
+    """Evaluate a model on a dataset and detect performance drift"""
+    user_id = get_jwt_identity()
+    data = request.json or {}
+    
+    error = evaluation_params_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        # Large evaluations can run as a background job instead of holding the request
+        if data.get('async'):
+            job_id = submit_job(user_id, 'model_evaluation', data)
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/jobs/{job_id}"
+            }), 202
+        
+        return jsonify(run_model_evaluation(user_id, data))
+        
+    except AnalysisError as e:
+        return jsonify(e.to_response()), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @model_drift_bp.route("/history", methods=["GET"])
 @jwt_required()
 def get_performance_history():
@@ -226,6 +333,161 @@ def get_performance_history():
         conn.close()
 
 
+class ComparisonTimeout(Exception):
+    pass
+
+def _raise_comparison_timeout(signum, frame):
+    raise ComparisonTimeout()
+
+# The dataset a compare worker last scored, as (file identity, Arrow table)
+_worker_dataset = (None, None)
+
+def _comparison_dataset(dataset_source):
+    """Arrow table of a compare's dataset, loaded once per worker and reused for each model scored on it.
+
+    Columnar copies are memory-mapped, so holding the table costs no heap and
+    the pages are shared with the other workers through the page cache.
+    """
+    global _worker_dataset
+    stat = os.stat(dataset_source)
+    key = (dataset_source, stat.st_size, stat.st_mtime_ns)
+    cached_key, table = _worker_dataset
+    if cached_key != key:
+        _worker_dataset = (None, None)
+        table = read_table(dataset_source)
+        _worker_dataset = (key, table)
+    return table
+
+def _evaluate_for_comparison(model_id, model_name, model_path, cache_key, dataset_source, projectable, target_column, task_type, timeout):
+    """Load and score one model inside a compare worker process"""
+    # The alarm interrupts a model that runs too long without killing the worker
+    previous = signal.signal(signal.SIGALRM, _raise_comparison_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    # A model stuck in native code never lets the alarm handler run; faulthandler's
+    # watchdog thread needs no GIL and exits just this worker instead
+    faulthandler.dump_traceback_later(timeout + COMPARE_GRACE_SECONDS, exit=True)
+    try:
+        model = load_model(model_path, cache_key)
+        columns = model_input_columns(model, target_column) if projectable else None
+        metrics = evaluate_in_chunks(
+            model,
+            iter_table_chunks(_comparison_dataset(dataset_source), columns, Config.EVAL_CHUNK_SIZE),
+            lambda chunk: _split_chunk(chunk, target_column, columns),
+            task_type
+        )
+        
+        return {
+            'model_id': model_id,
+            'model_name': model_name,
+            'metrics': metrics
+        }
+    except ComparisonTimeout:
+        return {
+            'model_id': model_id,
+            'model_name': model_name,
+            'error': f"Evaluation timed out after {timeout:g}s"
+        }
+    except Exception as e:
+        return {
+            'model_id': model_id,
+            'model_name': model_name,
+            'error': str(e)
+        }
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+_compare_executor = None
+_compare_executor_lock = threading.Lock()
+
+def _get_compare_executor():
+    global _compare_executor
+    with _compare_executor_lock:
+        if _compare_executor is None:
+            # forkserver children start from a clean, single-threaded process with
+            # this module preloaded, rather than inheriting the server's threads and pool
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload(['model_drift', *ANALYTICS_MODULES])
+            _compare_executor = ProcessPoolExecutor(max_workers=Config.COMPARE_WORKERS, mp_context=ctx)
+        return _compare_executor
+
+def _replace_broken_executor(executor):
+    """Drop a pool that lost a worker; the next compare starts a new one.
+
+    Only the pool that actually broke is dropped, so concurrent compares that
+    already moved to a replacement keep it.
+    """
+    global _compare_executor
+    with _compare_executor_lock:
+        if _compare_executor is executor:
+            _compare_executor = None
+    executor.shutdown(wait=False)
+
+def _comparison_error(task, message):
+    return {'model_id': task[0], 'model_name': task[1], 'error': message}
+
+def _compare_round(tasks, timeout):
+    """Evaluate tasks in the pool; None marks a task lost to a crashed worker"""
+    executor = _get_compare_executor()
+    futures = []
+    for task in tasks:
+        try:
+            futures.append(executor.submit(_evaluate_for_comparison, *task, timeout))
+        except (BrokenProcessPool, OSError):
+            # Workers start on demand, so a worker dying mid-submit breaks the pool under us
+            futures.append(None)
+    
+    # Workers enforce the timeout themselves, exiting when a model hangs in native
+    # code; this deadline only stops this request waiting on tasks queued behind
+    # other compares. The shared pool is left alone: its other work is not ours.
+    waves = -(-len(futures) // Config.COMPARE_WORKERS)
+    deadline = time.monotonic() + (timeout + COMPARE_GRACE_SECONDS) * waves + COMPARE_GRACE_SECONDS
+    
+    results = []
+    broken = False
+    for task, future in zip(tasks, futures):
+        if future is None:
+            broken = True
+            results.append(None)
+            continue
+        try:
+            results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+        except FutureTimeout:
+            future.cancel()
+            results.append(_comparison_error(task, f"Evaluation timed out after {timeout:g}s"))
+        except BrokenProcessPool:
+            broken = True
+            results.append(None)
+    
+    if broken:
+        _replace_broken_executor(executor)
+    return results
+
+def compare_in_pool(tasks, timeout):
+    """Evaluate comparison tasks concurrently, returning results in task order"""
+    results = _compare_round(tasks, timeout)
+    
+    # A model that kills its worker breaks the whole pool; rerun the casualties
+    # one at a time so only the culprit reports a failure
+    for i, result in enumerate(results):
+        if result is None and len(tasks) > 1:
+            results[i] = _compare_round([tasks[i]], timeout)[0]
+        if results[i] is None:
+            results[i] = _comparison_error(tasks[i], "Model crashed the evaluation worker or hung past its timeout")
+    
+    return results
+
+def _parse_model_ids(model_ids):
+    ids = []
+    for model_id in model_ids:
+        try:
+            ids.append(int(model_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
 @model_drift_bp.route("/compare", methods=["POST"])
 @jwt_required()
 def compare_models():
@@ -247,7 +509,7 @@ def compare_models():
     try:
         # Get dataset
         cur.execute(
-            "SELECT filename, path FROM uploaded_datasets WHERE id = %s AND user_id = %s",
+            "SELECT filename, path, columnar_path, schema FROM uploaded_datasets WHERE id = %s AND user_id = %s",
             (dataset_id, user_id)
         )
         dataset_result = cur.fetchone()
@@ -255,45 +517,39 @@ def compare_models():
         if not dataset_result:
             return jsonify({"error": "Dataset not found"}), 404
         
-        # Load dataset once
-        df = pd.read_csv(dataset_result[1])
-        X = df.drop(columns=[target_column])
-        y_true = df[target_column]
+        dataset_source = dataset_result[2] or dataset_result[1]
+        schema = dataset_result[3]
         
-        results = []
+        if schema and target_column not in column_names(schema):
+            return jsonify({
+                "error": f"Target column '{target_column}' not found in dataset",
+                "available_columns": column_names(schema)
+            }), 400
+        
+        # Get all models in one round trip
+        cur.execute(
+            "SELECT id, filename, path, content_hash FROM uploaded_models WHERE id = ANY(%s) AND user_id = %s",
+            (_parse_model_ids(model_ids), user_id)
+        )
+        found = {row[0]: row for row in cur.fetchall()}
         
+        # Unknown ids are skipped; the rest keep the order they were requested in
+        requested = []
         for model_id in model_ids:
-            # Get model
-            cur.execute(
-                "SELECT filename, path FROM uploaded_models WHERE id = %s AND user_id = %s",
-                (model_id, user_id)
-            )
-            model_result = cur.fetchone()
-            
-            if not model_result:
-                continue
-            
             try:
-                # Load and evaluate model
-                model = load_model(model_result[1])
-                y_pred = model.predict(X)
-                
-                if task_type == 'classification':
-                    metrics = calculate_classification_metrics(y_true, y_pred)
-                else:
-                    metrics = calculate_regression_metrics(y_true, y_pred)
-                
-                results.append({
-                    'model_id': model_id,
-                    'model_name': model_result[0],
-                    'metrics': metrics
-                })
-            except Exception as e:
-                results.append({
-                    'model_id': model_id,
-                    'model_name': model_result[0],
-                    'error': str(e)
-                })
+                row = found.get(int(model_id))
+            except (TypeError, ValueError):
+                row = None
+            if row:
+                requested.append((model_id, row[1], row[2], row[3] or row[0]))
+        
+        results = compare_in_pool(
+            [
+                (model_id, model_name, model_path, cache_key, dataset_source, bool(schema), target_column, task_type)
+                for model_id, model_name, model_path, cache_key in requested
+            ],
+            Config.COMPARE_MODEL_TIMEOUT
+        )
         
         return jsonify({
             "success": True,
@@ -305,4 +561,4 @@ def compare_models():
         return jsonify({"error": str(e)}), 500
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
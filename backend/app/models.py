@@ -1,21 +1,255 @@
 import psycopg2
+import psycopg2.extensions
 import os
+import threading
 import time
+from collections import deque
+from config import Config
 
-def get_db():
-    """Get database connection with retry logic"""
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class PooledConnection:
+    """Connection handed out by get_db(); close() returns it to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        """Return the underlying connection to the pool instead of closing it"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with bounded checkout wait"""
+
+    def __init__(self, dsn, minconn, maxconn, timeout, healthcheck_interval):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: min=%s max=%s" % (minconn, maxconn))
+
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, returned_at)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'waits': 0,
+            'timeouts': 0
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        with self._cond:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['connections_discarded'] += 1
+
+    def _is_healthy(self, conn, returned_at):
+        """Cheap check on every checkout, round trip only for long-idle connections"""
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.healthcheck_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def prefill(self):
+        """Open connections until the pool holds at least minconn"""
+        while True:
+            with self._cond:
+                if len(self._idle) + self._in_use >= self.minconn:
+                    return
+            conn = self._connect()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout=None):
+        """Check out a healthy connection, waiting at most `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._in_use < self.maxconn:
+                    conn, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {timeout}s "
+                        f"(pool max size {self.maxconn})"
+                    )
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn, returned_at):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def putconn(self, conn):
+        """Reset a connection's transaction state and make it available again"""
+        keep = not conn.closed
+        if keep:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and not self._closed and len(self._idle) + self._in_use < self.maxconn:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'size': len(self._idle) + self._in_use,
+                **self._stats
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _create_pool():
     DATABASE_URL = os.getenv("DATABASE_URL")
-    
+
     if not DATABASE_URL:
         raise Exception("DATABASE_URL environment variable not set")
-    
-    for i in range(10):
+
+    return ConnectionPool(
+        DATABASE_URL,
+        minconn=Config.DB_POOL_MIN_SIZE,
+        maxconn=Config.DB_POOL_MAX_SIZE,
+        timeout=Config.DB_POOL_TIMEOUT,
+        healthcheck_interval=Config.DB_POOL_HEALTHCHECK_INTERVAL
+    )
+
+
+def init_pool(retries=None, delay=None):
+    """Create the process-wide pool at startup, waiting for the DB to come up"""
+    global _pool
+    retries = Config.DB_CONNECT_RETRIES if retries is None else retries
+    delay = Config.DB_CONNECT_RETRY_DELAY if delay is None else delay
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = _create_pool()
+        pool = _pool
+
+    for i in range(retries):
         try:
-            conn = psycopg2.connect(DATABASE_URL)
-            print("✅ DB Connected")
-            return conn
+            pool.prefill()
+            print(f"✅ DB Connected (pool {pool.minconn}-{pool.maxconn})")
+            return pool
         except Exception as e:
-            print(f"⏳ Waiting for DB... attempt {i+1}/10 ({e})")
-            time.sleep(3)
-    
-    raise Exception("❌ DB connection failed after 10 attempts")
\ No newline at end of file
+            print(f"⏳ Waiting for DB... attempt {i+1}/{retries} ({e})")
+            if i + 1 < retries:
+                time.sleep(delay)
+
+    raise Exception(f"❌ DB connection failed after {retries} attempts")
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.closeall()
+
+
+def pool_stats():
+    pool = _pool
+    return pool.stats() if pool is not None else None
+
+
+def get_db():
+    """Check out a pooled database connection; close() returns it to the pool"""
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool()
+            pool = _pool
+
+    return PooledConnection(pool, pool.getconn())
@@ -0,0 +1,300 @@
+"""Opt-in sampling profiler for slow analysis requests.
+
+With PROFILER_ENABLED, each synchronous /drift/analyze and /model-drift/evaluate
+request is sampled by one background thread per process: every
+PROFILER_INTERVAL it reads the request thread's Python stack and counts it.
+When the request ends the profile is kept only if it took at least
+PROFILE_SLOW_REQUEST_SECONDS, or if an admin (ADMIN_USER_IDS) sent the
+X-Debug-Profile header; otherwise the counts are dropped.
+
+Kept profiles are stored in request_profiles under a generated id, together
+with the request id (see telemetry.request_id), as collapsed stacks: one
+"root;...;leaf count" line per distinct stack, the input format of
+flamegraph.pl, speedscope and inferno.
+
+Overhead is capped three ways: the sampler thread sleeps while nothing is
+tracked, at most PROFILER_MAX_ACTIVE requests are sampled at once, and the
+interval is stretched whenever taking samples would use more than
+PROFILER_MAX_OVERHEAD of wall time.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+import uuid
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from config import Config
+from models import get_db
+from telemetry import Counter, log_event, register, request_id
+
+profiler_bp = Blueprint("profiler", __name__)
+
+DEBUG_HEADER = "X-Debug-Profile"
+MAX_STACK_DEPTH = 200
+
+PROFILES_STORED = register(Counter(
+    "request_profiles_stored_total", "Request profiles kept, by what triggered them", ("route", "trigger")
+))
+SAMPLER_SECONDS = register(Counter(
+    "profiler_sampling_seconds_total", "Time the profiler thread spent taking stack samples"
+))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Session:
+    """Stack counts of one request being sampled"""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.stacks = {}
+        self.samples = 0
+
+
+class _Sampler:
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._labels = {}  # code object -> frame label
+
+    def track(self, thread_id):
+        """Start sampling `thread_id`; None when PROFILER_MAX_ACTIVE requests are already sampled"""
+        with self._lock:
+            if len(self._sessions) >= Config.PROFILER_MAX_ACTIVE:
+                return None
+            session = _Session(thread_id)
+            self._sessions[id(session)] = session
+            # A worker forked from a process that sampled before has no sampler thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def untrack(self, session):
+        with self._lock:
+            self._sessions.pop(id(session), None)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(APP_DIR):
+                filename = os.path.relpath(filename, APP_DIR)
+            elif "site-packages" in filename:
+                filename = filename.split("site-packages" + os.sep, 1)[1]
+            # ';' separates frames in collapsed stacks
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _sample(self):
+        """Count one stack sample for every tracked request; returns the time taken, None if idle"""
+        # Held while sampling so an untracked session is never written to again
+        with self._lock:
+            if not self._sessions:
+                self._wake.clear()
+                return None
+            start = time.perf_counter()
+            frames = sys._current_frames()
+            for session in self._sessions.values():
+                frame = frames.get(session.thread_id)
+                if frame is not None:
+                    stack = self._stack(frame)
+                    session.stacks[stack] = session.stacks.get(stack, 0) + 1
+                    session.samples += 1
+            del frames
+            return time.perf_counter() - start
+
+    def _run(self):
+        while True:
+            cost = self._sample()
+            if cost is None:
+                self._wake.wait()
+                continue
+            SAMPLER_SECONDS.inc(cost)
+
+            # Sampling holds the GIL; stretch the interval so it stays within the overhead budget
+            time.sleep(max(Config.PROFILER_INTERVAL, cost / Config.PROFILER_MAX_OVERHEAD - cost))
+
+
+_sampler = _Sampler()
+
+
+def collapsed_stacks(stacks):
+    """Collapsed-stack text ("frame;frame;frame count" lines), heaviest stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+def is_admin(user_id):
+    return str(user_id) in Config.ADMIN_USER_IDS
+
+
+def _debug_requested():
+    if request.headers.get(DEBUG_HEADER, "").lower() not in ("1", "true", "yes"):
+        return False
+    return is_admin(get_jwt_identity())
+
+
+def save_profile(cur, client_request_id, user_id, route, trigger, duration, samples, stacks):
+    """Store a profile under a new id, trim to PROFILE_MAX_STORED and return the id"""
+    profile_id = str(uuid.uuid4())
+    cur.execute(
+        """
+        INSERT INTO request_profiles
+            (id, request_id, user_id, route, trigger, duration_ms, sample_count, interval_ms, stacks)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        (profile_id, client_request_id, user_id, route, trigger, round(duration * 1000, 2), samples,
+         Config.PROFILER_INTERVAL * 1000, collapsed_stacks(stacks))
+    )
+    cur.execute(
+        """
+        DELETE FROM request_profiles WHERE id IN (
+            SELECT id FROM request_profiles ORDER BY created_at DESC OFFSET %s
+        )
+        """,
+        (Config.PROFILE_MAX_STORED,)
+    )
+    return profile_id
+
+
+def _store(session, trigger, duration):
+    rid = request_id()
+    route = request.url_rule.rule if request.url_rule else request.path
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        profile_id = save_profile(cur, rid, get_jwt_identity(), route, trigger, duration,
+                                  session.samples, session.stacks)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Could not store request profile for {rid}: {e}")
+        return
+    finally:
+        cur.close()
+        conn.close()
+
+    PROFILES_STORED.inc(route=route, trigger=trigger)
+    log_event("profile", profile_id=profile_id, request_id=rid, route=route, trigger=trigger,
+              duration_ms=round(duration * 1000, 2), samples=session.samples)
+
+
+def profiled(view):
+    """Sample this view while it runs and keep the profile of slow or admin-debugged requests.
+
+    Goes below @jwt_required(), which the debug header check relies on.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.PROFILER_ENABLED:
+            return view(*args, **kwargs)
+
+        forced = _debug_requested()
+        session = _sampler.track(threading.get_ident())
+        start = time.perf_counter()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            if session is not None:
+                _sampler.untrack(session)
+                slow = duration >= Config.PROFILE_SLOW_REQUEST_SECONDS
+                if session.samples and (forced or slow):
+                    _store(session, "debug_header" if forced else "slow", duration)
+    return wrapper
+
+
+# ======================
+# ADMIN ENDPOINTS
+# ======================
+def _require_admin():
+    if not is_admin(get_jwt_identity()):
+        return jsonify({"error": "Admin access required"}), 403
+    return None
+
+
+@profiler_bp.route("", methods=["GET"])
+@jwt_required()
+def list_profiles():
+    """List stored request profiles, newest first (without the stacks); ?request_id= filters by X-Request-ID"""
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    limit = request.args.get("limit", 50, type=int)
+    rid = request.args.get("request_id")
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT id, request_id, user_id, route, trigger, duration_ms, sample_count, interval_ms, created_at
+            FROM request_profiles WHERE %s::text IS NULL OR request_id = %s
+            ORDER BY created_at DESC LIMIT %s
+            """,
+            (rid, rid, max(1, min(limit, 500)))
+        )
+        return jsonify({
+            "success": True,
+            "profiles": [
+                {
+                    "id": str(row[0]),
+                    "request_id": row[1],
+                    "user_id": row[2],
+                    "route": row[3],
+                    "trigger": row[4],
+                    "duration_ms": row[5],
+                    "sample_count": row[6],
+                    "interval_ms": row[7],
+                    "created_at": row[8].isoformat() if row[8] else None,
+                    "url": f"/admin/profiles/{row[0]}"
+                }
+                for row in cur.fetchall()
+            ]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
+@profiler_bp.route("/<profile_id>", methods=["GET"])
+@jwt_required()
+def get_profile(profile_id):
+    """Collapsed stacks of one request's profile, ready for flamegraph.pl or speedscope"""
+    denied = _require_admin()
+    if denied:
+        return denied
+
+    try:
+        uuid.UUID(profile_id)
+    except ValueError:
+        return jsonify({"error": "Profile not found"}), 404
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT stacks FROM request_profiles WHERE id = %s", (profile_id,))
+        row = cur.fetchone()
+        if not row:
+            return jsonify({"error": "Profile not found"}), 404
+        return Response(row[0], mimetype="text/plain")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
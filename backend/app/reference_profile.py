@@ -0,0 +1,54 @@
+from psycopg2.extras import Json, execute_values
+
+# Bump when the profile layout or the way it is built changes; older rows are rebuilt
+PROFILE_VERSION = 2  # 2: profiles record the rank error of their sample
+
+
+def is_profile(obj):
+    """True for a reference profile dict rather than raw column data"""
+    return isinstance(obj, dict) and 'bin_edges' in obj
+
+
+def load_reference_profiles(cur, dataset_id, columns):
+    """Fetch stored profiles for `columns` of a dataset, keyed by column name.
+
+    Profiles built for an identical upload (same content hash) are reused, with
+    the dataset's own rows preferred.
+    """
+    if not columns:
+        return {}
+
+    cur.execute(
+        """
+        SELECT DISTINCT ON (p.feature_name) p.feature_name, p.profile
+        FROM dataset_profiles p
+        JOIN uploaded_datasets d ON d.id = p.dataset_id
+        WHERE p.feature_name = ANY(%s)
+          AND (p.profile->>'version')::int = %s
+          AND (
+            p.dataset_id = %s
+            OR d.content_hash = (SELECT content_hash FROM uploaded_datasets WHERE id = %s)
+          )
+        ORDER BY p.feature_name, p.dataset_id = %s DESC
+        """,
+        (list(columns), PROFILE_VERSION, dataset_id, dataset_id, dataset_id)
+    )
+
+    return {feature_name: profile for feature_name, profile in cur.fetchall()}
+
+
+def save_reference_profiles(cur, dataset_id, profiles):
+    """Upsert profiles for a dataset, one row per column"""
+    if not profiles:
+        return
+
+    execute_values(
+        cur,
+        """
+        INSERT INTO dataset_profiles (dataset_id, feature_name, profile)
+        VALUES %s
+        ON CONFLICT (dataset_id, feature_name)
+        DO UPDATE SET profile = EXCLUDED.profile, created_at = CURRENT_TIMESTAMP
+        """,
+        [(dataset_id, feature_name, Json(profile)) for feature_name, profile in profiles.items()]
+    )
@@ -0,0 +1,198 @@
+import re
+import threading
+from datetime import datetime
+from config import Config
+from models import get_db
+from upload_sessions import expire_upload_sessions, remove_expired_session_files
+
+# Monthly range partitions of drift_logs on detected_at; rows outside every
+# monthly partition land in drift_logs_default so inserts never fail
+PARTITION_NAME = re.compile(r"^drift_logs_p(\d{4})(\d{2})$")
+
+# Lets exactly one process run maintenance at a time
+RETENTION_LOCK_ID = 7242001
+
+_stop = threading.Event()
+_thread = None
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"drift_logs_p{month.year:04d}{month.month:02d}"
+
+
+def existing_partitions(cur):
+    """Monthly drift_logs partitions as {month start: table name}"""
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('drift_logs')
+        """
+    )
+    partitions = {}
+    for (name,) in cur.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _create_partition(cur, month):
+    name = _partition_name(month)
+    start, end = month, _add_months(month, 1)
+
+    cur.execute(
+        "SELECT 1 FROM drift_logs_default WHERE detected_at >= %s AND detected_at < %s LIMIT 1",
+        (start, end)
+    )
+    if cur.fetchone() is None:
+        cur.execute(
+            f"CREATE TABLE {name} PARTITION OF drift_logs FOR VALUES FROM (%s) TO (%s)",
+            (start, end)
+        )
+        return
+
+    # Rows for this month already sit in the default partition; move them across
+    cur.execute("ALTER TABLE drift_logs DETACH PARTITION drift_logs_default")
+    cur.execute(
+        f"CREATE TABLE {name} PARTITION OF drift_logs FOR VALUES FROM (%s) TO (%s)",
+        (start, end)
+    )
+    cur.execute(
+        """
+        WITH moved AS (
+            DELETE FROM drift_logs_default WHERE detected_at >= %s AND detected_at < %s RETURNING *
+        )
+        INSERT INTO drift_logs SELECT * FROM moved
+        """,
+        (start, end)
+    )
+    cur.execute("ALTER TABLE drift_logs ATTACH PARTITION drift_logs_default DEFAULT")
+
+
+def ensure_drift_log_partitions(cur, since=None, months_ahead=None):
+    """Create monthly partitions from `since` (default: this month) through months_ahead"""
+    months_ahead = Config.DRIFT_LOG_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    now = _month_start(datetime.now())
+    month = _month_start(since) if since else now
+    last = _add_months(now, months_ahead)
+
+    existing = existing_partitions(cur)
+    created = []
+    while month <= last:
+        if month not in existing:
+            _create_partition(cur, month)
+            created.append(_partition_name(month))
+        month = _add_months(month, 1)
+    return created
+
+
+def drop_expired_drift_log_partitions(cur, retention_days=None):
+    """Drop whole monthly partitions older than the retention window.
+
+    Dropping a partition is a metadata operation, unlike a DELETE over the
+    same rows; only stragglers in the default partition are deleted row by row.
+    """
+    retention_days = Config.DRIFT_LOG_RETENTION_DAYS if retention_days is None else retention_days
+    if retention_days <= 0:
+        return []
+
+    cur.execute("SELECT NOW()::timestamp - make_interval(days => %s)", (retention_days,))
+    cutoff = cur.fetchone()[0]
+
+    dropped = []
+    for month, name in sorted(existing_partitions(cur).items()):
+        if _add_months(month, 1) <= cutoff:
+            cur.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+
+    cur.execute("DELETE FROM drift_logs_default WHERE detected_at < %s", (cutoff,))
+    return dropped
+
+
+def prune_drift_rollups(cur, retention_days=None):
+    """Delete rollup buckets that ended before the rollup retention window; returns the row count"""
+    retention_days = Config.DRIFT_ROLLUP_RETENTION_DAYS if retention_days is None else retention_days
+    if retention_days <= 0:
+        return 0
+
+    cur.execute(
+        """
+        DELETE FROM drift_rollups
+        WHERE bucket_start + CASE resolution WHEN 'hour' THEN interval '1 hour' ELSE interval '1 day' END
+              <= NOW()::timestamp - make_interval(days => %s)
+        """,
+        (retention_days,)
+    )
+    return cur.rowcount
+
+
+def run_retention():
+    """One maintenance pass: create upcoming partitions, drop expired ones and old rollups, expire idle uploads"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (RETENTION_LOCK_ID,))
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            return None
+
+        created = ensure_drift_log_partitions(cur)
+        dropped = drop_expired_drift_log_partitions(cur)
+        pruned_rollups = prune_drift_rollups(cur)
+        expired_uploads = expire_upload_sessions(cur)
+        conn.commit()
+
+        # Chunks go only once no request can still claim the session
+        remove_expired_session_files(expired_uploads)
+
+        if created or dropped:
+            print(f"🗂️ drift_logs partitions created: {created}, dropped: {dropped}")
+        if pruned_rollups:
+            print(f"🗂️ Pruned {pruned_rollups} expired drift rollups")
+        if expired_uploads:
+            print(f"🗂️ Expired {len(expired_uploads)} idle uploads")
+        return {"created": created, "dropped": dropped, "pruned_rollups": pruned_rollups,
+                "expired_uploads": expired_uploads}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _retention_loop():
+    while True:
+        try:
+            run_retention()
+        except Exception as e:
+            print(f"❌ Retention job failed: {e}")
+        if _stop.wait(Config.RETENTION_INTERVAL):
+            return
+
+
+def start_retention_worker():
+    """Run partition maintenance now and then every RETENTION_INTERVAL seconds"""
+    global _thread
+    if _thread is not None or Config.RETENTION_INTERVAL <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_retention_loop, name="retention", daemon=True)
+    _thread.start()
+
+
+def stop_retention_worker():
+    global _thread
+    _stop.set()
+    _thread = None
@@ -0,0 +1,252 @@
+from config import Config
+from dataset_store import COLUMNAR_EXTENSION, iter_dataset_chunks
+from drift_stats import calculate_statistics, kolmogorov_smirnov_test, population_stability_index
+from drift_engine import PSI_FLOOR, coerce_numeric, feature_result
+from errors import AnalysisError
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+feather = lazy_module("pyarrow.feather")
+stats = lazy_module("scipy.stats")
+
+
+class Reservoir:
+    """Fixed-size uniform sample of rows fed chunk by chunk (Algorithm R).
+
+    Row i (0-based, across all chunks) replaces a random slot with probability
+    size / (i + 1); a chunk's replacements are drawn at once and applied in row
+    order, so the result matches feeding rows one at a time. Values are kept
+    as float64: an integer column arrives as float once a chunk holds nulls.
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.seen = 0
+        self.columns = None
+
+    def update(self, arrays):
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in arrays.items()}
+        n = len(next(iter(arrays.values())))
+        if n == 0:
+            return
+
+        if self.columns is None:
+            self.columns = {name: values[:self.size].copy() for name, values in arrays.items()}
+            filled = min(n, self.size)
+        else:
+            filled = min(n, max(self.size - self.seen, 0))
+            if filled:
+                for name, values in arrays.items():
+                    self.columns[name] = np.concatenate([self.columns[name], values[:filled]])
+
+        if filled < n:
+            rows = np.arange(filled, n)
+            slots = self.rng.integers(0, self.seen + rows + 1)
+            taken = slots < self.size
+            rows, slots = rows[taken], slots[taken]
+
+            # A slot hit twice in one chunk keeps the later row
+            last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+            for name, values in arrays.items():
+                self.columns[name][slots[last]] = values[rows[last]]
+
+        self.seen += n
+
+
+def _chunk_arrays(chunk, columns):
+    """float64 array per column; missing and non-numeric values become NaN"""
+    chunk = coerce_numeric(chunk, columns)
+    return {c: chunk[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in columns}
+
+
+def _stratum_keys(series):
+    """Stratum label per row as a string Series; missing values form their own stratum"""
+    return series.astype(str)
+
+
+def reservoir_sample(path, columns, size, rng, chunk_size=None):
+    """Uniform sample of `size` rows (every row when there are fewer).
+
+    A columnar copy knows its row count, so the sample is drawn as row indices
+    and read with one take() from the memory-mapped file; other formats are
+    streamed through a Reservoir.
+    """
+    chunk_size = chunk_size or Config.DRIFT_CHUNK_SIZE
+
+    if path.lower().endswith(COLUMNAR_EXTENSION):
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        population = table.num_rows
+        if population > size:
+            table = table.take(np.sort(rng.choice(population, size, replace=False)))
+        return _chunk_arrays(table.to_pandas(), columns), population
+
+    reservoir = Reservoir(size, rng)
+    for chunk in iter_dataset_chunks(path, columns, chunk_size):
+        reservoir.update(_chunk_arrays(chunk, columns))
+    return reservoir.columns or {c: np.empty(0) for c in columns}, reservoir.seen
+
+
+def allocate_strata(population_by_stratum, size):
+    """Proportional allocation of `size` sample rows across strata (largest remainder, at least one each)"""
+    labels = list(population_by_stratum)
+    population = np.array([population_by_stratum[label] for label in labels], dtype=float)
+    quotas = size * population / population.sum()
+    allocation = np.maximum(np.floor(quotas).astype(int), 1)
+
+    for i in np.argsort(-(quotas - np.floor(quotas)), kind='stable'):
+        if allocation.sum() >= size:
+            break
+        allocation[i] += 1
+
+    allocation = np.minimum(allocation, population.astype(int))
+    return dict(zip(labels, allocation.tolist()))
+
+
+def stratified_sample(path, columns, stratify_by, size, rng, chunk_size=None):
+    """Proportionally allocated sample within each value of `stratify_by`.
+
+    One pass counts the strata, a second keeps a Reservoir per stratum. Returns
+    (sample arrays plus a '__stratum__' label array, population per stratum).
+    """
+    chunk_size = chunk_size or Config.DRIFT_CHUNK_SIZE
+
+    population_by_stratum = {}
+    for chunk in iter_dataset_chunks(path, [stratify_by], chunk_size):
+        for label, count in _stratum_keys(chunk[stratify_by]).value_counts(sort=False).items():
+            population_by_stratum[label] = population_by_stratum.get(label, 0) + int(count)
+            if len(population_by_stratum) > Config.MAX_SAMPLE_STRATA:
+                raise AnalysisError(
+                    f"stratify_by column '{stratify_by}' has more than {Config.MAX_SAMPLE_STRATA} distinct values"
+                )
+
+    if not population_by_stratum:
+        return {c: np.empty(0) for c in columns + ['__stratum__']}, {}
+    if len(population_by_stratum) > size:
+        raise AnalysisError(
+            f"sample_size {size} is smaller than the {len(population_by_stratum)} strata of '{stratify_by}'"
+        )
+
+    allocation = allocate_strata(population_by_stratum, size)
+    reservoirs = {label: Reservoir(allocation[label], rng) for label in population_by_stratum}
+
+    read_columns = list(dict.fromkeys(columns + [stratify_by]))
+    for chunk in iter_dataset_chunks(path, read_columns, chunk_size):
+        arrays = _chunk_arrays(chunk, columns)
+        keys = _stratum_keys(chunk[stratify_by]).to_numpy()
+        # Row positions of each stratum within the chunk
+        for label, rows in pd.Series(keys).groupby(keys, sort=False).indices.items():
+            reservoirs[label].update({c: values[rows] for c, values in arrays.items()})
+
+    sample = {c: [] for c in columns}
+    strata = []
+    for label, reservoir in reservoirs.items():
+        if reservoir.columns is None:
+            continue
+        for c in columns:
+            sample[c].append(reservoir.columns[c])
+        strata.append(np.full(len(reservoir.columns[columns[0]]), label, dtype=object))
+
+    sample = {c: np.concatenate(parts) for c, parts in sample.items()}
+    sample['__stratum__'] = np.concatenate(strata)
+    return sample, population_by_stratum
+
+
+def _psi_interval(profile, values, strata, psi, confidence, rng, rounds):
+    """Bootstrap interval for PSI, resampling each stratum's bin counts.
+
+    PSI estimated from a sample is biased upwards (sampling noise looks like
+    drift), so the basic bootstrap interval is used: it reflects the resampled
+    quantiles around the point estimate, cancelling the bias that percentile
+    intervals would inherit. Values outside the reference bin range count
+    towards the total but no bin, exactly as population_stability_index treats them.
+    """
+    bin_edges = np.asarray(profile['bin_edges'])
+    ref_dist = np.asarray(profile['bin_counts']) / profile['count']
+    ref_dist = np.where(ref_dist == 0, PSI_FLOOR, ref_dist)
+    bins = len(bin_edges) - 1
+
+    draws = np.zeros((rounds, bins + 1))
+    for label in np.unique(strata):
+        stratum_values = values[strata == label]
+        counts, _ = np.histogram(stratum_values, bins=bin_edges)
+        cells = np.append(counts, len(stratum_values) - counts.sum())
+        draws += rng.multinomial(len(stratum_values), cells / len(stratum_values), size=rounds)
+
+    curr_dist = draws[:, :bins] / len(values)
+    curr_dist = np.where(curr_dist == 0, PSI_FLOOR, curr_dist)
+    resampled = np.sum((curr_dist - ref_dist) * np.log(curr_dist / ref_dist), axis=1)
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(resampled, [alpha, 1 - alpha])
+    return [float(max(2 * psi - high, 0.0)), float(max(2 * psi - low, 0.0))]
+
+
+def _mean_interval(values, strata, population_by_stratum, confidence):
+    """Normal interval for the current mean with stratified, finite-population standard error"""
+    population = sum(population_by_stratum.values())
+    variance = 0.0
+    for label in np.unique(strata):
+        stratum_values = values[strata == label]
+        n, size = len(stratum_values), population_by_stratum[label]
+        if n < 2:
+            continue
+        weight = size / population
+        variance += weight ** 2 * np.var(stratum_values, ddof=1) / n * (1 - n / size)
+
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    half_width = z * np.sqrt(variance)
+    mean = float(np.mean(values))
+    return [mean - half_width, mean + half_width]
+
+
+def analyze_sample(profiles, sample, columns, population_by_stratum, confidence=0.95, rng=None, rounds=None):
+    """Drift estimated from a row sample, with confidence intervals.
+
+    Point estimates come from population_stability_index, calculate_statistics
+    and kolmogorov_smirnov_test on the sampled values. Stratified samples are
+    allocated proportionally, so they are treated as self-weighting; the
+    intervals still resample and weight per stratum.
+    """
+    rng = rng or np.random.default_rng()
+    rounds = rounds or Config.SAMPLE_BOOTSTRAP_ROUNDS
+    row_strata = sample.get('__stratum__')
+
+    results = []
+    for col in columns:
+        profile = profiles[col]
+        values = np.asarray(sample[col], dtype=float)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            continue
+        data = values[valid]
+        strata = row_strata[valid] if row_strata is not None else np.zeros(len(data), dtype=object)
+        population = population_by_stratum if row_strata is not None else {0: sum(population_by_stratum.values())}
+
+        psi_result = population_stability_index(profile, data)
+        ks_result = kolmogorov_smirnov_test(profile, data)
+        curr_stats = calculate_statistics(data)
+        if psi_result is None or ks_result is None or curr_stats is None:
+            continue
+
+        result = feature_result(
+            col, psi_result['psi_score'], ks_result['statistic'], ks_result['p_value'],
+            profile['stats'], curr_stats, 'exact', ks_result['error_bound']
+        )
+
+        mean_low, mean_high = _mean_interval(data, strata, population, confidence)
+        ref_mean = profile['stats']['mean']
+        mean_change_ci = None
+        if ref_mean != 0:
+            mean_change_ci = sorted([(mean_low - ref_mean) / ref_mean * 100, (mean_high - ref_mean) / ref_mean * 100])
+
+        result.update({
+            'sample_size': int(len(data)),
+            'psi_ci': _psi_interval(profile, data, strata, psi_result['psi_score'], confidence, rng, rounds),
+            'current_mean_ci': [float(mean_low), float(mean_high)],
+            'mean_change_ci': [float(v) for v in mean_change_ci] if mean_change_ci else None
+        })
+        results.append(result)
+
+    return results
@@ -0,0 +1,104 @@
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+
+def normalized_rank_error(k):
+    """Approximate rank error of a sketch with parameter k (KLL, 99% confidence)"""
+    return 2.296 / k ** 0.9723
+
+
+def sketch_k_for_error(error):
+    """Smallest sketch parameter k whose rank error is at most `error`"""
+    return max(8, int(np.ceil((2.296 / error) ** (1 / 0.9723))))
+
+
+def sample_rank_error(size):
+    """Rank error of `size` evenly spaced order statistics standing in for a column"""
+    return 1.0 / max(size - 1, 1)
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch over float values.
+
+    Level h holds items of weight 2**h. A level that grows past its capacity is
+    sorted and every other item (random offset) is promoted to the next level, so
+    memory stays O(k log(n/k)) however many values are added.
+    """
+
+    def __init__(self, k=512, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self):
+        """True while no value has been compacted away"""
+        return len(self.levels) == 1
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind so total weight is preserved exactly
+                keep = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(l), 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def sorted_values(self):
+        """Every value seen, sorted; only meaningful while the sketch is exact"""
+        return np.sort(self.levels[0])
+
+    def cdf(self, x):
+        """Estimated fraction of values <= x"""
+        items, cumulative = self._weighted_items()
+        index = np.searchsorted(items, np.asarray(x, dtype=float), side='right')
+        weight = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0)
+        return weight / max(self.count, 1)
+
+    def quantile(self, q):
+        """Estimated value at quantile q (scalar or array in [0, 1])"""
+        if self.is_exact:
+            return np.percentile(self.levels[0], np.asarray(q) * 100)
+        items, cumulative = self._weighted_items()
+        index = np.searchsorted(cumulative, np.asarray(q, dtype=float) * self.count, side='left')
+        return items[np.clip(index, 0, len(items) - 1)]
+
+    def rank_error(self):
+        return 0.0 if self.is_exact else normalized_rank_error(self.k)
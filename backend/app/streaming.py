@@ -0,0 +1,211 @@
+from config import Config
+from dataset_store import iter_dataset_chunks
+from drift_engine import coerce_numeric, feature_result, histogram_counts, psi_scores
+from reference_profile import PROFILE_VERSION
+from sketches import QuantileSketch, sample_rank_error, sketch_k_for_error
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+stats = lazy_module("scipy.stats")
+
+
+def _chunk_values(chunk, columns):
+    """(columns, rows) float array for a chunk, NaN for missing or non-numeric values"""
+    return np.ascontiguousarray(coerce_numeric(chunk, columns).to_numpy(dtype=float, na_value=np.nan).T)
+
+
+def histogram_edges(low, high, bins=10):
+    """Bin edges np.histogram(values, bins) would choose for values spanning [low, high]"""
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1, endpoint=True)
+
+
+class ColumnAccumulators:
+    """Mergeable running statistics for a set of columns fed chunk by chunk.
+
+    Tracks moments (Chan's parallel update), min/max, a quantile sketch per column
+    and, when reference bin edges are given, histogram counts against them.
+    """
+
+    def __init__(self, columns, bin_edges=None, sketch_k=None, seed_offset=0):
+        k = len(columns)
+        self.columns = list(columns)
+        self.count = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.bin_edges = bin_edges
+        self.hist = np.zeros((k, bin_edges.shape[1] - 1)) if bin_edges is not None else None
+        sketch_k = sketch_k or Config.SKETCH_K
+        self.sketches = [QuantileSketch(sketch_k, seed=seed_offset + j) for j in range(k)]
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta * delta * self.count * count / safe_total
+        self.count = total
+
+    def update(self, chunk):
+        values = _chunk_values(chunk, self.columns)
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=1)
+        if not count.any():
+            return
+
+        batch_mean = np.where(valid, values, 0).sum(axis=1) / np.maximum(count, 1)
+        deviation = np.where(valid, values - batch_mean[:, None], 0)
+        self._merge_moments(count, batch_mean, (deviation * deviation).sum(axis=1))
+
+        self.min = np.minimum(self.min, np.where(valid, values, np.inf).min(axis=1))
+        self.max = np.maximum(self.max, np.where(valid, values, -np.inf).max(axis=1))
+
+        if self.hist is not None:
+            self.hist += histogram_counts(values, valid, self.bin_edges)
+
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(values[j][valid[j]])
+
+    def merge(self, other):
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        if self.hist is not None:
+            self.hist += other.hist
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def summary(self, j):
+        """calculate_statistics-shaped summary for column j"""
+        q25, median, q75 = self.sketches[j].quantile([0.25, 0.5, 0.75])
+        return {
+            'mean': float(self.mean[j]),
+            'std': float(np.sqrt(self.m2[j] / self.count[j])),
+            'min': float(self.min[j]),
+            'max': float(self.max[j]),
+            'median': float(median),
+            'q25': float(q25),
+            'q75': float(q75)
+        }
+
+
+def sketch_ks_test(profile, sketch):
+    """KS statistic between a reference profile sample and a current-data sketch.
+
+    Also returns the error bound: the rank errors of the sample and of the sketch add up.
+    """
+    sample = np.asarray(profile['sample'])
+    points = np.concatenate([sample, np.concatenate(sketch.levels)])
+    cdf_ref = np.searchsorted(sample, points, side='right') / len(sample)
+    statistic = float(np.max(np.abs(cdf_ref - sketch.cdf(points))))
+
+    n1, n2 = profile['count'], sketch.count
+    p_value = float(stats.kstwo.sf(statistic, np.round(n1 * n2 / (n1 + n2))))
+    return statistic, p_value, profile['rank_error'] + sketch.rank_error()
+
+
+def build_profiles_streaming(path, columns, bins=10, chunk_size=None, sample_size=None):
+    """Reference profiles built in two bounded-memory passes over a dataset"""
+    chunk_size = chunk_size or Config.DRIFT_CHUNK_SIZE
+    sample_size = sample_size or Config.PROFILE_SAMPLE_SIZE
+
+    # Pass 1: moments, range and quantile sketch
+    first = ColumnAccumulators(columns)
+    for chunk in iter_dataset_chunks(path, columns, chunk_size):
+        first.update(chunk)
+
+    usable = [
+        j for j in range(len(columns))
+        if first.count[j] > 0 and np.isfinite(first.min[j]) and np.isfinite(first.max[j])
+    ]
+    if not usable:
+        return {}
+
+    # Pass 2: histogram against the edges np.histogram would have picked
+    names = [columns[j] for j in usable]
+    bin_edges = np.array([histogram_edges(first.min[j], first.max[j], bins) for j in usable])
+    bin_counts = np.zeros((len(usable), bins), dtype=np.int64)
+    for chunk in iter_dataset_chunks(path, names, chunk_size):
+        values = _chunk_values(chunk, names)
+        bin_counts += histogram_counts(values, ~np.isnan(values), bin_edges)
+
+    profiles = {}
+    for i, j in enumerate(usable):
+        sketch = first.sketches[j]
+        if sketch.is_exact:
+            sample = sketch.sorted_values()
+            sample_exact = len(sample) <= sample_size
+            if not sample_exact:
+                sample = sample[np.linspace(0, len(sample) - 1, sample_size).round().astype(int)]
+            rank_error = 0.0 if sample_exact else sample_rank_error(sample_size)
+        else:
+            sample = np.sort(sketch.quantile(np.linspace(0, 1, sample_size)))
+            sample_exact = False
+            rank_error = sketch.rank_error() + sample_rank_error(sample_size)
+
+        profiles[columns[j]] = {
+            'version': PROFILE_VERSION,
+            'count': int(first.count[j]),
+            'bin_edges': bin_edges[i].tolist(),
+            'bin_counts': bin_counts[i].tolist(),
+            'sample': sample.tolist(),
+            'sample_exact': bool(sample_exact),
+            'rank_error': float(rank_error),
+            'stats': first.summary(j)
+        }
+
+    return profiles
+
+
+def analyze_streaming(profiles, path, columns, chunk_size=None, total_rows=None, progress=None, ks_error=None,
+                      column_offset=0):
+    """Drift of a dataset read chunk by chunk against reference profiles.
+
+    Peak memory is bounded by the chunk size: PSI is exact, KS and the current
+    quantiles come from per-column sketches sized so their rank error stays
+    within `ks_error` (default KS_ERROR_BOUND). `column_offset` is the position
+    of `columns[0]` among all analyzed columns; sketches are seeded by position,
+    so a shard of the columns reproduces the unsharded results. Non-numeric
+    current values count as missing; columns with no numbers are skipped.
+    """
+    chunk_size = chunk_size or Config.DRIFT_CHUNK_SIZE
+    ks_error = ks_error or Config.KS_ERROR_BOUND
+    columns = [c for c in columns if c in profiles]
+    if not columns:
+        return []
+
+    column_profiles = [profiles[c] for c in columns]
+    accumulators = ColumnAccumulators(
+        columns, bin_edges=np.array([p['bin_edges'] for p in column_profiles], dtype=float),
+        sketch_k=sketch_k_for_error(ks_error), seed_offset=column_offset
+    )
+    rows_done = 0
+    for chunk in iter_dataset_chunks(path, columns, chunk_size):
+        accumulators.update(chunk)
+        rows_done += len(chunk)
+        if progress and total_rows:
+            progress(min(rows_done / total_rows, 1.0))
+
+    psi = psi_scores(
+        np.array([p['bin_counts'] for p in column_profiles], dtype=float),
+        np.array([p['count'] for p in column_profiles], dtype=float),
+        accumulators.hist,
+        np.maximum(accumulators.count, 1)
+    )
+
+    results = []
+    for j, col in enumerate(columns):
+        if accumulators.count[j] == 0:
+            continue
+        ks_statistic, ks_p_value, error = sketch_ks_test(column_profiles[j], accumulators.sketches[j])
+        results.append(feature_result(
+            col, psi[j], ks_statistic, ks_p_value,
+            column_profiles[j]['stats'], accumulators.summary(j),
+            'approximate', error
+        ))
+
+    return results
@@ -0,0 +1,318 @@
+"""Request and pipeline instrumentation, exposed as Prometheus text on /metrics.
+
+Every request is timed per route (the URL rule, so path parameters do not
+multiply series) and written to a structured JSON log line together with the
+stage breakdown of any analysis pipeline it ran. Pipelines mark their stages
+with `stage()`: DB lookups, file loads, feature computation, predictions and
+DB writes accumulate per run and are observed once when the run ends, so a
+chunked loop adds to one stage total rather than one sample per chunk.
+
+Metrics live in the serving process; with several gunicorn workers each one
+reports its own, so scrape the workers individually or aggregate across them.
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Blueprint, Response, g, has_request_context, request
+from config import Config
+
+telemetry_bp = Blueprint("telemetry", __name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Client-supplied X-Request-ID values are echoed into logs and profiles; others are replaced
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+log = logging.getLogger("mlobserve.telemetry")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets + (float("inf"),), series[:len(self.buckets)] + [series[-1]]):
+                    labels = _format_labels(self.labels, key, [("le", _format_value(float(bound)))])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class CollectedMetric:
+    """Gauge or counter read from existing stats when /metrics is scraped.
+
+    `collect()` returns [(label values, value)].
+    """
+
+    def __init__(self, name, documentation, kind, labels, collect):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            log.warning("metric %s failed to render: %s", metric.name, e)
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = register(Histogram(
+    "http_request_duration_seconds", "Request latency by blueprint route",
+    ("method", "blueprint", "route", "status")
+))
+STAGE_SECONDS = register(Histogram(
+    "analysis_stage_duration_seconds", "Time per analysis pipeline run spent in each stage",
+    ("pipeline", "stage"), STAGE_BUCKETS
+))
+PIPELINE_SECONDS = register(Histogram(
+    "analysis_pipeline_duration_seconds", "Total time per analysis pipeline run",
+    ("pipeline", "outcome"), STAGE_BUCKETS
+))
+CACHE_LOOKUPS = register(Counter(
+    "cache_lookups_total", "Lookups in the application's result and profile caches",
+    ("cache", "result")
+))
+PROCESS_START = time.time()
+register(CollectedMetric(
+    "process_start_time_seconds", "Start time of this serving process (Unix seconds)",
+    "gauge", (), lambda: [((), PROCESS_START)]
+))
+
+
+def register_stats(prefix, documentation, collect_stats, counters=(), gauges=()):
+    """Expose numeric fields of a stats() dict: `counters` as PREFIX_FIELD_total, `gauges` as PREFIX_FIELD.
+
+    A field that is missing or None (e.g. no pool open yet) is left out of the scrape.
+    """
+    def collect(field):
+        stats = collect_stats()
+        value = stats.get(field) if stats else None
+        return [] if value is None else [((), value)]
+
+    for kind, fields, suffix in (("counter", counters, "_total"), ("gauge", gauges, "")):
+        for field in fields:
+            register(CollectedMetric(
+                f"{prefix}_{field}{suffix}", f"{documentation}: {field}", kind, (),
+                lambda field=field: collect(field)
+            ))
+
+
+def count_cache(cache, hits, misses=0):
+    """Record cache lookups; `hits`/`misses` may be counts (e.g. columns served from stored profiles)"""
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
+
+
+# ======================
+# PIPELINE STAGES
+# ======================
+# (pipeline name, {stage: seconds}) of the run in progress in this thread/context
+_current_pipeline = ContextVar("current_pipeline", default=None)
+
+
+@contextmanager
+def pipeline(name):
+    """Time one analysis run; stages inside it accumulate into its breakdown"""
+    stages = {}
+    token = _current_pipeline.set((name, stages))
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield stages
+        outcome = "ok"
+    finally:
+        _current_pipeline.reset(token)
+        total = time.perf_counter() - start
+        PIPELINE_SECONDS.observe(total, pipeline=name, outcome=outcome)
+        for stage_name, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, pipeline=name, stage=stage_name)
+
+        record = {"pipeline": name, "outcome": outcome, "duration_ms": round(total * 1000, 2),
+                  "stages_ms": {s: round(v * 1000, 2) for s, v in stages.items()}}
+        if has_request_context():
+            g.setdefault("telemetry_pipelines", []).append(record)
+        else:
+            # Background jobs have no request line to attach to
+            log_event("pipeline", **record)
+
+
+@contextmanager
+def stage(name):
+    """Add the time spent in this block to the current pipeline's `name` stage"""
+    current = _current_pipeline.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if current is not None:
+            stages = current[1]
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed_iter(iterable, name):
+    """Yield from `iterable`, counting the time spent producing each item as stage `name`"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+# ======================
+# REQUESTS
+# ======================
+def log_event(event, **fields):
+    if Config.STRUCTURED_LOG:
+        log.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+
+def request_id():
+    """Id of the current request (from X-Request-ID or generated), None outside requests.
+
+    The client chooses X-Request-ID, so it is neither unique nor trusted.
+    """
+    return g.get("request_id") if has_request_context() else None
+
+
+def _before_request():
+    supplied = request.headers.get("X-Request-ID", "")
+    g.request_id = supplied if REQUEST_ID_PATTERN.match(supplied) else uuid.uuid4().hex
+    g.request_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop("request_start", None)
+    if start is None:
+        return response
+    duration = time.perf_counter() - start
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    blueprint = request.blueprint or "app"
+    REQUEST_SECONDS.observe(duration, method=request.method, blueprint=blueprint, route=route,
+                            status=str(response.status_code))
+    response.headers["X-Request-ID"] = g.request_id
+
+    if route != "/metrics":
+        fields = {"request_id": g.request_id, "method": request.method, "route": route,
+                  "status": response.status_code, "duration_ms": round(duration * 1000, 2)}
+        if "telemetry_pipelines" in g:
+            fields["pipelines"] = g.telemetry_pipelines
+        log_event("request", **fields)
+    return response
+
+
+def init_app(app):
+    """Time every request of `app` and configure the structured log (JSON lines on stderr)"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    if Config.STRUCTURED_LOG and not log.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+
+
+@telemetry_bp.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint; requires `Authorization: Bearer METRICS_TOKEN` when that is set"""
+    if Config.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {Config.METRICS_TOKEN}":
+        return Response("unauthorized\n", status=401, mimetype="text/plain")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -2,7 +2,11 @@ import os
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from psycopg2.extras import Json
 from models import get_db
+from dataset_store import convert_to_columnar, column_names
+from content_store import UploadTooLarge, store_stream, file_extension
+from config import Config
 
 upload_bp = Blueprint("upload", __name__)
 
@@ -15,11 +19,49 @@ os.makedirs(DATASET_DIR, exist_ok=True)
 
 ALLOWED_MODEL_EXTENSIONS = {'.pkl', '.h5', '.pt', '.pth', '.joblib'}
 ALLOWED_DATASET_EXTENSIONS = {'.csv', '.json', '.parquet'}
-MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_FILE_SIZE = Config.MAX_UPLOAD_SIZE  # single-request uploads; larger files go through /upload/sessions
+
+# Advisory lock namespace for stored content, keyed by hashtext(content_hash):
+# registrations hold it shared until they commit, discard_unreferenced() exclusively
+CONTENT_LOCK_ID = 7242002
+
+CONTENT_CONFLICT = "A concurrent upload of the same file failed; please retry"
+
 
 def allowed_file(filename, allowed_extensions):
     return any(filename.lower().endswith(ext) for ext in allowed_extensions)
 
+
+def _lock_content(cur, content_hash, shared=True):
+    lock = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    cur.execute(f"SELECT {lock}(%s, hashtext(%s))", (CONTENT_LOCK_ID, content_hash))
+
+
+def discard_unreferenced(table, content_hash, paths):
+    """Delete the stored files of a failed upload unless a registered row in `table` uses the same content.
+
+    Content-addressed files are shared, so a concurrent identical upload may
+    have registered them meanwhile; the exclusive content lock waits for any
+    registration in progress to commit first.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        _lock_content(cur, content_hash, shared=False)
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE content_hash = %s)", (content_hash,))
+        if not cur.fetchone()[0]:
+            for stale in paths:
+                if stale and os.path.exists(stale):
+                    os.remove(stale)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Could not clean up stored upload {content_hash}: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
 @upload_bp.route("/model", methods=["POST"])
 @jwt_required()
 def upload_model():
@@ -40,38 +82,74 @@ def upload_model():
     # Get user ID from JWT
     user_id = get_jwt_identity()
     
-    # Save file
-    path = os.path.join(MODEL_DIR, filename)
-    file.save(path)
+    # Stream to content-addressed storage, hashing as we write
+    try:
+        path, content_hash, size, created = store_stream(
+            file.stream, MODEL_DIR, file_extension(filename), max_size=MAX_FILE_SIZE
+        )
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+
+    body, status = register_model(user_id, filename, path, content_hash, size, created)
+    return jsonify(body), status
 
-    # Save to database
+
+def register_model(user_id, filename, path, content_hash, size, created):
+    """Record a stored model file, returning (response body, status)"""
     conn = get_db()
     cur = conn.cursor()
     try:
+        # A failed upload of the same content may have deleted the file before this lock was granted
+        _lock_content(cur, content_hash)
+        if not os.path.exists(path):
+            return {"error": CONTENT_CONFLICT}, 409
+
         cur.execute(
-            "INSERT INTO uploaded_models (filename, path, user_id) VALUES (%s, %s, %s) RETURNING id",
-            (filename, path, user_id)
+            """
+            INSERT INTO uploaded_models (filename, path, content_hash, user_id)
+            VALUES (%s, %s, %s, %s) RETURNING id
+            """,
+            (filename, path, content_hash, user_id)
         )
         model_id = cur.fetchone()[0]
         conn.commit()
         
-        return jsonify({
+        return {
             "success": True,
             "message": "Model uploaded successfully",
             "model_id": model_id,
-            "filename": filename
-        }), 201
+            "filename": filename,
+            "size": size
+        }, 201
         
     except Exception as e:
         conn.rollback()
-        # Delete the file if database insert fails
-        if os.path.exists(path):
-            os.remove(path)
-        return jsonify({"error": f"Database error: {str(e)}"}), 500
+        error = e
     finally:
         cur.close()
         conn.close()
 
+    # Delete the file if database insert fails, unless another upload registered it
+    if created:
+        discard_unreferenced("uploaded_models", content_hash, [path])
+    return {"error": f"Database error: {str(error)}"}, 500
+
+
+def _existing_columnar_copy(cur, content_hash):
+    """(columnar_path, schema) converted for an identical earlier upload, or None"""
+    cur.execute(
+        """
+        SELECT columnar_path, schema FROM uploaded_datasets
+        WHERE content_hash = %s AND columnar_path IS NOT NULL AND schema IS NOT NULL
+        LIMIT 1
+        """,
+        (content_hash,)
+    )
+    row = cur.fetchone()
+    if row and os.path.exists(row[0]):
+        return row
+    return None
+
 
 @upload_bp.route("/dataset", methods=["POST"])
 @jwt_required()
@@ -93,38 +171,76 @@ def upload_dataset():
     # Get user ID from JWT
     user_id = get_jwt_identity()
     
-    # Save file
-    path = os.path.join(DATASET_DIR, filename)
-    file.save(path)
+    # Stream to content-addressed storage, hashing as we write
+    try:
+        path, content_hash, size, created = store_stream(
+            file.stream, DATASET_DIR, file_extension(filename), max_size=MAX_FILE_SIZE
+        )
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+
+    body, status = register_dataset(user_id, filename, path, content_hash, size, created)
+    return jsonify(body), status
+
 
-    # Save to database
+def register_dataset(user_id, filename, path, content_hash, size, created):
+    """Convert and record a stored dataset file, returning (response body, status)"""
     conn = get_db()
     cur = conn.cursor()
+    columnar_path = None
     try:
+        # A failed upload of the same content may have deleted the file before this lock was granted
+        _lock_content(cur, content_hash)
+        if not os.path.exists(path):
+            return {"error": CONTENT_CONFLICT}, 409
+
+        # Identical content was converted before: reuse its columnar copy and schema
+        existing = _existing_columnar_copy(cur, content_hash)
+        if existing:
+            columnar_path, schema = existing
+        else:
+            # Convert once to a typed columnar copy so analyses never re-parse the raw file
+            try:
+                columnar_path, schema = convert_to_columnar(path)
+            except Exception as e:
+                conn.rollback()
+                if created:
+                    discard_unreferenced("uploaded_datasets", content_hash, [path])
+                return {"error": f"Could not parse dataset: {str(e)}"}, 400
+
+        # Save to database
         cur.execute(
-            "INSERT INTO uploaded_datasets (filename, path, user_id) VALUES (%s, %s, %s) RETURNING id",
-            (filename, path, user_id)
+            """
+            INSERT INTO uploaded_datasets (filename, path, columnar_path, schema, content_hash, user_id)
+            VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
+            """,
+            (filename, path, columnar_path, Json(schema), content_hash, user_id)
         )
         dataset_id = cur.fetchone()[0]
         conn.commit()
         
-        return jsonify({
+        return {
             "success": True,
             "message": "Dataset uploaded successfully",
             "dataset_id": dataset_id,
-            "filename": filename
-        }), 201
+            "filename": filename,
+            "num_rows": schema['num_rows'],
+            "columns": column_names(schema),
+            "size": size
+        }, 201
         
     except Exception as e:
         conn.rollback()
-        # Delete the file if database insert fails
-        if os.path.exists(path):
-            os.remove(path)
-        return jsonify({"error": f"Database error: {str(e)}"}), 500
+        error = e
     finally:
         cur.close()
         conn.close()
 
+    # Delete the files if database insert fails, unless another upload registered them
+    if created:
+        discard_unreferenced("uploaded_datasets", content_hash, [path, columnar_path])
+    return {"error": f"Database error: {str(error)}"}, 500
+
 
 @upload_bp.route("/models", methods=["GET"])
 @jwt_required()
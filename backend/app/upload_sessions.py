@@ -0,0 +1,469 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.utils import secure_filename
+from config import Config
+from content_store import UploadTooLarge, store_stream, file_extension
+from models import get_db
+from upload import (
+    ALLOWED_DATASET_EXTENSIONS, ALLOWED_MODEL_EXTENSIONS, BASE_DIR, DATASET_DIR, MODEL_DIR,
+    allowed_file, discard_unreferenced, register_dataset, register_model
+)
+
+upload_sessions_bp = Blueprint("upload_sessions", __name__)
+
+SESSION_DIR = os.path.join(BASE_DIR, "uploads/sessions")
+
+os.makedirs(SESSION_DIR, exist_ok=True)
+
+UPLOAD_KINDS = {
+    'model': (MODEL_DIR, ALLOWED_MODEL_EXTENSIONS, register_model, 'uploaded_models'),
+    'dataset': (DATASET_DIR, ALLOWED_DATASET_EXTENSIONS, register_dataset, 'uploaded_datasets'),
+}
+
+# Open uploads past expires_at read as 'expired' even before the retention sweep marks them
+SESSION_COLUMNS = (
+    "id, kind, filename, total_size, chunk_size, sha256, "
+    "CASE WHEN status IN ('open', 'assembling') AND expires_at <= NOW() THEN 'expired' ELSE status END"
+)
+CHUNK_PATTERN = re.compile(r"^(\d+)\.chunk$")
+
+
+def _session_dir(upload_id):
+    return os.path.join(SESSION_DIR, upload_id)
+
+
+def _remove_session_files(upload_id):
+    shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+
+
+def _chunk_path(upload_id, index):
+    return os.path.join(_session_dir(upload_id), f"{index}.chunk")
+
+
+def _chunk_count(total_size, chunk_size):
+    return max(1, -(-total_size // chunk_size))
+
+
+def _expected_chunk_length(session, index):
+    total_size, chunk_size = session['total_size'], session['chunk_size']
+    if index < _chunk_count(total_size, chunk_size) - 1:
+        return chunk_size
+    return total_size - chunk_size * index
+
+
+def _received_chunks(upload_id):
+    """Indexes of chunks fully written to disk; partial writes never get a chunk name"""
+    try:
+        names = os.listdir(_session_dir(upload_id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(CHUNK_PATTERN.match, names) if m)
+
+
+def _ranges(indexes):
+    """Collapse sorted chunk indexes into inclusive [start, end] ranges"""
+    ranges = []
+    for index in indexes:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ranges
+
+
+def _session_status(session):
+    total_chunks = _chunk_count(session['total_size'], session['chunk_size'])
+    received = _received_chunks(session['id'])
+    received_set = set(received)
+    return {
+        "upload_id": session['id'],
+        "kind": session['kind'],
+        "filename": session['filename'],
+        "status": session['status'],
+        "total_size": session['total_size'],
+        "chunk_size": session['chunk_size'],
+        "total_chunks": total_chunks,
+        "received_chunks": _ranges(received),
+        "received_bytes": sum(_expected_chunk_length(session, i) for i in received),
+        "missing_chunks": _ranges([i for i in range(total_chunks) if i not in received_set])
+    }
+
+
+def _load_session(cur, upload_id, user_id):
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        return None
+
+    cur.execute(
+        f"SELECT {SESSION_COLUMNS} FROM upload_sessions WHERE id = %s AND user_id = %s",
+        (upload_id, user_id)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+
+    upload_id, kind, filename, total_size, chunk_size, sha256, status = row
+    return {
+        'id': str(upload_id),
+        'kind': kind,
+        'filename': filename,
+        'total_size': total_size,
+        'chunk_size': chunk_size,
+        'sha256': sha256,
+        'status': status
+    }
+
+
+class _ChunkReader:
+    """File-like view over a session's chunk files in order, read one buffer at a time"""
+
+    def __init__(self, paths):
+        self._paths = iter(paths)
+        self._current = None
+
+    def read(self, size):
+        while True:
+            if self._current is None:
+                path = next(self._paths, None)
+                if path is None:
+                    return b''
+                self._current = open(path, 'rb')
+            data = self._current.read(size)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+
+
+@upload_sessions_bp.route("", methods=["POST"])
+@jwt_required()
+def create_session():
+    """Start a resumable upload of a model or dataset"""
+    user_id = get_jwt_identity()
+    data = request.json or {}
+
+    kind = data.get('kind')
+    filename = secure_filename(data.get('filename') or '')
+    total_size = data.get('size')
+    chunk_size = data.get('chunk_size') or Config.UPLOAD_CHUNK_SIZE
+    sha256 = (data.get('sha256') or '').lower() or None
+
+    if kind not in UPLOAD_KINDS:
+        return jsonify({"error": f"kind must be one of {sorted(UPLOAD_KINDS)}"}), 400
+    if not filename:
+        return jsonify({"error": "filename is required"}), 400
+
+    _, allowed_extensions, _, _ = UPLOAD_KINDS[kind]
+    if not allowed_file(filename, allowed_extensions):
+        return jsonify({"error": f"Only {allowed_extensions} files allowed"}), 400
+
+    if not isinstance(total_size, int) or total_size <= 0:
+        return jsonify({"error": "size must be a positive number of bytes"}), 400
+    if total_size > Config.MAX_CHUNKED_UPLOAD_SIZE:
+        return jsonify({"error": f"File exceeds the {Config.MAX_CHUNKED_UPLOAD_SIZE} byte upload limit"}), 413
+    if not isinstance(chunk_size, int) or not 0 < chunk_size <= Config.MAX_UPLOAD_CHUNK_SIZE:
+        return jsonify({"error": f"chunk_size must be between 1 and {Config.MAX_UPLOAD_CHUNK_SIZE} bytes"}), 400
+    if _chunk_count(total_size, chunk_size) > Config.MAX_UPLOAD_CHUNKS:
+        return jsonify({"error": f"Uploads are limited to {Config.MAX_UPLOAD_CHUNKS} chunks; use a larger chunk_size"}), 400
+    if sha256 is not None and not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        return jsonify({"error": "sha256 must be a hex SHA-256 digest"}), 400
+
+    upload_id = str(uuid.uuid4())
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        # Locking the user row serializes this user's concurrent creates, so the cap holds
+        cur.execute("SELECT id FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM upload_sessions
+            WHERE user_id = %s AND status IN ('open', 'assembling') AND expires_at > NOW()
+            """,
+            (user_id,)
+        )
+        if cur.fetchone()[0] >= Config.MAX_OPEN_UPLOAD_SESSIONS:
+            conn.rollback()
+            return jsonify({
+                "error": f"At most {Config.MAX_OPEN_UPLOAD_SESSIONS} uploads may be open at once; complete or abort one first"
+            }), 429
+
+        cur.execute(
+            """
+            INSERT INTO upload_sessions (id, user_id, kind, filename, total_size, chunk_size, sha256, expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW() + make_interval(secs => %s))
+            """,
+            (upload_id, user_id, kind, filename, total_size, chunk_size, sha256, Config.UPLOAD_SESSION_TTL)
+        )
+        conn.commit()
+        os.makedirs(_session_dir(upload_id), exist_ok=True)
+
+        session = {
+            'id': upload_id, 'kind': kind, 'filename': filename, 'total_size': total_size,
+            'chunk_size': chunk_size, 'sha256': sha256, 'status': 'open'
+        }
+        return jsonify({"success": True, **_session_status(session)}), 201
+
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
+@upload_sessions_bp.route("/<upload_id>", methods=["GET"])
+@jwt_required()
+def get_session(upload_id):
+    """Report which chunks of an upload have been received"""
+    user_id = get_jwt_identity()
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        session = _load_session(cur, upload_id, user_id)
+        if not session:
+            return jsonify({"error": "Upload not found"}), 404
+
+        return jsonify({"success": True, **_session_status(session)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
+@upload_sessions_bp.route("/<upload_id>/chunks/<int:index>", methods=["PUT"])
+@jwt_required()
+def put_chunk(upload_id, index):
+    """Store one chunk of an upload; chunks may arrive in any order and in parallel"""
+    user_id = get_jwt_identity()
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        session = _load_session(cur, upload_id, user_id)
+    finally:
+        cur.close()
+        conn.close()
+
+    if not session:
+        return jsonify({"error": "Upload not found"}), 404
+    if session['status'] != 'open':
+        return jsonify({"error": f"Upload is {session['status']}"}), 409
+
+    total_chunks = _chunk_count(session['total_size'], session['chunk_size'])
+    if index >= total_chunks:
+        return jsonify({"error": f"Chunk index must be below {total_chunks}"}), 400
+
+    expected_length = _expected_chunk_length(session, index)
+    expected_sha256 = (request.headers.get('X-Chunk-SHA256') or '').lower() or None
+    digest = hashlib.sha256()
+    length = 0
+
+    # Written under a temporary name so a dropped connection never leaves a partial chunk
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=_session_dir(upload_id), suffix='.part')
+    except FileNotFoundError:
+        # Completed, aborted or expired since the session was loaded
+        return jsonify({"error": "Upload is no longer open"}), 409
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                data = request.stream.read(1024 * 1024)
+                if not data:
+                    break
+                length += len(data)
+                if length > expected_length:
+                    break
+                digest.update(data)
+                out.write(data)
+
+        if length != expected_length:
+            return jsonify({"error": f"Chunk {index} must be exactly {expected_length} bytes"}), 400
+        if expected_sha256 and digest.hexdigest() != expected_sha256:
+            return jsonify({"error": f"Chunk {index} failed its SHA-256 check"}), 400
+
+        try:
+            os.replace(temp_path, _chunk_path(upload_id, index))
+        except FileNotFoundError:
+            return jsonify({"error": "Upload is no longer open"}), 409
+        _touch_session(upload_id)
+        return jsonify({"success": True, "upload_id": upload_id, "chunk": index, "size": length})
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+@upload_sessions_bp.route("/<upload_id>/complete", methods=["POST"])
+@jwt_required()
+def complete_session(upload_id):
+    """Assemble the chunks, verify the checksum and register the file"""
+    user_id = get_jwt_identity()
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        session = _load_session(cur, upload_id, user_id)
+        if not session:
+            return jsonify({"error": "Upload not found"}), 404
+        if session['status'] != 'open':
+            return jsonify({"error": f"Upload is {session['status']}"}), 409
+
+        total_chunks = _chunk_count(session['total_size'], session['chunk_size'])
+        missing = sorted(set(range(total_chunks)) - set(_received_chunks(upload_id)))
+        if missing:
+            return jsonify({
+                "error": "Upload is missing chunks",
+                "missing_chunks": _ranges(missing)
+            }), 409
+
+        # Claim the session so concurrent completes assemble it only once
+        cur.execute(
+            """
+            UPDATE upload_sessions
+            SET status = 'assembling', updated_at = NOW(), expires_at = NOW() + make_interval(secs => %s)
+            WHERE id = %s AND status = 'open' AND expires_at > NOW()
+            """,
+            (Config.UPLOAD_SESSION_TTL, upload_id)
+        )
+        conn.commit()
+        if cur.rowcount == 0:
+            return jsonify({"error": f"Upload is {session['status']}"}), 409
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    directory, _, register, table = UPLOAD_KINDS[session['kind']]
+    reader = _ChunkReader([_chunk_path(upload_id, i) for i in range(total_chunks)])
+    try:
+        path, content_hash, size, created = store_stream(
+            reader, directory, file_extension(session['filename']), max_size=session['total_size']
+        )
+    except UploadTooLarge as e:
+        _set_status(upload_id, 'open')
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        _set_status(upload_id, 'open')
+        return jsonify({"error": f"Could not assemble upload: {str(e)}"}), 500
+    finally:
+        reader.close()
+
+    if session['sha256'] and content_hash != session['sha256']:
+        if created:
+            discard_unreferenced(table, content_hash, [path])
+        _set_status(upload_id, 'open')
+        return jsonify({
+            "error": "Checksum mismatch",
+            "expected_sha256": session['sha256'],
+            "actual_sha256": content_hash
+        }), 422
+
+    body, status = register(user_id, session['filename'], path, content_hash, size, created)
+    if status >= 400:
+        _set_status(upload_id, 'open')
+        return jsonify(body), status
+
+    _set_status(upload_id, 'completed')
+    _remove_session_files(upload_id)
+    return jsonify({**body, "upload_id": upload_id}), status
+
+
+@upload_sessions_bp.route("/<upload_id>", methods=["DELETE"])
+@jwt_required()
+def abort_session(upload_id):
+    """Abandon an upload and discard its chunks"""
+    user_id = get_jwt_identity()
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        session = _load_session(cur, upload_id, user_id)
+        if not session:
+            return jsonify({"error": "Upload not found"}), 404
+
+        cur.execute(
+            "UPDATE upload_sessions SET status = 'aborted', updated_at = NOW() WHERE id = %s AND status = 'open'",
+            (upload_id,)
+        )
+        conn.commit()
+        if cur.rowcount == 0:
+            return jsonify({"error": f"Upload is {session['status']}"}), 409
+
+        _remove_session_files(upload_id)
+        return jsonify({"success": True, "upload_id": upload_id, "status": "aborted"})
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _touch_session(upload_id):
+    """Push back the expiry of an upload that is still receiving chunks"""
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE upload_sessions SET updated_at = NOW(), expires_at = NOW() + make_interval(secs => %s)
+            WHERE id = %s AND status = 'open'
+            """,
+            (Config.UPLOAD_SESSION_TTL, upload_id)
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Failed to extend upload {upload_id}: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def expire_upload_sessions(cur):
+    """Mark uploads idle past their expiry as expired; returns their ids so their chunks can be removed"""
+    cur.execute(
+        """
+        UPDATE upload_sessions SET status = 'expired', updated_at = NOW()
+        WHERE status IN ('open', 'assembling') AND expires_at <= NOW()
+        RETURNING id
+        """
+    )
+    return [str(row[0]) for row in cur.fetchall()]
+
+
+def remove_expired_session_files(upload_ids):
+    for upload_id in upload_ids:
+        _remove_session_files(upload_id)
+
+
+def _set_status(upload_id, status):
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE upload_sessions SET status = %s, updated_at = NOW() WHERE id = %s",
+            (status, upload_id)
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Failed to mark upload {upload_id} {status}: {e}")
+    finally:
+        cur.close()
+        conn.close()
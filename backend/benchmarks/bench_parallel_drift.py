@@ -0,0 +1,95 @@
+"""Benchmark column-sharded drift analysis against the single-process engine.
+
+Usage: python benchmarks/bench_parallel_drift.py [--rows N] [--columns 100,500,2000] [--workers 2,4,8]
+
+Each dataset is written as an uncompressed Arrow file, as uploads are, and both
+paths start from that file: the serial run reads every column and calls
+analyze_columns, the parallel run lets each worker memory-map its own shard.
+Worker pool start-up is excluded (one warm-up run per worker count).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from config import Config
+from dataset_store import read_dataset
+from drift_detection import build_reference_profile
+from drift_engine import analyze_columns
+from drift_parallel import analyze_parallel, shutdown_drift_executor
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", default="50,200,1000")
+    parser.add_argument("--workers", default=",".join(str(w) for w in (2, 4, 8, 16, 32) if w <= (os.cpu_count() or 1)) or "2")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_columns in [int(c) for c in args.columns.split(",")]:
+            columns = [f"feature_{i}" for i in range(n_columns)]
+            ref_df = pd.DataFrame(rng.normal(size=(args.rows, n_columns)), columns=columns)
+            profiles = {col: build_reference_profile(ref_df[col]) for col in columns}
+            ref_df = None
+
+            path = os.path.join(tmp, f"current_{n_columns}.arrow")
+            curr_df = pd.DataFrame(rng.normal(0.1, 1.1, size=(args.rows, n_columns)), columns=columns)
+            feather.write_feather(pa.Table.from_pandas(curr_df, preserve_index=False), path, compression="uncompressed")
+            curr_df = None
+
+            serial = analyze_columns(profiles, read_dataset(path, columns=columns), columns)
+            serial_seconds = best_of(
+                lambda: analyze_columns(profiles, read_dataset(path, columns=columns), columns), args.repeat
+            )
+
+            for workers in worker_counts:
+                Config.DRIFT_WORKERS = workers
+                shutdown_drift_executor()
+                # Warm-up: starts the pool and checks the results match
+                identical = analyze_parallel(profiles, path, columns) == serial
+                parallel_seconds = best_of(lambda: analyze_parallel(profiles, path, columns), args.repeat)
+
+                results.append({
+                    "rows": args.rows,
+                    "columns": n_columns,
+                    "workers": workers,
+                    "serial_seconds": round(serial_seconds, 6),
+                    "parallel_seconds": round(parallel_seconds, 6),
+                    "speedup": round(serial_seconds / parallel_seconds, 2),
+                    "identical": identical
+                })
+                print(f"{args.rows:>9} rows {n_columns:>6} cols {workers:>3} workers  serial {serial_seconds:8.3f}s  "
+                      f"parallel {parallel_seconds:8.3f}s  x{serial_seconds / parallel_seconds:.1f}"
+                      f"{'' if identical else '  RESULTS DIFFER'}", file=sys.stderr)
+
+    shutdown_drift_executor()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
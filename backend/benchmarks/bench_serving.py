@@ -0,0 +1,159 @@
+"""Load-test the development server against gunicorn.
+
+Usage: DATABASE_URL=... python benchmarks/bench_serving.py [--duration 10] [--concurrency 16] [--workers 4]
+
+Each server is started in turn from this checkout: `python app/main.py` with
+FLASK_DEBUG=true (what the container used to run) and `gunicorn -c
+gunicorn.conf.py`. Keep-alive clients then hit /health, /upload/models and
+/drift/summary for --duration seconds per endpoint. The database must already
+have the schema; a benchmark user is registered on first run.
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+ENDPOINTS = ["/health", "/upload/models", "/drift/summary"]
+EMAIL = "bench-serving@example.com"
+PASSWORD = "bench-serving-password"
+
+
+def request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json", **(headers or {})})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def wait_ready(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if request(port, "GET", "/health")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def auth_headers(port):
+    request(port, "POST", "/auth/register", {"email": EMAIL, "password": PASSWORD})
+    status, body = request(port, "POST", "/auth/login", {"email": EMAIL, "password": PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login failed: {status} {body[:200]!r}")
+    return {"Authorization": "Bearer " + json.loads(body)["access_token"]}
+
+
+def load(port, path, headers, duration, concurrency):
+    """Closed-loop load from `concurrency` keep-alive clients; returns latencies and error count"""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = time.monotonic() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[i] += 1
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            latencies[i].append(time.perf_counter() - start)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(t for per_client in latencies for t in per_client), sum(errors)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(q / 100 * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--servers", default="dev,gunicorn")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL must point at a database with the schema")
+
+    commands = {
+        "dev": [sys.executable, "app/main.py"],
+        "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+    }
+    env = {
+        **os.environ,
+        "WEB_BIND": f"127.0.0.1:{args.port}",
+        "WEB_WORKERS": str(args.workers),
+        "WEB_THREADS": str(args.threads),
+        "FLASK_DEBUG": "true",  # only read by the development server
+        "JWT_SECRET_KEY": os.getenv("JWT_SECRET_KEY", "bench-serving-secret"),
+    }
+
+    results = []
+    for server in args.servers.split(","):
+        process = subprocess.Popen(commands[server], cwd=BACKEND_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready(args.port, process)
+            headers = auth_headers(args.port)
+            for path in ENDPOINTS:
+                load(args.port, path, headers, min(args.duration, 1), args.concurrency)  # warm-up
+                latencies, errors = load(args.port, path, headers, args.duration, args.concurrency)
+                rps = len(latencies) / args.duration
+                results.append({
+                    "server": server,
+                    "workers": args.workers if server == "gunicorn" else 1,
+                    "endpoint": path,
+                    "concurrency": args.concurrency,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "requests_per_second": round(rps, 1),
+                    "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+                    "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None
+                })
+                print(f"{server:>9} {path:<15} {rps:9.1f} req/s  p50 {results[-1]['p50_ms']} ms  "
+                      f"p99 {results[-1]['p99_ms']} ms  errors {errors}", file=sys.stderr)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
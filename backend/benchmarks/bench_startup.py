@@ -0,0 +1,99 @@
+"""Measure backend cold start and report where import time goes.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--top 15]
+
+Each measurement runs in a fresh interpreter so nothing is cached in-process:
+  import_main      import main and build the app without starting services
+  warm_up          lazy_imports.warm_up() after that (what gunicorn's master adds)
+  first_analytics  first touch of the lazily imported stack from a request path
+The import-time report comes from `python -X importtime -c "import main"`:
+modules by cumulative microseconds, and which analytics packages were loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+HEAVY_PACKAGES = ("numpy", "pandas", "pyarrow", "scipy", "sklearn", "joblib")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+main.create_app(start=False)
+import_main = time.perf_counter() - start
+loaded = [name for name in %r if name in sys.modules]
+
+start = time.perf_counter()
+if %r == 'warm_up':
+    from lazy_imports import warm_up
+    warm_up()
+else:
+    from drift_engine import np, stats
+    stats.kstwo.sf(0.1, 100)
+second = time.perf_counter() - start
+print(json.dumps({'import_main': import_main, 'second': second, 'loaded': loaded}))
+"""
+
+
+def probe(stage):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_PACKAGES, stage)],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_report(top):
+    """[(module, cumulative_us)] for the slowest imports under `import main`"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative)))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    samples = {"import_main": [], "warm_up": [], "first_analytics": []}
+    loaded = set()
+    for _ in range(args.repeat):
+        warm = probe("warm_up")
+        samples["import_main"].append(warm["import_main"])
+        samples["warm_up"].append(warm["second"])
+        loaded.update(warm["loaded"])
+        samples["first_analytics"].append(probe("first_analytics")["second"])
+
+    result = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "seconds": {
+            stage: {"median": round(statistics.median(values), 4), "min": round(min(values), 4)}
+            for stage, values in samples.items()
+        },
+        "analytics_loaded_by_import_main": sorted(loaded),
+        "slowest_imports_us": import_report(args.top),
+    }
+
+    for stage, values in result["seconds"].items():
+        print(f"{stage:>16}  median {values['median']:.3f}s  min {values['min']:.3f}s", file=sys.stderr)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""Benchmark suite for the drift and model-evaluation hot paths.
+
+Usage: DATABASE_URL=... python benchmarks/bench_suite.py [--preset quick|default|full]
+           [--rows 1e3,1e6] [--columns 10,1000] [--dtypes float64,category] [--drift 0,0.1,1]
+           [--only micro|end_to_end] [--output results.json] [--compare baseline.json]
+
+Synthetic datasets are generated for every combination of rows, columns, dtype
+(float64, float32, int64, category) and drift magnitude: the current data's
+mean moves by `drift` standard deviations and its spread grows by drift / 2,
+categorical columns tilt their category frequencies by the same amount. The
+reference side always has drift 0. Every combination has its own seed, so a
+cell produces the same data whatever else is in the grid.
+
+  micro       population_stability_index, kolmogorov_smirnov_test and
+              calculate_statistics on one column, against raw reference values
+              and against a stored reference profile (numeric dtypes only)
+  end_to_end  POST /drift/analyze cold (reference profiles built) and warm
+              (profiles stored, refresh=true), and POST /model-drift/evaluate
+              with a logistic regression on the numeric features
+
+End-to-end datasets are written as Parquet row group by row group, so even
+1e8-row datasets are never held in memory, then registered through the upload
+path (columnar copy plus an uploaded_datasets row). The database must already
+have the schema; rows and columnar copies are removed afterwards.
+
+Times are the min and median of --repeat runs. Peak memory comes from one more
+run under tracemalloc (Python and numpy allocations; Arrow's own pool is not
+traced), alongside the process's max RSS. Combinations above --max-values
+cells are reported as skipped. JSON goes to stdout (or --output) and a table to
+stderr; --compare adds the time ratio against an earlier results file.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+# The request log would interleave with the table on stderr
+os.environ.setdefault("STRUCTURED_LOG", "false")
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from drift_detection import (
+    build_reference_profile,
+    calculate_statistics,
+    kolmogorov_smirnov_test,
+    population_stability_index,
+)
+
+PRESETS = {
+    "quick": {"rows": "1e3,1e4", "columns": "10,100", "dtypes": "float64,category", "drift": "0,1",
+              "repeat": 3, "max_values": 1e7},
+    "default": {"rows": "1e3,1e5,1e6", "columns": "10,100,1000", "dtypes": "float64,float32,int64,category",
+                "drift": "0,0.1,1", "repeat": 3, "max_values": 2e8},
+    "full": {"rows": "1e3,1e4,1e5,1e6,1e7,1e8", "columns": "10,100,1000,5000",
+             "dtypes": "float64,float32,int64,category", "drift": "0,0.1,1", "repeat": 3, "max_values": 2e9},
+}
+DTYPES = ("float64", "float32", "int64", "category")
+NUMERIC_DTYPES = ("float64", "float32", "int64")
+
+CATEGORIES = [f"c{i:02d}" for i in range(50)]
+CHUNK_VALUES = 5_000_000  # values generated and written per Parquet row group
+TRAIN_ROWS = 10_000  # reference rows the evaluation model is fitted on
+INFORMATIVE_FEATURES = 8  # features the synthetic target depends on
+
+BENCH_EMAIL = "bench-suite@example.com"
+BENCH_PASSWORD = "bench-suite-password"
+
+
+# ======================
+# SYNTHETIC DATA
+# ======================
+def cell_rng(seed, *key):
+    """Generator seeded by the cell itself, independent of the rest of the grid"""
+    material = json.dumps([seed, *key]).encode()
+    return np.random.default_rng(int.from_bytes(hashlib.sha256(material).digest()[:8], "little"))
+
+
+def synthetic_values(rng, rows, columns, dtype, drift):
+    """(rows, columns) values of `dtype`: standard normal shifted by `drift`, or category codes"""
+    if dtype == "category":
+        tilt = np.exp(drift * np.linspace(-1, 1, len(CATEGORIES)))
+        return rng.choice(len(CATEGORIES), size=(rows, columns), p=tilt / tilt.sum()).astype(np.int8)
+    values = rng.standard_normal((rows, columns)) * (1 + drift / 2) + drift
+    if dtype == "int64":
+        return np.round(values * 100).astype(np.int64)
+    return values.astype(dtype)
+
+
+def synthetic_target(rng, values, weights):
+    """Binary target from the first informative features plus noise"""
+    informative = values[:, :len(weights)].astype(float)
+    if values.dtype == np.int64:
+        informative /= 100
+    return (informative @ weights + rng.normal(0, 0.5, len(values)) > 0).astype(np.int64)
+
+
+def synthetic_frame(values, dtype, names, target=None):
+    if dtype == "category":
+        data = {name: pd.Categorical.from_codes(values[:, i], CATEGORIES) for i, name in enumerate(names)}
+    else:
+        data = {name: values[:, i] for i, name in enumerate(names)}
+    frame = pd.DataFrame(data)
+    if target is not None:
+        frame["target"] = target
+    return frame
+
+
+def write_dataset(path, rng, rows, columns, dtype, drift, weights):
+    """Write a synthetic dataset to Parquet chunk by chunk; numeric datasets get a `target` column"""
+    names = [f"feature_{i}" for i in range(columns)]
+    chunk_rows = max(1, min(rows, CHUNK_VALUES // columns))
+    writer = None
+    try:
+        for offset in range(0, rows, chunk_rows):
+            values = synthetic_values(rng, min(chunk_rows, rows - offset), columns, dtype, drift)
+            target = synthetic_target(rng, values, weights) if dtype != "category" else None
+            table = pa.Table.from_pandas(synthetic_frame(values, dtype, names, target), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return names
+
+
+# ======================
+# MEASUREMENT
+# ======================
+def max_rss_bytes():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def measure(fn, repeat, setup=None):
+    """Time `repeat` runs of fn, then one more under tracemalloc for peak memory"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        outcome = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return outcome, {
+        "seconds_min": round(min(timings), 6),
+        "seconds_median": round(statistics.median(timings), 6),
+        "repeat": repeat,
+        "peak_traced_bytes": int(peak),
+        "max_rss_bytes": int(max_rss_bytes()),
+    }
+
+
+def record(results, benchmark, cell, outcome=None, skipped=None, **fields):
+    entry = {"benchmark": benchmark, **cell, **fields}
+    if skipped:
+        entry["skipped"] = skipped
+    elif outcome is not None:
+        entry.update(outcome)
+    results.append(entry)
+
+    label = " ".join(f"{key}={value}" for key, value in {**cell, **fields}.items())
+    if skipped:
+        print(f"{benchmark:<32} {label:<60} skipped: {skipped}", file=sys.stderr)
+    else:
+        print(f"{benchmark:<32} {label:<60} {outcome['seconds_min']:10.4f}s "
+              f"{outcome['peak_traced_bytes'] / 2 ** 20:9.1f} MiB", file=sys.stderr)
+
+
+# ======================
+# MICRO BENCHMARKS
+# ======================
+def run_micro(args, results):
+    for rows in args.rows:
+        for dtype in args.dtypes:
+            for drift in args.drift:
+                cell = {"rows": rows, "columns": 1, "dtype": dtype, "drift": drift}
+                functions = ("population_stability_index", "kolmogorov_smirnov_test", "calculate_statistics")
+                if dtype not in NUMERIC_DTYPES:
+                    for name in functions:
+                        record(results, name, cell, skipped="numeric dtypes only")
+                    continue
+                if rows > args.max_values:
+                    for name in functions:
+                        record(results, name, cell, skipped="rows exceed --max-values")
+                    continue
+
+                rng = cell_rng(args.seed, "micro", rows, dtype, drift)
+                reference = synthetic_values(rng, rows, 1, dtype, 0)[:, 0]
+                current = synthetic_values(rng, rows, 1, dtype, drift)[:, 0]
+                profile = build_reference_profile(reference)
+
+                for variant, ref in (("raw", reference), ("profile", profile)):
+                    _, outcome = measure(lambda: population_stability_index(ref, current), args.repeat)
+                    record(results, "population_stability_index", cell, outcome, reference=variant)
+                    _, outcome = measure(lambda: kolmogorov_smirnov_test(ref, current), args.repeat)
+                    record(results, "kolmogorov_smirnov_test", cell, outcome, reference=variant)
+                _, outcome = measure(lambda: calculate_statistics(current), args.repeat)
+                record(results, "calculate_statistics", cell, outcome)
+
+
+# ======================
+# END TO END
+# ======================
+class Backend:
+    """The Flask app in-process, with a benchmark user and its registered uploads"""
+
+    def __init__(self):
+        import main
+        from models import init_pool
+
+        init_pool()
+        self.main = main
+        self.client = main.create_app(start=False).test_client()
+        self.client.post("/auth/register", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        self.login()
+        self.user_id = self._scalar("SELECT id FROM users WHERE email = %s", (BENCH_EMAIL,))
+        self.dataset_ids = []
+        self.model_ids = []
+
+    def login(self):
+        """Fresh access token; a full grid runs for longer than one token lives"""
+        response = self.client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        if response.status_code != 200:
+            raise RuntimeError(f"login failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        self.headers = {"Authorization": "Bearer " + response.get_json()["access_token"]}
+
+    def _execute(self, query, params):
+        from models import get_db
+
+        conn = get_db()
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            rows = cur.fetchall() if cur.description else None
+            conn.commit()
+            return rows
+        finally:
+            cur.close()
+            conn.close()
+
+    def _scalar(self, query, params):
+        return self._execute(query, params)[0][0]
+
+    def register_dataset(self, path):
+        from upload import register_dataset
+
+        body, status = register_dataset(
+            self.user_id, os.path.basename(path), path, file_sha256(path), os.path.getsize(path), False
+        )
+        if status not in (200, 201):
+            raise RuntimeError(f"dataset registration failed: {body}")
+        self.dataset_ids.append(body["dataset_id"])
+        return body["dataset_id"]
+
+    def register_model(self, path):
+        from upload import register_model
+
+        body, status = register_model(
+            self.user_id, os.path.basename(path), path, file_sha256(path), os.path.getsize(path), False
+        )
+        if status not in (200, 201):
+            raise RuntimeError(f"model registration failed: {body}")
+        self.model_ids.append(body["model_id"])
+        return body["model_id"]
+
+    def drop_reference_profiles(self, dataset_id):
+        self._execute("DELETE FROM dataset_profiles WHERE dataset_id = %s", (dataset_id,))
+
+    def post(self, path, body):
+        response = self.client.post(path, json=body, headers=self.headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} failed: {response.status_code} {response.get_data(as_text=True)[:300]}")
+        return response.get_json()
+
+    def cleanup(self):
+        """Remove this run's uploads, their columnar copies and everything hanging off them"""
+        if self.dataset_ids:
+            rows = self._execute(
+                "DELETE FROM uploaded_datasets WHERE id = ANY(%s) RETURNING columnar_path", (self.dataset_ids,)
+            )
+            for (columnar_path,) in rows:
+                if columnar_path and os.path.exists(columnar_path):
+                    os.remove(columnar_path)
+        if self.model_ids:
+            self._execute("DELETE FROM uploaded_models WHERE id = ANY(%s)", (self.model_ids,))
+        self._execute("DELETE FROM model_metrics WHERE user_id = %s", (self.user_id,))
+        self.dataset_ids, self.model_ids = [], []
+
+    def close(self):
+        self.cleanup()
+        self.main.stop_services()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def train_model(path, rng, columns, dtype, weights):
+    from sklearn.linear_model import LogisticRegression
+
+    names = [f"feature_{i}" for i in range(columns)]
+    values = synthetic_values(rng, TRAIN_ROWS, columns, dtype, 0)
+    model = LogisticRegression(max_iter=200)
+    model.fit(synthetic_frame(values, dtype, names), synthetic_target(rng, values, weights))
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+
+def run_end_to_end(args, results, backend):
+    for rows in args.rows:
+        for columns in args.columns:
+            for dtype in args.dtypes:
+                for drift in args.drift:
+                    cell = {"rows": rows, "columns": columns, "dtype": dtype, "drift": drift}
+                    if rows * columns > args.max_values:
+                        for name in ("analyze_drift", "evaluate_model"):
+                            record(results, name, cell, skipped="rows x columns exceed --max-values")
+                        continue
+                    with tempfile.TemporaryDirectory(dir=args.data_dir) as tmp:
+                        try:
+                            run_end_to_end_cell(args, results, backend, cell, tmp)
+                        finally:
+                            backend.cleanup()
+
+
+def run_end_to_end_cell(args, results, backend, cell, tmp):
+    rows, columns, dtype, drift = cell["rows"], cell["columns"], cell["dtype"], cell["drift"]
+    backend.login()
+    rng = cell_rng(args.seed, "end_to_end", rows, columns, dtype, drift)
+    weights = rng.normal(size=min(INFORMATIVE_FEATURES, columns))
+
+    generate_start = time.perf_counter()
+    reference_path = os.path.join(tmp, "reference.parquet")
+    current_path = os.path.join(tmp, "current.parquet")
+    write_dataset(reference_path, rng, rows, columns, dtype, 0, weights)
+    write_dataset(current_path, rng, rows, columns, dtype, drift, weights)
+    reference_id = backend.register_dataset(reference_path)
+    current_id = backend.register_dataset(current_path)
+    print(f"generated and registered {rows} x {columns} {dtype} in {time.perf_counter() - generate_start:.1f}s",
+          file=sys.stderr)
+
+    body = {"reference_dataset_id": reference_id, "current_dataset_id": current_id, "refresh": True}
+    analysis, outcome = measure(
+        lambda: backend.post("/drift/analyze", body), args.repeat,
+        setup=lambda: backend.drop_reference_profiles(reference_id)
+    )
+    record(results, "analyze_drift", cell, outcome, profiles="cold",
+           features_with_drift=analysis["features_with_drift"], streaming=analysis["streaming"])
+    analysis, outcome = measure(lambda: backend.post("/drift/analyze", body), args.repeat)
+    record(results, "analyze_drift", cell, outcome, profiles="warm",
+           features_with_drift=analysis["features_with_drift"], streaming=analysis["streaming"])
+
+    if dtype not in NUMERIC_DTYPES:
+        record(results, "evaluate_model", cell, skipped="numeric dtypes only")
+        return
+    model_path = os.path.join(tmp, "model.pkl")
+    train_model(model_path, rng, columns, dtype, weights)
+    model_id = backend.register_model(model_path)
+    body = {"model_id": model_id, "dataset_id": current_id, "target_column": "target"}
+    evaluation, outcome = measure(lambda: backend.post("/model-drift/evaluate", body), args.repeat)
+    record(results, "evaluate_model", cell, outcome, accuracy=round(evaluation["metrics"]["accuracy"], 4))
+
+
+# ======================
+# OUTPUT
+# ======================
+def result_key(entry):
+    return tuple(sorted((k, v) for k, v in entry.items() if k in (
+        "benchmark", "rows", "columns", "dtype", "drift", "reference", "profiles"
+    )))
+
+
+def compare(results, baseline_path):
+    """Add baseline_seconds_min and ratio (this run / baseline) to entries present in both runs"""
+    with open(baseline_path) as f:
+        baseline = {result_key(entry): entry for entry in json.load(f)["results"] if "seconds_min" in entry}
+    for entry in results:
+        before = baseline.get(result_key(entry))
+        if before is None or "seconds_min" not in entry:
+            continue
+        entry["baseline_seconds_min"] = before["seconds_min"]
+        entry["ratio"] = round(entry["seconds_min"] / before["seconds_min"], 3) if before["seconds_min"] else None
+        if entry["ratio"] is not None:
+            label = " ".join(f"{k}={v}" for k, v in result_key(entry) if k != "benchmark")
+            print(f"{entry['benchmark']:<32} {label:<60} x{entry['ratio']:.2f} vs baseline", file=sys.stderr)
+
+
+def environment():
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=APP_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import scipy
+    import sklearn
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pd.__version__, "pyarrow": pa.__version__,
+                     "scipy": scipy.__version__, "scikit-learn": sklearn.__version__},
+    }
+
+
+def parse_list(text, cast):
+    return [cast(float(item)) if cast is int else cast(item) for item in text.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    parser.add_argument("--rows", help="comma-separated row counts, e.g. 1e3,1e6")
+    parser.add_argument("--columns", help="comma-separated feature counts")
+    parser.add_argument("--dtypes", help=f"comma-separated, from {','.join(DTYPES)}")
+    parser.add_argument("--drift", help="comma-separated drift magnitudes (standard deviations)")
+    parser.add_argument("--repeat", type=int)
+    parser.add_argument("--max-values", type=float, help="skip datasets with more rows x columns than this")
+    parser.add_argument("--only", choices=("micro", "end_to_end"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="where end-to-end datasets are generated (default: system temp)")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier results file to compute time ratios against")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    args.rows = parse_list(args.rows or preset["rows"], int)
+    args.columns = parse_list(args.columns or preset["columns"], int)
+    args.dtypes = parse_list(args.dtypes or preset["dtypes"], str)
+    args.drift = parse_list(args.drift or preset["drift"], float)
+    args.repeat = args.repeat or preset["repeat"]
+    args.max_values = args.max_values or preset["max_values"]
+    unknown = set(args.dtypes) - set(DTYPES)
+    if unknown:
+        parser.error(f"unknown dtypes: {', '.join(sorted(unknown))}")
+    if args.only != "micro" and not os.getenv("DATABASE_URL"):
+        parser.error("end-to-end benchmarks need DATABASE_URL (or pass --only micro)")
+
+    results = []
+    # Connection setup and error paths still print(); keep stdout for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.only != "end_to_end":
+            run_micro(args, results)
+        if args.only != "micro":
+            backend = Backend()
+            try:
+                run_end_to_end(args, results, backend)
+            finally:
+                backend.close()
+        if args.compare:
+            compare(results, args.compare)
+
+    report = {
+        "suite": "drift_hot_paths",
+        "environment": environment(),
+        "parameters": {key: getattr(args, key) for key in (
+            "preset", "rows", "columns", "dtypes", "drift", "repeat", "max_values", "seed", "only"
+        )},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Production server: gunicorn -c gunicorn.conf.py (from the backend directory)
+
+The app is imported once in the master (preload_app). It imports the
+analytics stack lazily; with WARM_UP_IMPORTS the master imports pandas, scipy
+and scikit-learn up front (on_starting), so they are loaded before forking and
+their pages are shared by all workers. Connections and threads are not: each
+worker opens its DB pool and starts its background workers in post_fork, and
+shuts them down in worker_exit.
+
+Everything per worker is multiplied by WEB_WORKERS:
+
+- DB connections: WEB_WORKERS x DB_POOL_MAX_SIZE. This must stay below the
+  server's max_connections (100 on a stock Postgres). DB_POOL_MAX_SIZE
+  defaults to DB_MAX_CONNECTIONS // WEB_WORKERS, capped at 20.
+- Analysis processes: WEB_WORKERS x (DRIFT_WORKERS + COMPARE_WORKERS), each
+  pool started on first use. DRIFT_WORKERS defaults to cpu_count // WEB_WORKERS
+  so concurrent sharded analyses across workers do not oversubscribe the CPUs.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+sys.path.insert(0, APP_DIR)
+
+from config import Config
+
+wsgi_app = "main:create_app(start=False)"
+pythonpath = APP_DIR
+preload_app = True
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+# Threads keep a worker responsive while one request waits on the DB or a long analysis
+worker_class = "gthread"
+threads = Config.WEB_THREADS
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = max(Config.WEB_MAX_REQUESTS // 10, 0)
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    connections = Config.WEB_WORKERS * Config.DB_POOL_MAX_SIZE
+    if connections > Config.DB_MAX_CONNECTIONS:
+        server.log.warning(
+            "%d workers x DB_POOL_MAX_SIZE %d = %d connections, above DB_MAX_CONNECTIONS %d",
+            Config.WEB_WORKERS, Config.DB_POOL_MAX_SIZE, connections, Config.DB_MAX_CONNECTIONS
+        )
+    if Config.WARM_UP_IMPORTS:
+        from lazy_imports import warm_up
+        timings = warm_up()
+        server.log.info("Warmed up analytics imports in %.2fs", sum(timings.values()))
+
+
+def post_fork(server, worker):
+    from main import start_services
+    start_services()
+
+
+def worker_exit(server, worker):
+    from main import stop_services
+    stop_services()
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def rng():
+    import numpy as np
+    return np.random.default_rng(0)
+
+
+@pytest.fixture(scope="session")
+def db():
+    """Migrated database at DATABASE_URL; tests using it are skipped when it is unset"""
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+
+    from migrations import apply_migrations
+    from models import close_pool, init_pool
+
+    init_pool(retries=1)
+    apply_migrations()
+    yield
+    close_pool()
+
+
+@pytest.fixture
+def user(db):
+    """Id of a throwaway user; rows owned by it are removed with it"""
+    import uuid
+    from models import get_db
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "INSERT INTO users (email, password) VALUES (%s, 'x') RETURNING id",
+            (f"test-{uuid.uuid4().hex}@example.com",)
+        )
+        user_id = cur.fetchone()[0]
+        conn.commit()
+        yield user_id
+        cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,92 @@
+import uuid
+
+from analysis_runs import analysis_cache_key, dataset_fingerprint, find_analysis_run, save_analysis_run
+from config import Config
+from models import get_db
+
+# Shaped like the options run_drift_analysis folds into the key
+PARAMS = {
+    'streaming': False,
+    'chunk_size': None,
+    'ks_method': 'exact',
+    'ks_error_bound': None,
+    'sampling': None,
+}
+
+
+def key(params=PARAMS, datasets=(1, 2), fingerprints=("ref-hash", "curr-hash")):
+    return analysis_cache_key(*datasets, *fingerprints, params)[0]
+
+
+def test_identical_requests_share_a_key():
+    assert key() == key(dict(PARAMS))
+    assert key() == key(dict(reversed(list(PARAMS.items()))))
+
+
+def test_result_affecting_options_change_the_key():
+    streaming = {'streaming': True, 'chunk_size': 100000, 'ks_method': 'approximate', 'ks_error_bound': 0.005}
+    sampling = {'mode': 'reservoir', 'sample_size': 10000, 'seed': 0}
+    variants = [
+        PARAMS,
+        {**PARAMS, **streaming},
+        {**PARAMS, **streaming, 'chunk_size': 50000},
+        {**PARAMS, **streaming, 'ks_error_bound': 0.01},
+        {**PARAMS, 'sampling': sampling},
+        {**PARAMS, 'sampling': {**sampling, 'seed': 1}},
+        {**PARAMS, 'sampling': {**sampling, 'sample_size': 5000}},
+        {**PARAMS, 'sampling': {**sampling, 'mode': 'stratified', 'stratify_by': 'group'}},
+    ]
+
+    assert len({key(params) for params in variants}) == len(variants)
+
+
+def test_datasets_and_their_content_change_the_key():
+    assert key(datasets=(1, 3)) != key()
+    assert key(datasets=(2, 1)) != key()
+    assert key(fingerprints=("ref-hash", "other-hash")) != key()
+
+
+def test_profile_settings_change_the_key(monkeypatch):
+    before = key()
+    monkeypatch.setattr(Config, "PROFILE_SAMPLE_SIZE", Config.PROFILE_SAMPLE_SIZE + 1)
+    assert key() != before
+
+
+def test_legacy_fingerprint_follows_the_file(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a\n1\n")
+    before = dataset_fingerprint(None, str(path))
+
+    path.write_text("a\n1\n2\n")
+
+    assert dataset_fingerprint(None, str(path)) != before
+    assert dataset_fingerprint("sha", str(path)) == "sha"
+
+
+def test_stored_run_is_found_by_key(user):
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        dataset_ids = []
+        for name in ("ref.csv", "curr.csv"):
+            cur.execute(
+                "INSERT INTO uploaded_datasets (filename, path, user_id) VALUES (%s, %s, %s) RETURNING id",
+                (name, f"/nonexistent/{name}", user)
+            )
+            dataset_ids.append(cur.fetchone()[0])
+        cache_key, method = analysis_cache_key(*dataset_ids, "a", "b", PARAMS)
+
+        assert find_analysis_run(cur, user, cache_key) is None
+        save_analysis_run(cur, str(uuid.uuid4()), user, *dataset_ids, cache_key, method, {"run": 1, "nan": float("nan")})
+        assert find_analysis_run(cur, user, cache_key) == {"run": 1, "nan": None}
+
+        # A recomputed run replaces the stored one
+        save_analysis_run(cur, str(uuid.uuid4()), user, *dataset_ids, cache_key, method, {"run": 2})
+        assert find_analysis_run(cur, user, cache_key) == {"run": 2}
+        assert find_analysis_run(cur, user, key()) is None
+        cur.execute("SELECT COUNT(*), MAX(hit_count) FROM analysis_runs WHERE user_id = %s", (user,))
+        assert cur.fetchone() == (1, 1)
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
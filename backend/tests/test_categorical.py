@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from categorical import CategoryCounter, dictionary_encode
+
+
+def test_dictionary_encode_merges_equal_text_and_drops_blanks():
+    codes, uniques = dictionary_encode(pd.Series([1, "1", "a", "", None, np.nan, "a"], dtype=object))
+
+    assert list(uniques) == ["1", "a", ""]
+    assert codes.tolist() == [0, 0, 1, -1, -1, -1, 1]
+
+
+def test_counter_is_exact_below_capacity():
+    counter = CategoryCounter(capacity=10)
+    counter.update(pd.Series(["a", "b", "a", None]))
+    counter.update(pd.Series(["c", "a", "", "b"]))
+
+    profile = counter.profile(max_categories=2)
+
+    assert profile["count"] == 6
+    assert profile["categories"] == ["a", "b"]
+    assert profile["category_counts"] == [3, 2]
+    assert profile["other_count"] == 1
+    assert profile["categories_tracked"] == 3
+    assert not profile["exact"]
+    assert counter.profile(max_categories=3)["exact"]
+
+
+def test_counter_prunes_rare_categories_and_keeps_frequent_ones(rng):
+    capacity = 20
+    counter = CategoryCounter(capacity=capacity)
+    rows = 0
+    for chunk in range(50):
+        frequent = ["x"] * 30 + ["y"] * 20 + ["z"] * 10
+        rare = [f"rare-{chunk}-{i}" for i in range(15)]
+        values = rng.permutation(np.array(frequent + rare, dtype=object))
+        counter.update(pd.Series(values))
+        rows += len(values)
+        assert len(counter.keys) <= capacity
+
+    profile = counter.profile(max_categories=3)
+
+    # Pruned counts are folded into "other", so the total is preserved
+    assert profile["count"] == rows
+    assert counter.pruned > 0
+    assert profile["categories"] == ["x", "y", "z"]
+    assert profile["category_counts"] == [1500, 1000, 500]
+    assert profile["other_count"] == rows - 3000
+    assert not profile["exact"]
+
+
+def test_empty_counter_has_no_profile():
+    counter = CategoryCounter(capacity=4)
+    counter.update(pd.Series([None, ""], dtype=object))
+    assert counter.profile() is None
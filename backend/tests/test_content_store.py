@@ -0,0 +1,55 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from content_store import UploadTooLarge, store_stream
+from models import get_db
+from upload import discard_unreferenced
+
+CONTENT = b"feature,target\n" + b"1.5,0\n" * 1000
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    first = store_stream(io.BytesIO(CONTENT), str(tmp_path), ".csv", chunk_size=1000)
+    second = store_stream(io.BytesIO(CONTENT), str(tmp_path), ".csv")
+
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    assert first == (str(tmp_path / f"{digest}.csv"), digest, len(CONTENT), True)
+    assert second == (first[0], digest, len(CONTENT), False)
+    assert os.listdir(tmp_path) == [f"{digest}.csv"]
+
+    other = store_stream(io.BytesIO(CONTENT + b"2.5,1\n"), str(tmp_path), ".csv")
+    assert other[0] != first[0] and other[3]
+
+
+def test_oversized_upload_leaves_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        store_stream(io.BytesIO(CONTENT), str(tmp_path), ".csv", max_size=len(CONTENT) - 1, chunk_size=100)
+
+    assert os.listdir(tmp_path) == []
+    assert store_stream(io.BytesIO(CONTENT), str(tmp_path), ".csv", max_size=len(CONTENT))[3]
+
+
+def test_discard_keeps_content_another_row_references(user, tmp_path):
+    kept, content_hash, _, _ = store_stream(io.BytesIO(CONTENT), str(tmp_path), ".pkl")
+    dropped, other_hash, _, _ = store_stream(io.BytesIO(CONTENT + b"x"), str(tmp_path), ".pkl")
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "INSERT INTO uploaded_models (filename, path, content_hash, user_id) VALUES ('m.pkl', %s, %s, %s)",
+            (kept, content_hash, user)
+        )
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    discard_unreferenced("uploaded_models", content_hash, [kept])
+    discard_unreferenced("uploaded_models", other_hash, [dropped, None])
+
+    assert os.path.exists(kept)
+    assert not os.path.exists(dropped)
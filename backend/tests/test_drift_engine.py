@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift_detection import build_reference_profile
+from drift_engine import analyze_columns
+from streaming import analyze_streaming
+
+
+def test_analyze_columns_coerces_non_numeric_current_columns(rng):
+    reference = pd.DataFrame({name: rng.normal(size=500) for name in ("as_text", "text", "number")})
+    profiles = {name: build_reference_profile(reference[name]) for name in reference}
+
+    values = rng.normal(size=300)
+    current = pd.DataFrame({
+        "as_text": values.astype(str),
+        "text": ["n/a"] * 300,
+        "number": values,
+    })
+    current.loc[0, "as_text"] = "oops"
+
+    results = {r["feature_name"]: r for r in analyze_columns(profiles, current, list(reference))}
+
+    assert set(results) == {"as_text", "number"}
+    expected = analyze_columns(profiles, current.assign(as_text=np.r_[np.nan, values[1:]]), ["as_text"])[0]
+    assert results["as_text"]["ks_statistic"] == expected["ks_statistic"]
+
+
+def test_sorted_ks_kernel_matches_merged_argsort(rng):
+    reference = pd.DataFrame({"a": rng.normal(size=3000), "b": rng.integers(0, 5, size=3000).astype(float)})
+    profiles = {name: build_reference_profile(reference[name]) for name in reference}
+    current = pd.DataFrame({"a": rng.normal(0.2, 1.1, size=800), "b": rng.integers(0, 6, size=800).astype(float)})
+    current.loc[::7, "a"] = np.nan
+
+    merged = analyze_columns(profiles, current, ["a", "b"])
+    searched = analyze_columns(profiles, current, ["a", "b"], sorted_min_rows=0)
+
+    for left, right in zip(merged, searched):
+        assert left["ks_method"] == right["ks_method"] == "exact"
+        assert np.isclose(left["ks_statistic"], right["ks_statistic"], rtol=0, atol=1e-12)
+        assert left["current_stats"] == right["current_stats"]
+
+
+def test_analyze_streaming_coerces_non_numeric_current_columns(tmp_path, rng):
+    reference = pd.DataFrame({name: rng.normal(size=500) for name in ("as_text", "text", "number")})
+    profiles = {name: build_reference_profile(reference[name]) for name in reference}
+
+    values = rng.normal(size=1000)
+    current = pd.DataFrame({"as_text": values.astype(str), "text": "x", "number": values})
+    current.loc[0, "as_text"] = "oops"
+    path = str(tmp_path / "current.csv")
+    current.to_csv(path, index=False)
+
+    results = {r["feature_name"]: r for r in analyze_streaming(profiles, path, list(reference), chunk_size=300)}
+
+    assert set(results) == {"as_text", "number"}
+    assert results["as_text"]["current_stats"]["min"] == pytest.approx(values[1:].min(), rel=1e-12)
+    assert results["as_text"]["current_stats"]["max"] == pytest.approx(values[1:].max(), rel=1e-12)
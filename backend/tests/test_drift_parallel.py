@@ -0,0 +1,64 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+
+import drift_parallel
+from config import Config
+from drift_detection import build_reference_profile
+from drift_engine import analyze_columns
+from drift_parallel import analyze_parallel, can_run_parallel, shard_columns
+from streaming import analyze_streaming
+
+
+@pytest.fixture
+def drift_pool(monkeypatch):
+    monkeypatch.setattr(Config, "DRIFT_WORKERS", 2)
+    yield
+    drift_parallel.shutdown_drift_executor()
+
+
+@pytest.fixture
+def datasets(tmp_path, rng):
+    columns = [f"f{i}" for i in range(11)]
+    reference = pd.DataFrame(rng.normal(size=(3000, len(columns))), columns=columns)
+    current = pd.DataFrame(rng.normal(0.1, 1.2, size=(2000, len(columns))), columns=columns)
+    current = current.mask(rng.random(current.shape) < 0.05)
+
+    path = str(tmp_path / "current.csv.arrow")
+    feather.write_feather(pa.Table.from_pandas(current, preserve_index=False), path, compression="uncompressed")
+    profiles = {c: build_reference_profile(reference[c]) for c in columns}
+    return profiles, current, path, columns
+
+
+def test_shards_are_contiguous_and_balanced():
+    columns = [f"f{i}" for i in range(11)]
+
+    shards = shard_columns(columns, 2)
+
+    assert [c for shard in shards for c in shard] == columns
+    assert [len(shard) for shard in shards] == [2, 2, 2, 1, 1, 1, 1, 1]
+    assert shard_columns(columns[:3], 4) == [["f0"], ["f1"], ["f2"]]
+
+
+def test_can_run_parallel(drift_pool):
+    columns = ["a", "b"]
+    assert can_run_parallel("data.csv.arrow", columns, True)
+    assert not can_run_parallel("data.csv.arrow", columns, False)
+    assert not can_run_parallel("data.csv", columns, True)
+    assert not can_run_parallel("data.csv.arrow", ["a"], True)
+
+
+def test_sharded_analysis_matches_serial(drift_pool, datasets):
+    profiles, current, path, columns = datasets
+
+    assert analyze_parallel(profiles, path, columns) == analyze_columns(profiles, current, columns)
+
+
+def test_sharded_streaming_matches_serial(drift_pool, datasets):
+    profiles, _, path, columns = datasets
+
+    sharded = analyze_parallel(profiles, path, columns, streaming=True, chunk_size=300, ks_error=0.02)
+    serial = analyze_streaming(profiles, path, columns, chunk_size=300, ks_error=0.02)
+
+    assert sharded == serial
@@ -0,0 +1,48 @@
+import pytest
+
+from drift_detection import drift_params_error
+
+BASE = {"reference_dataset_id": 1, "current_dataset_id": 2}
+
+
+@pytest.mark.parametrize("streaming", [True, False, None])
+def test_streaming_accepts_booleans(streaming):
+    assert drift_params_error({**BASE, "streaming": streaming}) is None
+
+
+@pytest.mark.parametrize("streaming", ["false", "true", 0, 1])
+def test_streaming_rejects_non_booleans(streaming):
+    assert drift_params_error({**BASE, "streaming": streaming}) == "streaming must be a boolean"
+
+
+def test_chunk_size_accepts_positive_integers():
+    assert drift_params_error({**BASE, "chunk_size": 5000}) is None
+
+
+@pytest.mark.parametrize("chunk_size", [0, -10, "1000", "abc", 10.5, True])
+def test_chunk_size_rejects_other_values(chunk_size):
+    assert drift_params_error({**BASE, "chunk_size": chunk_size}) == "chunk_size must be a positive integer"
+
+
+@pytest.mark.parametrize("extra", [
+    {"streaming": False, "ks_method": "approximate"},
+    {"streaming": False, "ks_error_bound": 0.01},
+    {"sample_mode": "reservoir", "ks_error_bound": 0.01},
+])
+def test_sketch_options_rejected_in_memory(extra):
+    assert drift_params_error({**BASE, **extra}) == (
+        "ks_method 'approximate' and ks_error_bound apply to streaming analysis only"
+    )
+
+
+def test_exact_ks_rejected_when_streaming():
+    assert drift_params_error({**BASE, "streaming": True, "ks_method": "exact"}) is not None
+
+
+@pytest.mark.parametrize("extra", [
+    {"streaming": True, "ks_error_bound": 0.01},
+    {"ks_method": "approximate", "ks_error_bound": 0.01},
+    {"streaming": False, "ks_method": "exact"},
+])
+def test_consistent_ks_options_accepted(extra):
+    assert drift_params_error({**BASE, **extra}) is None
@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+
+import jobs
+from config import Config
+from errors import AnalysisError
+
+
+@pytest.fixture
+def job_kind(monkeypatch):
+    """Register a job type that records its calls, running jobs inline"""
+    kind = f"test-{uuid.uuid4().hex}"
+    calls = []
+
+    def run(user_id, params, progress):
+        calls.append((user_id, params))
+        if params.get("fail"):
+            raise AnalysisError(params["fail"])
+        progress(1, "done")
+        return {"value": params.get("value"), "nan": float("nan")}
+
+    monkeypatch.setitem(jobs.JOB_TYPES, kind, run)
+    monkeypatch.setattr(Config, "JOB_EXECUTOR", "inline")
+    return kind, calls
+
+
+def job_row(job_id):
+    rows = jobs._execute(
+        "SELECT status, progress, result, error, started_at IS NOT NULL FROM analysis_jobs WHERE id = %s",
+        (job_id,), fetch=True
+    )
+    return rows[0]
+
+
+def insert_job(user_id, kind, status, stale_seconds=0):
+    job_id = str(uuid.uuid4())
+    jobs._execute(
+        """
+        INSERT INTO analysis_jobs (id, user_id, kind, params, status, updated_at)
+        VALUES (%s, %s, %s, '{}', %s, NOW() - make_interval(secs => %s))
+        """,
+        (job_id, user_id, kind, status, stale_seconds)
+    )
+    return job_id
+
+
+def test_submitted_job_runs_once(user, job_kind):
+    kind, calls = job_kind
+
+    job_id = jobs.submit_job(user, kind, {"value": 3})
+
+    status, progress, result, error, started = job_row(job_id)
+    assert (status, progress, error, started) == ("succeeded", 1, None, True)
+    assert result == {"value": 3, "nan": None}
+    assert calls == [(str(user), {"value": 3})]
+
+    # A finished job cannot be claimed again
+    jobs._run_job(job_id)
+    assert len(calls) == 1
+
+
+def test_failed_job_records_the_error(user, job_kind):
+    kind, _ = job_kind
+
+    job_id = jobs.submit_job(user, kind, {"fail": "bad input"})
+
+    status, _, result, error, _ = job_row(job_id)
+    assert (status, error) == ("failed", "bad input")
+    assert result["error"] == "bad input"
+
+
+def test_running_job_is_not_claimed_twice(user, job_kind):
+    kind, calls = job_kind
+    job_id = insert_job(user, kind, "running")
+
+    jobs._run_job(job_id)
+
+    assert calls == []
+    assert job_row(job_id)[0] == "running"
+
+
+def test_resume_requeues_only_stale_running_jobs(user, job_kind, monkeypatch):
+    kind, calls = job_kind
+    monkeypatch.setattr(Config, "JOB_STALE_AFTER", 60)
+    stale = insert_job(user, kind, "running", stale_seconds=600)
+    alive = insert_job(user, kind, "running")
+    queued = insert_job(user, kind, "queued")
+
+    jobs.resume_jobs()
+
+    assert job_row(stale)[0] == "succeeded"
+    assert job_row(queued)[0] == "succeeded"
+    assert job_row(alive)[0] == "running"
+    assert len(calls) == 2
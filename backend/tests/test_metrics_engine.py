@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn import metrics
+
+from metrics_engine import (
+    ConfusionAccumulator, RegressionAccumulator, classification_metrics, evaluate_in_chunks, regression_metrics
+)
+
+
+class ColumnModel:
+    """Predicts the `prediction` column, so the test controls every prediction"""
+
+    def predict(self, X):
+        return X["prediction"].to_numpy()
+
+
+def uneven_chunks(frame, sizes):
+    start = 0
+    for size in sizes:
+        yield frame.iloc[start:start + size]
+        start += size
+    yield frame.iloc[start:]
+
+
+def split(chunk):
+    return chunk[["prediction"]], chunk["target"]
+
+
+@pytest.mark.parametrize("offset", [0.0, 1e9])
+def test_chunked_regression_matches_sklearn(rng, offset):
+    target = offset + rng.normal(scale=3.0, size=100_000)
+    frame = pd.DataFrame({"target": target, "prediction": target + rng.normal(scale=0.5, size=len(target))})
+    sizes = rng.integers(1, 7_000, size=40)
+
+    result = evaluate_in_chunks(ColumnModel(), uneven_chunks(frame, sizes), split, task_type="regression")
+
+    mse = metrics.mean_squared_error(frame["target"], frame["prediction"])
+    assert result["mse"] == pytest.approx(mse, rel=1e-9)
+    assert result["rmse"] == pytest.approx(np.sqrt(mse), rel=1e-9)
+    assert result["mae"] == pytest.approx(metrics.mean_absolute_error(frame["target"], frame["prediction"]), rel=1e-9)
+    assert result["r2_score"] == pytest.approx(metrics.r2_score(frame["target"], frame["prediction"]), rel=1e-9)
+
+
+def test_regression_constant_target_follows_sklearn():
+    acc = RegressionAccumulator()
+    acc.update([2.0, 2.0], [2.0, 2.0])
+    acc.update([2.0], [2.0])
+    assert regression_metrics(acc)["r2_score"] == metrics.r2_score([2.0] * 3, [2.0] * 3)
+
+    acc.update([2.0], [3.0])
+    assert regression_metrics(acc)["r2_score"] == metrics.r2_score([2.0] * 4, [2.0] * 3 + [3.0])
+
+
+def test_regression_rejects_non_finite_values():
+    with pytest.raises(ValueError):
+        RegressionAccumulator().update([1.0, np.nan], [1.0, 2.0])
+
+
+@pytest.mark.parametrize("labels, extra_prediction", [
+    (np.array(["cat", "dog", "fish"]), "bird"),
+    (np.array([0, 1, 2, 3]), 7),
+])
+def test_chunked_classification_matches_sklearn(rng, labels, extra_prediction):
+    y_true = rng.choice(labels, size=20_000)
+    y_pred = np.where(rng.random(len(y_true)) < 0.7, y_true, rng.choice(labels, size=len(y_true)))
+    # A label that only ever appears as a prediction
+    y_pred[rng.random(len(y_true)) < 0.01] = extra_prediction
+    frame = pd.DataFrame({"target": y_true, "prediction": y_pred})
+
+    result = evaluate_in_chunks(ColumnModel(), uneven_chunks(frame, rng.integers(1, 3_000, size=10)), split)
+
+    all_labels = sorted(set(y_true) | set(y_pred))
+    assert result["confusion_matrix"]["labels"] == all_labels
+    assert result["confusion_matrix"]["matrix"] == metrics.confusion_matrix(y_true, y_pred, labels=all_labels).tolist()
+    assert result["accuracy"] == pytest.approx(metrics.accuracy_score(y_true, y_pred))
+
+    for average in ("weighted", "macro", "micro"):
+        precision, recall, f1, _ = metrics.precision_recall_fscore_support(
+            y_true, y_pred, average=average, zero_division=0
+        )
+        assert result[average] == pytest.approx({"precision": precision, "recall": recall, "f1_score": f1})
+    assert result["f1_score"] == result["weighted"]["f1_score"]
+
+    precision, recall, f1, support = metrics.precision_recall_fscore_support(
+        y_true, y_pred, labels=all_labels, zero_division=0
+    )
+    assert [c["label"] for c in result["per_class"]] == all_labels
+    assert [c["support"] for c in result["per_class"]] == support.tolist()
+    assert [c["precision"] for c in result["per_class"]] == pytest.approx(precision)
+    assert [c["recall"] for c in result["per_class"]] == pytest.approx(recall)
+    assert [c["f1_score"] for c in result["per_class"]] == pytest.approx(f1)
+
+
+def test_numerically_equal_labels_are_one_class():
+    acc = ConfusionAccumulator()
+    acc.update(np.array([1, 2]), np.array([1, 2]))
+    acc.update(np.array([1.0, 2.0]), np.array([2.0, 2.0]))
+
+    assert acc.labels == [1, 2]
+    assert acc.matrix.tolist() == [[1, 1], [0, 2]]
+
+
+def test_mixed_label_types_are_rejected():
+    with pytest.raises(ValueError, match="Mix of label input types"):
+        ConfusionAccumulator().update(np.array(["a", "b"]), np.array([1, 2]))
+
+    acc = ConfusionAccumulator()
+    acc.update(np.array(["a", "b"]), np.array(["a", "a"]))
+    with pytest.raises(ValueError, match="Mix of label input types"):
+        acc.update(np.array([1, 2]), np.array([1, 1]))
+
+
+def test_empty_confusion_matrix_is_rejected():
+    with pytest.raises(ValueError):
+        classification_metrics(np.zeros((2, 2), dtype=int))
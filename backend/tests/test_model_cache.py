@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+import pytest
+
+from model_cache import ModelCache
+
+
+class StubLoader:
+    """Counts loads and returns a fresh object per load"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append(os.path.basename(path))
+        return object()
+
+
+def model_file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_hits_return_the_loaded_model(tmp_path):
+    cache, loader = ModelCache(1000), StubLoader()
+    path = model_file(tmp_path, "a.pkl", 100)
+
+    model = cache.get_or_load("a", path, loader)
+
+    assert cache.get_or_load("a", path, loader) is model
+    assert loader.calls == ["a.pkl"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 100)
+
+
+def test_least_recently_used_model_is_evicted_first(tmp_path):
+    cache, loader = ModelCache(250), StubLoader()
+    paths = {name: model_file(tmp_path, f"{name}.pkl", 100) for name in "abc"}
+
+    cache.get_or_load("a", paths["a"], loader)
+    cache.get_or_load("b", paths["b"], loader)
+    cache.get_or_load("a", paths["a"], loader)
+    cache.get_or_load("c", paths["c"], loader)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 200
+    cache.get_or_load("a", paths["a"], loader)
+    cache.get_or_load("b", paths["b"], loader)
+    assert loader.calls == ["a.pkl", "b.pkl", "c.pkl", "b.pkl"]
+
+
+def test_models_over_the_budget_are_not_cached(tmp_path):
+    cache, loader = ModelCache(50), StubLoader()
+    path = model_file(tmp_path, "big.pkl", 100)
+
+    cache.get_or_load("big", path, loader)
+    cache.get_or_load("big", path, loader)
+
+    assert loader.calls == ["big.pkl", "big.pkl"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_replaced_file_is_reloaded(tmp_path):
+    cache, loader = ModelCache(1000), StubLoader()
+    path = model_file(tmp_path, "a.pkl", 100)
+    first = cache.get_or_load("a", path, loader)
+
+    # Same size, newer mtime
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = cache.get_or_load("a", path, loader)
+    # New size
+    model_file(tmp_path, "a.pkl", 120)
+    third = cache.get_or_load("a", path, loader)
+
+    assert len({id(first), id(second), id(third)}) == 3
+    # Older versions of the file are dropped, not kept until evicted
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (1, 120)
+
+
+def test_concurrent_misses_load_once(tmp_path):
+    cache, loader = ModelCache(1000), StubLoader(delay=0.2)
+    path = model_file(tmp_path, "a.pkl", 100)
+    start = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        start.wait()
+        results.append(cache.get_or_load("a", path, loader))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == ["a.pkl"]
+    assert len({id(model) for model in results}) == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (7, 1)
+
+
+def test_failed_load_is_retried(tmp_path):
+    cache = ModelCache(1000)
+    path = model_file(tmp_path, "a.pkl", 100)
+
+    def broken(path):
+        raise ValueError("corrupt pickle")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("a", path, broken)
+    loader = StubLoader()
+    cache.get_or_load("a", path, loader)
+
+    assert loader.calls == ["a.pkl"]
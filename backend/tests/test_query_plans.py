@@ -0,0 +1,27 @@
+import pytest
+
+from migrations.plans import check_plan, plan_checks, run_plan_checks
+from models import get_db
+
+
+def test_hot_queries_use_their_indexes(db):
+    results = dict(run_plan_checks())
+
+    assert set(results) == {check.name for check in plan_checks()}
+    assert {name: problems for name, problems in results.items() if problems} == {}
+
+
+@pytest.mark.parametrize("check", plan_checks(), ids=lambda check: check.index)
+def test_plan_check_catches_missing_index(db, check):
+    # Without index scans the planner has to fall back to a plan the check must reject
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute("SET LOCAL enable_bitmapscan = off")
+        cur.execute("SET LOCAL enable_indexonlyscan = off")
+        assert check_plan(cur, check)
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
@@ -0,0 +1,126 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+
+from drift_detection import drift_params_error
+from conftest import APP_DIR
+from sampling import Reservoir, allocate_strata, reservoir_sample, stratified_sample
+
+
+def test_reservoir_keeps_nan_after_int_chunks(rng):
+    reservoir = Reservoir(50, rng)
+    reservoir.update({"x": np.arange(100, dtype=np.int64)})
+    for _ in range(20):
+        reservoir.update({"x": np.full(100, np.nan)})
+
+    values = reservoir.columns["x"]
+    assert values.dtype == np.float64
+    assert np.nanmin(values) >= 0
+    assert np.isnan(values).sum() > 0
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 1000])
+def test_reservoir_chunking_matches_row_at_a_time(chunk):
+    values = np.arange(1000, dtype=float)
+    rows = Reservoir(25, np.random.default_rng(3))
+    for i in range(len(values)):
+        rows.update({"x": values[i:i + 1]})
+
+    chunks = Reservoir(25, np.random.default_rng(3))
+    for start in range(0, len(values), chunk):
+        chunks.update({"x": values[start:start + chunk]})
+
+    assert chunks.seen == rows.seen == 1000
+    np.testing.assert_array_equal(chunks.columns["x"], rows.columns["x"])
+
+
+def test_reservoir_keeps_every_row_below_its_size(rng):
+    reservoir = Reservoir(50, rng)
+    reservoir.update({"x": np.arange(20), "y": np.arange(20) * 2})
+    reservoir.update({"x": np.arange(20, 30), "y": np.arange(20, 30) * 2})
+    reservoir.update({"x": np.empty(0), "y": np.empty(0)})
+
+    assert reservoir.seen == 30
+    np.testing.assert_array_equal(reservoir.columns["x"], np.arange(30))
+    np.testing.assert_array_equal(reservoir.columns["y"], np.arange(30) * 2)
+
+
+def test_reservoir_sample_is_uniform():
+    size, population, trials = 5, 20, 4000
+    rng = np.random.default_rng(11)
+    hits = np.zeros(population)
+    for _ in range(trials):
+        reservoir = Reservoir(size, rng)
+        for start in range(0, population, 3):
+            reservoir.update({"x": np.arange(start, min(start + 3, population))})
+        sample = reservoir.columns["x"].astype(int)
+        assert len(np.unique(sample)) == size
+        hits[sample] += 1
+
+    # Every row is kept with probability size / population
+    np.testing.assert_allclose(hits / trials, size / population, atol=0.03)
+
+
+@pytest.mark.parametrize("population, size, expected", [
+    ({"a": 900, "b": 90, "c": 10}, 100, {"a": 90, "b": 9, "c": 1}),
+    ({"a": 50, "b": 30, "c": 20}, 10, {"a": 5, "b": 3, "c": 2}),
+    # Largest remainders take the rows left after flooring
+    ({"a": 1, "b": 1, "c": 1}, 2, {"a": 1, "b": 1, "c": 1}),
+    ({"a": 45, "b": 35, "c": 20}, 9, {"a": 4, "b": 3, "c": 2}),
+    ({"a": 46, "b": 34, "c": 20}, 11, {"a": 5, "b": 4, "c": 2}),
+    # Small strata still get a row, and no stratum more rows than it has
+    ({"a": 5, "b": 1, "c": 1000}, 50, {"a": 1, "b": 1, "c": 49}),
+    ({"a": 1, "b": 2}, 10, {"a": 1, "b": 2}),
+])
+def test_allocate_strata(population, size, expected):
+    assert allocate_strata(population, size) == expected
+
+
+def test_stratified_sample_int_column_with_late_nulls(tmp_path, rng):
+    x = pd.array(list(range(1000)) + [None] * 1000, dtype="Int64")
+    table = pa.table({"x": pa.array(x), "group": ["a", "b"] * 1000})
+    path = str(tmp_path / "data.csv.arrow")
+    feather.write_feather(table, path, compression="uncompressed")
+
+    sample, population = stratified_sample(path, ["x"], "group", 200, rng, chunk_size=500)
+
+    assert population == {"a": 1000, "b": 1000}
+    assert sample["x"].dtype == np.float64
+    assert np.nanmin(sample["x"]) >= 0
+    assert np.isnan(sample["x"]).any()
+
+
+def test_sample_seed_validation():
+    base = {"reference_dataset_id": 1, "current_dataset_id": 2, "sample_mode": "reservoir"}
+    assert drift_params_error({**base, "sample_seed": 7}) is None
+    assert drift_params_error({**base, "sample_seed": -1}) is not None
+    assert drift_params_error({**base, "sample_seed": True}) is not None
+    assert drift_params_error({**base, "sample_seed": "1"}) is not None
+
+
+def test_samples_coerce_non_numeric_columns(tmp_path, rng):
+    values = rng.normal(size=1000)
+    frame = pd.DataFrame({"as_text": values.astype(str), "b": "x", "group": ["a", "b"] * 500})
+    frame.loc[0, "as_text"] = "oops"
+    path = str(tmp_path / "current.csv")
+    frame.to_csv(path, index=False)
+
+    sample, population = reservoir_sample(path, ["as_text", "b"], 2000, rng, chunk_size=300)
+    assert population == 1000
+    np.testing.assert_allclose(sample["as_text"], np.r_[np.nan, values[1:]], rtol=1e-12)
+    assert np.isnan(sample["b"]).all()
+
+    sample, population = stratified_sample(path, ["as_text", "b"], "group", 100, rng, chunk_size=300)
+    assert population == {"a": 500, "b": 500}
+    assert sample["as_text"].dtype == np.float64
+    assert np.isnan(sample["b"]).all()
+
+
+def test_sampling_imports_without_drift_detection():
+    code = "import sys, sampling; assert 'drift_detection' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, check=True)
@@ -0,0 +1,137 @@
+import hashlib
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import upload_sessions
+from config import Config
+from main import create_app
+from models import get_db
+from retention import run_retention
+
+CONTENT = b"0123456789" * 25 + b"tail"
+
+
+@pytest.fixture
+def client(user, tmp_path, monkeypatch):
+    """Test client authenticated as `user`, storing sessions and models under tmp_path"""
+    _, extensions, register, table = upload_sessions.UPLOAD_KINDS["model"]
+    monkeypatch.setitem(upload_sessions.UPLOAD_KINDS, "model", (str(tmp_path), extensions, register, table))
+    monkeypatch.setattr(upload_sessions, "SESSION_DIR", str(tmp_path / "sessions"))
+
+    app = create_app(start=False)
+    with app.app_context():
+        token = create_access_token(identity=str(user))
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def create(client, **extra):
+    body = {"kind": "model", "filename": "model.pkl", "size": len(CONTENT), "chunk_size": 100, **extra}
+    return client.post("/upload/sessions", json=body)
+
+
+def put(client, upload_id, index, data=None):
+    data = CONTENT[index * 100:(index + 1) * 100] if data is None else data
+    return client.put(f"/upload/sessions/{upload_id}/chunks/{index}", data=data)
+
+
+def test_chunks_in_any_order_complete_into_one_file(client):
+    response = create(client, sha256=hashlib.sha256(CONTENT).hexdigest())
+    assert response.status_code == 201
+    upload_id = response.get_json()["upload_id"]
+    assert response.get_json()["missing_chunks"] == [[0, 2]]
+
+    assert put(client, upload_id, 2).status_code == 200
+    assert put(client, upload_id, 0).status_code == 200
+    assert client.post(f"/upload/sessions/{upload_id}/complete").get_json()["missing_chunks"] == [[1, 1]]
+
+    assert put(client, upload_id, 1).status_code == 200
+    status = client.get(f"/upload/sessions/{upload_id}").get_json()
+    assert (status["received_bytes"], status["missing_chunks"]) == (len(CONTENT), [])
+
+    response = client.post(f"/upload/sessions/{upload_id}/complete")
+    assert response.status_code == 201
+    assert response.get_json()["size"] == len(CONTENT)
+    assert client.get(f"/upload/sessions/{upload_id}").get_json()["status"] == "completed"
+    assert not os.path.exists(upload_sessions._session_dir(upload_id))
+    assert put(client, upload_id, 0).status_code == 409
+
+
+def test_chunk_length_and_checksum_are_checked(client):
+    upload_id = create(client).get_json()["upload_id"]
+
+    assert put(client, upload_id, 0, CONTENT[:99]).status_code == 400
+    assert put(client, upload_id, 3).status_code == 400
+    response = client.put(
+        f"/upload/sessions/{upload_id}/chunks/0", data=CONTENT[:100], headers={"X-Chunk-SHA256": "0" * 64}
+    )
+    assert response.status_code == 400
+    assert client.get(f"/upload/sessions/{upload_id}").get_json()["received_chunks"] == []
+
+
+def test_checksum_mismatch_reopens_the_upload(client):
+    upload_id = create(client, sha256="0" * 64).get_json()["upload_id"]
+    for index in range(3):
+        put(client, upload_id, index)
+
+    response = client.post(f"/upload/sessions/{upload_id}/complete")
+
+    assert response.status_code == 422
+    assert response.get_json()["actual_sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert client.get(f"/upload/sessions/{upload_id}").get_json()["status"] == "open"
+
+
+def test_abort_discards_chunks(client):
+    upload_id = create(client).get_json()["upload_id"]
+    put(client, upload_id, 0)
+
+    response = client.delete(f"/upload/sessions/{upload_id}")
+
+    assert response.get_json()["status"] == "aborted"
+    assert not os.path.exists(upload_sessions._session_dir(upload_id))
+    assert put(client, upload_id, 1).status_code == 409
+    assert client.post(f"/upload/sessions/{upload_id}/complete").status_code == 409
+    assert client.delete(f"/upload/sessions/{upload_id}").status_code == 409
+
+
+def test_open_uploads_are_capped_per_user(client, monkeypatch):
+    monkeypatch.setattr(Config, "MAX_OPEN_UPLOAD_SESSIONS", 2)
+    first = create(client).get_json()["upload_id"]
+    create(client)
+
+    assert create(client).status_code == 429
+    client.delete(f"/upload/sessions/{first}")
+    assert create(client).status_code == 201
+
+
+def test_idle_uploads_expire(client, user):
+    upload_id = create(client).get_json()["upload_id"]
+    put(client, upload_id, 0)
+
+    conn = get_db()
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE upload_sessions SET expires_at = NOW() - INTERVAL '1 second' WHERE id = %s", (upload_id,))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    assert client.get(f"/upload/sessions/{upload_id}").get_json()["status"] == "expired"
+    assert put(client, upload_id, 1).status_code == 409
+    assert upload_id in run_retention()["expired_uploads"]
+    assert not os.path.exists(upload_sessions._session_dir(upload_id))
+
+
+def test_other_users_cannot_see_an_upload(client):
+    upload_id = create(client).get_json()["upload_id"]
+    app = client.application
+    with app.app_context():
+        token = create_access_token(identity="0")
+
+    response = app.test_client().get(f"/upload/sessions/{upload_id}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+    assert client.get("/upload/sessions/not-a-uuid").status_code == 404
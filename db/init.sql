@@ -19,13 +19,35 @@ CREATE TABLE IF NOT EXISTS model_metrics (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Drift logs table
+-- Drift logs table, range-partitioned by month on detected_at. Monthly partitions
+-- (drift_logs_pYYYYMM) are created ahead of time and dropped after the retention
+-- window by the backend (retention.py); anything else lands in the default partition.
 CREATE TABLE IF NOT EXISTS drift_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    run_id UUID,  -- analysis run that wrote the row
+    reference_dataset_id INTEGER,
+    current_dataset_id INTEGER,
     feature_name VARCHAR(100),
     drift_score FLOAT,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    detected_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, detected_at)
+) PARTITION BY RANGE (detected_at);
+CREATE TABLE IF NOT EXISTS drift_logs_default PARTITION OF drift_logs DEFAULT;
+
+-- Drift scores pre-aggregated per user, feature and hour/day bucket, maintained as logs are written
+CREATE TABLE IF NOT EXISTS drift_rollups (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    feature_name TEXT NOT NULL,
+    resolution TEXT NOT NULL,  -- 'hour' or 'day'
+    bucket_start TIMESTAMP NOT NULL,
+    sample_count BIGINT NOT NULL,
+    score_sum DOUBLE PRECISION NOT NULL,
+    score_min DOUBLE PRECISION NOT NULL,
+    score_max DOUBLE PRECISION NOT NULL,
+    last_score DOUBLE PRECISION NOT NULL,
+    last_detected_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, resolution, bucket_start, feature_name)
 );
 
 -- Uploaded models table with user association
@@ -33,6 +55,7 @@ CREATE TABLE IF NOT EXISTS uploaded_models (
     id SERIAL PRIMARY KEY,
     filename TEXT NOT NULL,
     path TEXT NOT NULL,
+    content_hash TEXT,  -- SHA-256 of the file; identical uploads share storage and caches
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -42,13 +65,99 @@ CREATE TABLE IF NOT EXISTS uploaded_datasets (
     id SERIAL PRIMARY KEY,
     filename TEXT NOT NULL,
     path TEXT NOT NULL,
+    columnar_path TEXT,
+    schema JSONB,
+    content_hash TEXT,  -- SHA-256 of the file; identical uploads share storage and caches
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-column reference distribution profiles used by drift analysis
+CREATE TABLE IF NOT EXISTS dataset_profiles (
+    id SERIAL PRIMARY KEY,
+    dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    feature_name TEXT NOT NULL,
+    profile JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (dataset_id, feature_name)
+);
+
+-- Stored drift analysis results keyed by dataset pair, dataset contents, method
+-- parameters and code version (see analysis_runs.py); repeat requests reuse them
+CREATE TABLE IF NOT EXISTS analysis_runs (
+    id UUID PRIMARY KEY,  -- also the run_id on the run's drift_logs rows
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    reference_dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    current_dataset_id INTEGER REFERENCES uploaded_datasets(id) ON DELETE CASCADE,
+    cache_key TEXT NOT NULL,
+    params JSONB NOT NULL,
+    code_version INTEGER NOT NULL,
+    result JSONB NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP,
+    UNIQUE (user_id, cache_key)
+);
+
+-- Resumable chunked uploads; chunks live on disk until the upload is completed
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    id UUID PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    total_size BIGINT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    sha256 TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL  -- pushed back by every chunk; expired uploads are swept by retention.py
+);
+
+-- Background analysis jobs
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id UUID PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    params JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress FLOAT DEFAULT 0,
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Sampled stack profiles of slow or admin-debugged analysis requests (collapsed
+-- stacks, see profiler.py); trimmed to the newest PROFILE_MAX_STORED
+CREATE TABLE IF NOT EXISTS request_profiles (
+    id UUID PRIMARY KEY,
+    request_id TEXT,  -- X-Request-ID of the profiled request, as sent by the client
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    route TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    sample_count INTEGER NOT NULL,
+    interval_ms DOUBLE PRECISION NOT NULL,
+    stacks TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_uploaded_models_user ON uploaded_models(user_id);
 CREATE INDEX IF NOT EXISTS idx_uploaded_datasets_user ON uploaded_datasets(user_id);
-CREATE INDEX IF NOT EXISTS idx_model_metrics_user ON model_metrics(user_id);
-CREATE INDEX IF NOT EXISTS idx_drift_logs_user ON drift_logs(user_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_uploaded_datasets_hash ON uploaded_datasets(content_hash);
+CREATE INDEX IF NOT EXISTS idx_uploaded_models_hash ON uploaded_models(content_hash);
+CREATE INDEX IF NOT EXISTS idx_model_metrics_user_time ON model_metrics(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_drift_logs_user_time ON drift_logs(user_id, detected_at);
+CREATE INDEX IF NOT EXISTS idx_drift_logs_run ON drift_logs(run_id);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_user ON upload_sessions(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_upload_sessions_expiry ON upload_sessions(status, expires_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_user ON analysis_jobs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_request_profiles_created ON request_profiles(created_at);
+CREATE INDEX IF NOT EXISTS idx_request_profiles_request ON request_profiles(request_id);